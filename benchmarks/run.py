@@ -0,0 +1,213 @@
+"""Headless benchmark of the dashboard's data paths.
+
+    python -m benchmarks.run --years 10 --markets 7 --repeat 5 [--apptest]
+
+Generates a synthetic dataset, times each page's load / compute / figure
+stages through the same core functions the pages call, and appends the
+results to benchmarks/results.jsonl so runs can be compared over time.
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import core.data
+from core.data import TIMEFRAMES, load_table
+from core.views import (anomaly_stats, condition_overview, custom_metrics, days_slice,
+                        flow_consensus, flow_deltas, latest_first, top_anomalies)
+from core.figures import (flow_delta_figure, flow_trend_figure, key_metrics_figure,
+                          metric_lines_figure, zscore_heatmap_figure)
+from benchmarks.synthetic import MARKETS, generate_dataset
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+PAGES = ["pages/1_Summary_Tab.py", "pages/2_Z-Score_Heatmap.py", "pages/3_Metric_Visualizer.py"]
+SUMMARY_METRIC_COLUMNS = ["Date", "Days", "Open", "High", "Low", "Close", "POC", "VAH", "VAL",
+                          "TPO Ab. POC", "TPO Bl. POC"]
+VISUALIZER_METRICS = ["POC", "VAH", "VAL"]
+HEATMAP_DAYS = 20
+
+
+def _path(market_dir, file_path):
+    return os.path.join(market_dir, os.path.basename(file_path))
+
+
+def summary_stages(market_dir):
+    t = {}
+    start = time.perf_counter()
+    market_df = load_table(_path(market_dir, core.data.MARKET_CONDITION_FILE))
+    metrics_df = load_table(_path(market_dir, core.data.RAW_METRICS_FILE), SUMMARY_METRIC_COLUMNS)
+    net_tables = {tf: latest_first(load_table(_path(market_dir, p)))
+                  for tf, p in core.data.NET_TABLE_FILES.items()}
+    t["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    condition_overview(market_df)
+    filtered_df = metrics_df[metrics_df["Days"] == 1].reset_index(drop=True)
+    custom_metrics(filtered_df.iloc[0], filtered_df.iloc[1])
+    delta_df = flow_deltas(net_tables)
+    flow_consensus(net_tables)
+    t["compute"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    figs = [flow_trend_figure(net_tables["1TF"].head(10), "1TF"),
+            key_metrics_figure(filtered_df.head(10), ["POC", "VAH", "VAL", "High", "Low", "Close"], 1),
+            flow_delta_figure(delta_df)]
+    t["figure_bytes"] = sum(len(fig.to_json()) for fig in figs)
+    t["figure"] = time.perf_counter() - start
+    return t
+
+
+def heatmap_stages(market_dir):
+    t = {}
+    start = time.perf_counter()
+    df = load_table(_path(market_dir, core.data.ZSCORE_FILES["1TF"])).set_index("Date")
+    df = df.drop(columns=["Days"])
+    t["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    latest = df.head(HEATMAP_DAYS)
+    anomaly_stats(latest, 2.0)
+    top_anomalies(latest, 10)
+    t["compute"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    t["figure_bytes"] = len(zscore_heatmap_figure(latest, "1TF", HEATMAP_DAYS).to_json())
+    t["figure"] = time.perf_counter() - start
+    return t
+
+
+def visualizer_stages(market_dir):
+    t = {}
+    start = time.perf_counter()
+    raw_df = load_table(_path(market_dir, core.data.RAW_METRICS_FILE), ["Date", "Days"] + VISUALIZER_METRICS)
+    t["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    raw_df["Date"] = pd.to_datetime(raw_df["Date"])
+    df_to_plot = days_slice(raw_df, 1, 100)
+    t["compute"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    t["figure_bytes"] = len(metric_lines_figure(df_to_plot, VISUALIZER_METRICS).to_json())
+    t["figure"] = time.perf_counter() - start
+    return t
+
+
+STAGES = {"summary": summary_stages, "heatmap": heatmap_stages, "visualizer": visualizer_stages}
+
+
+def time_apptest(market_dir, timeout=120):
+    # Pages read their paths from core.data at import, so point it at the market first
+    from streamlit.testing.v1 import AppTest
+    os.environ["QF_DATA_DIR"] = market_dir
+    importlib.reload(core.data)
+    timings = {}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for page in PAGES:
+        at = AppTest.from_file(os.path.join(root, page), default_timeout=timeout)
+        at.session_state["logged_in"] = True
+        start = time.perf_counter()
+        at.run()
+        timings[os.path.basename(page)] = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{page} raised: {at.exception[0].value}")
+    return timings
+
+
+def run(years, n_markets, repeat, apptest=False, data_dir=None, seed=0):
+    markets = MARKETS[:n_markets]
+    tmp = None
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="qf-bench-")
+        data_dir = tmp.name
+    start = time.perf_counter()
+    paths = generate_dataset(data_dir, markets, years, seed)
+    generate_s = time.perf_counter() - start
+
+    # Build the columnar copies up front so timed loads measure steady state
+    for market_dir in paths.values():
+        for name in os.listdir(market_dir):
+            if name.endswith(".csv"):
+                core.data.to_columnar(os.path.join(market_dir, name))
+
+    samples = {}
+    for _ in range(repeat):
+        for page, stages in STAGES.items():
+            for market_dir in paths.values():
+                for stage, value in stages(market_dir).items():
+                    samples.setdefault(f"{page}.{stage}", []).append(value)
+    if apptest:
+        for _ in range(repeat):
+            for page, value in time_apptest(paths[markets[0]]).items():
+                samples.setdefault(f"apptest.{page}", []).append(value)
+
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "years": years,
+        "markets": n_markets,
+        "rows_per_market": int(years * 260) * len(TIMEFRAMES),
+        "generate_s": round(generate_s, 3),
+        "results": {k: round(statistics.median(v), 6) for k, v in sorted(samples.items())},
+    }
+    if tmp is not None:
+        tmp.cleanup()
+    return record
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_record(record, results_file=RESULTS_FILE):
+    if not os.path.exists(results_file):
+        return None
+    previous = None
+    with open(results_file) as f:
+        for line in f:
+            r = json.loads(line)
+            if r["years"] == record["years"] and r["markets"] == record["markets"]:
+                previous = r
+    return previous
+
+
+def report(record, previous=None):
+    print(f"{record['markets']} market(s) x {record['years']} year(s), commit {record['commit']}")
+    for key, value in record["results"].items():
+        line = f"  {key:<40} {value:>12.6f}" if not key.endswith("_bytes") else f"  {key:<40} {value:>12.0f}"
+        if previous and previous["results"].get(key):
+            change = (value - previous["results"][key]) / previous["results"][key] * 100
+            line += f"  ({change:+.1f}% vs {previous['commit']})"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dashboard data paths on synthetic data")
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--markets", type=int, default=len(MARKETS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--apptest", action="store_true", help="also time full page runs via AppTest")
+    parser.add_argument("--data-dir", help="keep the generated dataset here instead of a temp dir")
+    parser.add_argument("--no-save", action="store_true", help="don't append to results.jsonl")
+    args = parser.parse_args(argv)
+
+    record = run(args.years, args.markets, args.repeat, args.apptest, args.data_dir)
+    report(record, previous_record(record))
+    if not args.no_save:
+        with open(RESULTS_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Synthetic datasets in the exact schemas of the files under data/.
+
+Headers are copied from the repo's own data files so the generated tables
+stay in lock-step with what the pages read (including the blank columns in
+MarketCondition.csv and the trailing comma in 1TF Net Table.csv).
+"""
+import os
+import numpy as np
+import pandas as pd
+
+from core.data import TIMEFRAMES
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+MARKETS = ["GBPJPY", "EURUSD", "USDJPY", "XAUUSD", "NAS100", "BTCUSD", "ETHUSD"]
+BASE_PRICES = {"GBPJPY": 195.0, "EURUSD": 1.15, "USDJPY": 145.0, "XAUUSD": 3300.0,
+               "NAS100": 21000.0, "BTCUSD": 105000.0, "ETHUSD": 2500.0}
+CONDITION_LABELS = ["Bracketing", "*", "U Alert", "D Alert"]
+CONDITION_WEIGHTS = [0.5, 0.38, 0.08, 0.04]
+QC_LABELS = ["Q1", "Q2", "Q3", "Q4"]
+TRADING_DAYS_PER_YEAR = 260
+
+
+def _header(file_name):
+    with open(os.path.join(TEMPLATE_DIR, file_name), newline="") as f:
+        return f.readline().rstrip("\r\n")
+
+
+def _columns(file_name):
+    return list(pd.read_csv(os.path.join(TEMPLATE_DIR, file_name), nrows=0).columns)
+
+
+def _write(df, out_dir, file_name):
+    # Reuse the template header verbatim so blank column names survive
+    df = df.reindex(columns=_columns(file_name))
+    path = os.path.join(out_dir, file_name)
+    with open(path, "w", newline="") as f:
+        f.write(_header(file_name) + "\r\n")
+        df.to_csv(f, index=False, header=False, lineterminator="\r\n")
+    return path
+
+
+def _format_dates(dates):
+    return [f"{d.month}/{d.day}/{d.year}" for d in dates]
+
+
+def trading_dates(n_days, end="2025-06-13"):
+    return pd.bdate_range(end=end, periods=n_days)
+
+
+def daily_bars(n_days, base_price, rng):
+    # Random-walk closes with intraday ranges proportional to price
+    returns = rng.normal(0, 0.006, n_days)
+    close = base_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate([[base_price], close[:-1]]) * (1 + rng.normal(0, 0.001, n_days))
+    spread = np.abs(rng.normal(0.008, 0.003, n_days)) * close
+    high = np.maximum(open_, close) + spread * rng.uniform(0.1, 0.6, n_days)
+    low = np.minimum(open_, close) - spread * rng.uniform(0.1, 0.6, n_days)
+    volume = rng.integers(40_000, 120_000, n_days)
+    return open_, high, low, close, volume
+
+
+def _window(values, days, fn):
+    # Trailing `days` window ending on each date (shorter at the start of history)
+    return pd.Series(values).rolling(days, min_periods=1).agg(fn).to_numpy()
+
+
+def raw_metrics(dates, bars, rng):
+    open_, high, low, close, volume = bars
+    n = len(dates)
+    pip = 0.01 if close[0] > 10 else 0.0001
+    frames = []
+    for days in TIMEFRAMES:
+        w_open = pd.Series(open_).shift(days - 1).fillna(open_[0]).to_numpy()
+        w_high = _window(high, days, "max")
+        w_low = _window(low, days, "min")
+        w_volume = _window(volume, days, "sum").astype(np.int64)
+        span = w_high - w_low
+        poc = w_low + span * rng.uniform(0.3, 0.7, n)
+        vah = np.minimum(w_high, poc + span * rng.uniform(0.1, 0.3, n))
+        val = np.maximum(w_low, poc - span * rng.uniform(0.1, 0.3, n))
+        ib_low = w_open - span * rng.uniform(0.0, 0.2, n)
+        ib_high = w_open + span * rng.uniform(0.0, 0.2, n)
+        quarters = rng.integers(30, 400, (n, 4)) * days
+        total_tpo = quarters.sum(axis=1)
+        above = (total_tpo * rng.uniform(0.2, 0.6, n)).astype(np.int64)
+        frames.append(pd.DataFrame({
+            "Date": dates,
+            "Days": days,
+            "Open": w_open.round(3),
+            "High": w_high.round(3),
+            "Low": w_low.round(3),
+            "Close": close.round(3),
+            "POC": poc.round(2),
+            "VAH": vah.round(2),
+            "VAL": val.round(2),
+            "IB High": ib_high.round(3),
+            "IB Low": ib_low.round(3),
+            "RE High": np.maximum(0, (w_high - ib_high) / pip).round(1),
+            "RE Low": np.maximum(0, (ib_low - w_low) / pip).round(1),
+            "RF": rng.integers(-35, 166, n),
+            "TPO Ab. POC": above,
+            "TPO Bl. POC": (total_tpo * rng.uniform(0.2, 0.4, n)).astype(np.int64),
+            "Total TPO": total_tpo,
+            "Range (pips)": (span / pip).round(1),
+            "V.A Range": ((vah - val) / pip).round().astype(np.int64),
+            "IB Range": ((ib_high - ib_low) / pip).round(1),
+            "Volume": w_volume,
+            "Avg Volume": w_volume / (48 * days),
+            "VTY": rng.uniform(13, 29, n),
+            "TFF": rng.uniform(3, 44, n),
+            "Close%R": ((close - w_low) / np.where(span > 0, span, 1) * 100),
+            "SF": rng.uniform(0.18, 0.47, n).round(4),
+            "Q1 TPO": quarters[:, 0],
+            "Q2 TPO": quarters[:, 1],
+            "Q3 TPO": quarters[:, 2],
+            "Q4 TPO": quarters[:, 3],
+            "QC": rng.choice(QC_LABELS, n),
+        }))
+    # Newest date first, timeframes ascending within a date - the file's order
+    df = pd.concat(frames).rename_axis("_pos").reset_index()
+    return df.sort_values(["_pos", "Days"], ascending=[False, True]).drop(columns="_pos")
+
+
+def zscores(dates, days, columns, rng):
+    n = len(dates)
+    metrics = [c for c in columns if c not in ("Date", "Days")]
+    df = pd.DataFrame(rng.normal(0, 1, (n, len(metrics))), columns=metrics)
+    df.insert(0, "Days", days)
+    df.insert(0, "Date", dates)
+    return df.iloc[::-1]
+
+
+def net_table(dates, days, rng):
+    n = len(dates)
+    direction = rng.integers(-6, 7, n) * 2
+    activity = rng.integers(-6, 7, n) * 2
+    df = pd.DataFrame({"Date": dates, "Days": days, "Dir": direction, "Act": activity,
+                       "Net": direction + activity})
+    for col in ["Dir", "Act", "Net"]:
+        df[f"3D {col}"] = df[col].rolling(3, min_periods=1).sum().astype(np.int64)
+    return df.iloc[::-1]
+
+
+def market_condition(dates, close, rng):
+    n = len(dates)
+    data = {"Date": dates}
+    for tf in ["1D", "3D", "5D", "10D", "15D", "20D"]:
+        data[tf] = rng.choice(CONDITION_LABELS, n, p=CONDITION_WEIGHTS)
+    for tf in ["1D", "3D", "5D", "10D", "15D", "20D"]:
+        width = close * rng.uniform(0.002, 0.02, n)
+        data[f"{tf}_NumDists"] = rng.integers(1, 4, n)
+        data[f"{tf}_D1_Upper"] = (close + width / 2).round(2)
+        data[f"{tf}_D1_Lower"] = (close - width / 2).round(2)
+    return pd.DataFrame(data).iloc[::-1]
+
+
+def ri_qc(dates, rng):
+    n = len(dates)
+    return pd.DataFrame({
+        "Date": dates,
+        "RI_4": rng.uniform(0.3, 1.0, n).round(2),
+        "RI_4_QC": rng.choice(QC_LABELS, n),
+        "RI_8": rng.uniform(0.3, 1.0, n).round(2),
+        "RI_8_QC": rng.choice(QC_LABELS, n),
+    }).iloc[::-1]
+
+
+def generate_market(out_dir, market="GBPJPY", years=1.0, seed=0):
+    """Write a full data/ directory for one market; returns the number of dates."""
+    rng = np.random.default_rng(seed)
+    n_days = max(int(years * TRADING_DAYS_PER_YEAR), 25)
+    dates = _format_dates(trading_dates(n_days))
+    bars = daily_bars(n_days, BASE_PRICES.get(market, 100.0), rng)
+    os.makedirs(out_dir, exist_ok=True)
+
+    _write(raw_metrics(dates, bars, rng), out_dir, "RawMetrics.csv")
+    _write(market_condition(dates, bars[3], rng), out_dir, "MarketCondition.csv")
+    _write(ri_qc(dates, rng), out_dir, "RI&QC.csv")
+    for days in TIMEFRAMES:
+        _write(net_table(dates, days, rng), out_dir, f"{days}TF Net Table.csv")
+        zscore_name = f"{days}tf Z-Score.csv"
+        _write(zscores(dates, days, _columns(zscore_name), rng), out_dir, zscore_name)
+    return n_days
+
+
+def generate_dataset(out_dir, markets=MARKETS, years=1.0, seed=0):
+    """One sub-directory per market, each laid out like data/."""
+    paths = {}
+    for i, market in enumerate(markets):
+        market_dir = os.path.join(out_dir, market)
+        generate_market(market_dir, market, years, seed + i)
+        paths[market] = market_dir
+    return paths
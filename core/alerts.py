@@ -0,0 +1,221 @@
+"""Threshold alerts, evaluated by core.ingest on newly ingested rows only.
+
+Rules come from QF_ALERT_RULES (a JSON list; default <data dir>/alert_rules.json,
+else DEFAULT_RULES, which mirror the Heatmap's Anomaly and Critical banners).
+Each rule has a name and a kind; market, tf and metric default to "*":
+
+    {"name": "GBPJPY RF", "kind": "zscore", "market": "GBPJPY", "tf": "5TF",
+     "metric": "RF", "threshold": 2.0, "direction": "both"}
+    {"name": "Net flip", "kind": "consensus", "metric": "Net"}
+    {"name": "U Alert", "kind": "condition", "tf": "1D", "value": "U Alert"}
+
+- zscore fires when |z| (or z, or -z for direction up / down) reaches the
+  threshold from under it on the previous row, once per excursion;
+- consensus fires when the flow consensus for a metric changes (to `value`
+  if given);
+- condition fires when a MarketCondition label changes (to `value` if given).
+  Its tf is the condition column (1D .. 20D).
+
+Only the rows past each file's watermark are evaluated, plus the row before
+the first of them for comparison. Z-Score rules are grouped by threshold and
+direction, so one array comparison per group covers every rule and metric
+in it. Alerts are appended as JSON lines to <data dir>/.views/alerts_outbox.jsonl.
+A first run (or --full) starts from the latest date.
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import materialized
+from core.data import (DATA_DIR, MARKET_CONDITION_FILE, NET_TABLE_FILES, ZSCORE_FILES, load_table, market_dirs,
+                       market_file, metric_names)
+from core.views import CONDITION_TIMEFRAMES, CRITICAL_Z, FLOW_METRICS, flow_consensus, newest_first
+
+STEP = "alerts"
+OUTBOX_FILE = "alerts_outbox.jsonl"
+RULES_FILE = os.environ.get("QF_ALERT_RULES", os.path.join(DATA_DIR, "alert_rules.json"))
+KINDS = ("zscore", "consensus", "condition")
+DIRECTIONS = ("both", "up", "down")
+DEFAULT_RULES = [
+    {"name": "Anomaly", "kind": "zscore", "threshold": 2.0},
+    {"name": "Critical", "kind": "zscore", "threshold": CRITICAL_Z},
+    {"name": "Net consensus flip", "kind": "consensus", "metric": "Net"},
+    {"name": "U Alert", "kind": "condition", "value": "U Alert"},
+    {"name": "D Alert", "kind": "condition", "value": "D Alert"},
+]
+
+
+def load_rules(path=RULES_FILE):
+    """The rules in `path` (DEFAULT_RULES if it doesn't exist), with defaults filled in."""
+    if os.path.exists(path):
+        with open(path) as f:
+            rules = json.load(f)
+    else:
+        rules = DEFAULT_RULES
+    return [_rule(r) for r in rules]
+
+
+def _rule(rule):
+    rule = {"market": "*", "tf": "*", "metric": "*", "value": None, "direction": "both", **rule}
+    if rule.get("kind") not in KINDS:
+        raise ValueError(f"rule {rule.get('name')!r}: kind must be one of {KINDS}")
+    if rule["kind"] == "zscore":
+        if "threshold" not in rule:
+            raise ValueError(f"rule {rule.get('name')!r}: zscore rules need a threshold")
+        if rule["direction"] not in DIRECTIONS:
+            raise ValueError(f"rule {rule.get('name')!r}: direction must be one of {DIRECTIONS}")
+        rule["threshold"] = float(rule["threshold"])
+    return rule
+
+
+def _applies(rule, kind, market, tf="*"):
+    return rule["kind"] == kind and rule["market"] in ("*", market) and rule["tf"] in ("*", tf)
+
+
+def _beyond(z, threshold, direction):
+    with np.errstate(invalid="ignore"):
+        if direction == "up":
+            return z >= threshold
+        if direction == "down":
+            return z <= -threshold
+        return np.abs(z) >= threshold
+
+
+def _new_rows(df, watermark):
+    """Rows past `watermark` plus the one before them, oldest first; and the new watermark."""
+    df = newest_first(df).reset_index(drop=True)
+    dates = pd.to_datetime(df["Date"], format="%m/%d/%Y")
+    if watermark is None:
+        fresh = min(len(df), 1)
+    else:
+        fresh = int((dates > pd.Timestamp(watermark)).sum())
+    latest = dates.iloc[0].strftime("%Y-%m-%d") if len(df) else watermark
+    return df.head(fresh + 1).iloc[::-1].reset_index(drop=True), fresh, latest
+
+
+def zscore_alerts(rows, fresh, rules, market, tf, metrics):
+    """Crossings in the last `fresh` of `rows` (oldest first) for the zscore rules of one file."""
+    z = rows[metrics].to_numpy(np.float64)
+    dates = rows["Date"].to_numpy()
+    start = len(rows) - fresh
+    groups = {}
+    for rule in rules:
+        groups.setdefault((rule["threshold"], rule["direction"]), []).append(rule)
+    alerts = []
+    for (threshold, direction), group in groups.items():
+        beyond = _beyond(z, threshold, direction)
+        previous = beyond[start - 1:-1] if start else np.zeros_like(beyond)
+        hits, columns = np.nonzero(beyond[start:] & ~previous)
+        # Usually a handful of cells; each rule only checks those
+        for row, column in zip((hits + start).tolist(), columns.tolist()):
+            metric = metrics[column]
+            for rule in group:
+                if rule["metric"] in ("*", metric):
+                    alerts.append({"rule": rule["name"], "kind": "zscore", "market": market, "tf": tf,
+                                   "metric": metric, "date": dates[row], "value": round(float(z[row, column]), 3),
+                                   "previous": round(float(z[row - 1, column]), 3) if row else None})
+    return alerts
+
+
+def label_alerts(labels, fresh, rules, market, kind):
+    """Changes in the last `fresh` rows of `labels` (Date plus one column per tf or metric, oldest first)."""
+    alerts = []
+    start = max(len(labels) - fresh, 1)
+    for column in labels.columns.drop("Date"):
+        values = labels[column].astype(str).to_numpy()
+        for row in np.flatnonzero(values[start:] != values[start - 1:-1]) + start:
+            for rule in rules:
+                if kind == "condition" and not _applies(rule, kind, market, column):
+                    continue
+                if kind == "consensus" and rule["metric"] not in ("*", column):
+                    continue
+                if rule["value"] is not None and values[row] != rule["value"]:
+                    continue
+                alerts.append({"rule": rule["name"], "kind": kind, "market": market,
+                               "tf": column if kind == "condition" else None,
+                               "metric": column if kind == "consensus" else None,
+                               "date": labels["Date"].iloc[row], "value": values[row], "previous": values[row - 1]})
+    return alerts
+
+
+def consensus_by_date(net_tables, dates):
+    """Date plus the flow consensus of each FLOW_METRICS column on each of `dates`."""
+    rows = []
+    for date in dates:
+        consensus = flow_consensus({tf: df[df["Date"] == date] for tf, df in net_tables.items()})
+        rows.append({"Date": date, **dict(zip(consensus["Metric"], consensus["Consensus"]))})
+    return pd.DataFrame(rows, columns=["Date"] + FLOW_METRICS)
+
+
+def market_name(data_dir):
+    names = {os.path.abspath(d): m for m, d in market_dirs().items()}
+    return names.get(os.path.abspath(data_dir), os.path.basename(os.path.abspath(data_dir)))
+
+
+def evaluate(data_dir, rules, watermarks):
+    """(alerts, new watermarks) for the rows of `data_dir` past `watermarks` ({basename: ISO date})."""
+    market = market_name(data_dir)
+    rules = [r for r in rules if r["market"] in ("*", market)]
+    watermarks = dict(watermarks)
+    alerts = []
+
+    for tf, path in ZSCORE_FILES.items():
+        path, name = market_file(data_dir, path), os.path.basename(path)
+        applicable = [r for r in rules if _applies(r, "zscore", market, tf)]
+        if not applicable or not os.path.exists(path):
+            continue
+        rows, fresh, watermarks[name] = _new_rows(load_table(path), watermarks.get(name))
+        if fresh:
+            alerts += zscore_alerts(rows, fresh, applicable, market, tf, metric_names(path))
+
+    path = market_file(data_dir, MARKET_CONDITION_FILE)
+    applicable = [r for r in rules if r["kind"] == "condition"]
+    if applicable and os.path.exists(path):
+        name = os.path.basename(path)
+        rows, fresh, watermarks[name] = _new_rows(load_table(path, ["Date"] + CONDITION_TIMEFRAMES),
+                                                  watermarks.get(name))
+        if fresh:
+            alerts += label_alerts(rows, fresh, applicable, market, "condition")
+
+    applicable = [r for r in rules if r["kind"] == "consensus"]
+    paths = {tf: market_file(data_dir, p) for tf, p in NET_TABLE_FILES.items()}
+    net_tables = {tf: load_table(p) for tf, p in paths.items() if os.path.exists(p)} if applicable else {}
+    if net_tables:
+        dates = pd.concat([df[["Date"]] for df in net_tables.values()]).drop_duplicates()
+        rows, fresh, watermarks["consensus"] = _new_rows(dates, watermarks.get("consensus"))
+        if fresh:
+            labels = consensus_by_date(net_tables, rows["Date"])
+            alerts += label_alerts(labels, fresh, applicable, market, "consensus")
+    return alerts, watermarks
+
+
+def outbox_path(data_dir=DATA_DIR):
+    return os.path.join(materialized.views_dir(data_dir), OUTBOX_FILE)
+
+
+def write_outbox(alerts, data_dir=DATA_DIR):
+    if not alerts:
+        return
+    created = time.strftime("%Y-%m-%dT%H:%M:%S")
+    path = outbox_path(data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.writelines(json.dumps({"created": created, **alert}) + "\n" for alert in alerts)
+
+
+def read_outbox(data_dir=DATA_DIR):
+    """The outbox as a DataFrame, oldest first (empty if nothing has fired)."""
+    path = outbox_path(data_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_json(path, lines=True, dtype=False)
+
+
+def ingest(data_dir=DATA_DIR, state=None):
+    """Evaluate the rules on rows past the watermarks and append what fires to the outbox."""
+    alerts, watermarks = evaluate(data_dir, load_rules(), (state or {}).get("watermarks", {}))
+    write_outbox(alerts, data_dir)
+    return {"watermarks": watermarks}
@@ -0,0 +1,250 @@
+"""Read-only HTTP API over the dashboard's computed views.
+
+Served from the Streamlit process on http://127.0.0.1:$QF_API_PORT/v1/
+(default 9465, 0 disables), so it reads sources through core.sources and
+shares the pages' st.cache_data entries. `python -m core.api` runs it on
+its own.
+
+    GET /v1/markets
+    GET /v1/consensus?market=GBPJPY
+    GET /v1/deltas?market=GBPJPY
+    GET /v1/anomalies?market=GBPJPY&tf=5TF&last=20&n=10
+    GET /v1/metrics?market=GBPJPY&days=5&columns=POC,VAH&last=30
+
+Responses are JSON records, or an Arrow IPC stream with ?format=arrow or
+`Accept: application/vnd.apache.arrow.stream`. The ETag is derived from the
+request and the mtimes of the sources it reads, so it is known before
+anything is loaded: a matching If-None-Match is answered 304 straight away,
+and recently served bodies are replayed from memory until a source changes.
+Connections are HTTP/1.1 keep-alive.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from core.data import (NET_TABLE_FILES, RAW_METRICS_FILE, ZSCORE_FILES, market_dirs, market_file,
+                       metric_names)
+from core.sources import load_source, mtime
+from core.views import flow_consensus, flow_deltas, top_anomalies
+
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+JSON_TYPE = "application/json"
+BODY_CACHE_SIZE = 256
+DEFAULT_LAST = 30
+
+_lock = threading.Lock()
+_server = None
+_serve_attempted = False
+_bodies = OrderedDict()  # etag -> encoded body, least recently used first
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _param(params, name, default=None, cast=str):
+    value = params.get(name, [default])[0]
+    if value is None:
+        raise ApiError(400, f"missing parameter: {name}")
+    try:
+        return cast(value)
+    except ValueError:
+        raise ApiError(400, f"invalid {name}: {value!r}")
+
+
+def _market_dir(params):
+    market = _param(params, "market", "GBPJPY")
+    dirs = market_dirs()
+    if market not in dirs:
+        raise ApiError(404, f"no data for market {market!r}; available: {sorted(dirs)}")
+    return dirs[market]
+
+
+def _net_tables(data_dir):
+    tables = {}
+    for tf, path in NET_TABLE_FILES.items():
+        try:
+            tables[tf] = load_source(market_file(data_dir, path))
+        except FileNotFoundError:
+            continue
+    return tables
+
+
+def _zscore_file(params):
+    tf = _param(params, "tf", "1TF")
+    if tf not in ZSCORE_FILES:
+        raise ApiError(400, f"invalid tf: {tf!r}; expected one of {list(ZSCORE_FILES)}")
+    return market_file(_market_dir(params), ZSCORE_FILES[tf])
+
+
+def _markets(params):
+    return pd.DataFrame({"Market": list(market_dirs())})
+
+
+def _consensus(params):
+    return flow_consensus(_net_tables(_market_dir(params)))
+
+
+def _deltas(params):
+    return flow_deltas(_net_tables(_market_dir(params)))
+
+
+def _anomalies(params):
+    path = _zscore_file(params)
+    df = _load(path)
+    df = df.head(_param(params, "last", DEFAULT_LAST, int)).set_index("Date")[metric_names(path)]
+    return top_anomalies(df, _param(params, "n", 10, int), formatted=False)
+
+
+def _metrics(params):
+    df = _load(market_file(_market_dir(params), RAW_METRICS_FILE))
+    if "columns" in params:
+        wanted = _param(params, "columns").split(",")
+        missing = [c for c in wanted if c not in df.columns]
+        if missing:
+            raise ApiError(400, f"unknown columns: {missing}")
+        df = df[["Date", "Days"] + [c for c in wanted if c not in ("Date", "Days")]]
+    df = df[df["Days"] == _param(params, "days", 1, int)]
+    return df.head(_param(params, "last", DEFAULT_LAST, int)).reset_index(drop=True)
+
+
+def _load(path):
+    try:
+        return load_source(path)
+    except FileNotFoundError:
+        raise ApiError(404, f"source not found: {os.path.basename(path)}")
+
+
+# path -> (sources it reads for the given params, view)
+ROUTES = {
+    "/v1/markets": (lambda params: [], _markets),
+    "/v1/consensus": (lambda params: [market_file(_market_dir(params), p) for p in NET_TABLE_FILES.values()],
+                      _consensus),
+    "/v1/deltas": (lambda params: [market_file(_market_dir(params), p) for p in NET_TABLE_FILES.values()],
+                   _deltas),
+    "/v1/anomalies": (lambda params: [_zscore_file(params)], _anomalies),
+    "/v1/metrics": (lambda params: [market_file(_market_dir(params), RAW_METRICS_FILE)], _metrics),
+}
+
+
+def etag(path, params, content_type, sources):
+    """Validator for a response: changes when the request or any source it reads changes."""
+    key = json.dumps([path, sorted(params.items()), content_type,
+                      [(s, mtime(s)) for s in sources], sorted(market_dirs().items())])
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def encode(df, content_type):
+    if content_type == ARROW_TYPE:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return df.to_json(orient="records", date_format="iso").encode()
+
+
+def _cached_body(tag):
+    with _lock:
+        if tag in _bodies:
+            _bodies.move_to_end(tag)
+            return _bodies[tag]
+    return None
+
+
+def _remember(tag, body):
+    with _lock:
+        _bodies[tag] = body
+        while len(_bodies) > BODY_CACHE_SIZE:
+            _bodies.popitem(last=False)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive; every response sets Content-Length
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        route = ROUTES.get(url.path.rstrip("/"))
+        if route is None:
+            self._send(404, JSON_TYPE, json.dumps({"error": "not found", "routes": list(ROUTES)}).encode())
+            return
+        wants_arrow = (params.get("format", [""])[0] == "arrow"
+                       or ARROW_TYPE in self.headers.get("Accept", ""))
+        content_type = ARROW_TYPE if wants_arrow else JSON_TYPE
+        params = {k: v for k, v in params.items() if k != "format"}
+        try:
+            sources, view = route
+            tag = etag(url.path, params, content_type, sources(params))
+            if tag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+                self._send(304, None, b"", tag)
+                return
+            body = _cached_body(tag)
+            if body is None:
+                body = encode(view(params), content_type)
+                _remember(tag, body)
+        except ApiError as e:
+            self._send(e.status, JSON_TYPE, json.dumps({"error": str(e)}).encode())
+            return
+        self._send(200, content_type, body, tag)
+
+    def _send(self, status, content_type, body, tag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if tag:
+            self.send_header("ETag", tag)
+            self.send_header("Cache-Control", "no-cache")  # revalidate each time; 304s are cheap
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=None, host="127.0.0.1"):
+    """Start the API once per process; returns the server or None."""
+    global _server, _serve_attempted
+    if _serve_attempted:
+        return _server
+    with _lock:
+        if _serve_attempted:
+            return _server
+        _serve_attempted = True
+        port = int(os.environ.get("QF_API_PORT", "9465") if port is None else port)
+        if port == 0:
+            return None
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            # Another worker on this host already owns the port
+            return None
+        threading.Thread(target=_server.serve_forever, name="qf-api", daemon=True).start()
+    return _server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard views over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("QF_API_PORT", "9465")))
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    print(f"Serving on http://{args.host}:{args.port}/v1/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""As-of views: any source as it stood on a past date.
+
+AsOfIndex maps each date of a newest-first frame to the offset of its first
+row, so "the latest n dates as of d" is one binary search and an iloc slice
+rather than a filter over the full history. Date-major sources with several
+rows per date (RawMetrics' Days) slice the same way.
+
+as_of_control() is the shared "as of date" widget. The chosen date lives in
+session state, so every page opens at the date picked on the last one, and
+play mode steps it forward one session per rerun.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PLAY_INTERVAL = 0.4  # seconds between frames in play mode
+
+_DATE_KEY = "as_of_date"
+_ENABLED_KEY = "as_of_enabled"
+_PLAYING_KEY = "as_of_playing"
+
+
+def _days(dates):
+    """datetime64[D] array for Date strings ("m/d/YYYY") or datetimes."""
+    dates = pd.Series(np.asarray(dates))
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%m/%d/%Y")
+    return dates.to_numpy().astype("datetime64[D]")
+
+
+class AsOfIndex:
+    def __init__(self, dates):
+        days = _days(dates)
+        if len(days) > 1 and (np.diff(days.astype(np.int64)) > 0).any():
+            raise ValueError("AsOfIndex needs rows ordered newest first (see views.newest_first)")
+        firsts = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))[:len(days)]
+        self.dates = days[firsts]  # unique dates, newest first
+        self.starts = np.concatenate((firsts, [len(days)]))
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df["Date"] if "Date" in df.columns else df.index)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def locate(self, as_of=None):
+        """Position (0 = newest) of the latest date on or before `as_of`; None means the newest."""
+        if as_of is None:
+            return 0
+        target = np.datetime64(pd.Timestamp(as_of).date(), "D").astype(np.int64)
+        return int(np.searchsorted(-self.dates.astype(np.int64), -target, side="left"))
+
+    def rows(self, as_of=None, n=None):
+        """Row slice covering the `n` latest dates (all of them if None) as of `as_of`."""
+        first = self.locate(as_of)
+        last = len(self.dates) if n is None else min(first + n, len(self.dates))
+        return slice(int(self.starts[first]), int(self.starts[max(first, last)]))
+
+    def window(self, df, as_of=None, n=None):
+        return df.iloc[self.rows(as_of, n)]
+
+
+def as_of_date():
+    """The selected as-of date, or None when time travel is off."""
+    if not st.session_state.get(_ENABLED_KEY):
+        return None
+    date = st.session_state.get(_DATE_KEY)
+    return pd.Timestamp(date) if date else None
+
+
+def _label(date):
+    return pd.Timestamp(date).strftime("%m/%d/%Y")
+
+
+def _select(label):
+    st.session_state[_DATE_KEY] = pd.Timestamp(label).strftime("%Y-%m-%d")
+
+
+def _step(labels, current, by):
+    _select(labels[min(max(labels.index(current) + by, 0), len(labels) - 1)])
+
+
+def _toggle_play():
+    st.session_state[_PLAYING_KEY] = not st.session_state.get(_PLAYING_KEY, False)
+
+
+def as_of_control(index, key):
+    """Render the time-travel control for a page; returns the as-of date or None.
+
+    `index` supplies the selectable dates; `key` must be unique per page.
+    """
+    enabled = st.toggle("⏪ Time Travel", value=st.session_state.get(_ENABLED_KEY, False),
+                        help="Show this page as it looked on a past date")
+    st.session_state[_ENABLED_KEY] = enabled
+    if not enabled or not len(index):
+        st.session_state[_PLAYING_KEY] = False
+        return None
+
+    labels = [_label(d) for d in index.dates[::-1]]  # oldest first
+    saved = st.session_state.get(_DATE_KEY)
+    current = labels[max(len(labels) - 1 - index.locate(saved), 0)] if saved else labels[-1]
+    playing = st.session_state.get(_PLAYING_KEY, False)
+    if playing:
+        if current == labels[-1]:
+            st.session_state[_PLAYING_KEY] = playing = False
+        else:
+            current = labels[labels.index(current) + 1]
+    _select(current)
+
+    # The slider mirrors the shared date; its own key only exists while this page is shown
+    slider_key = f"{key}_as_of"
+    st.session_state[slider_key] = current
+    col1, col2, col3, col4 = st.columns([8, 1, 1, 1])
+    with col1:
+        st.select_slider("📅 As of", options=labels, key=slider_key, disabled=playing,
+                         on_change=lambda: _select(st.session_state[slider_key]))
+    with col2:
+        st.button("◀", key=f"{key}_back", on_click=_step, args=(labels, current, -1),
+                  disabled=playing, help="Previous session")
+    with col3:
+        st.button("⏸" if playing else "▶️", key=f"{key}_play", on_click=_toggle_play,
+                  help="Step forward one session at a time")
+    with col4:
+        st.button("▶", key=f"{key}_forward", on_click=_step, args=(labels, current, 1),
+                  disabled=playing, help="Next session")
+    return pd.Timestamp(current)
+
+
+def keep_playing():
+    """Advance to the next frame in play mode; call at the end of the page."""
+    if st.session_state.get(_ENABLED_KEY) and st.session_state.get(_PLAYING_KEY):
+        time.sleep(PLAY_INTERVAL)
+        st.rerun()
@@ -0,0 +1,101 @@
+"""Cross-timeframe coherence of the Z-Scores.
+
+The six `*tf Z-Score.csv` files are stacked once into a (date, timeframe,
+metric) array. Everything below is computed over that array in whole-array
+operations:
+
+- alignment: the correlation over time between every pair of timeframes,
+  for each metric;
+- sign agreement: on average, the share of timeframes on the majority side
+  of zero;
+- divergence: days where the shortest and longest timeframes are at least
+  DIVERGENCE apart.
+"""
+import numpy as np
+import pandas as pd
+
+from core.data import KEY_COLUMNS
+from core.profile_engine import format_date
+
+DIVERGENCE = 3.0
+SHORT = ("1TF", "3TF", "5TF")
+LONG = ("10TF", "15TF", "20TF")
+
+
+class ZScoreTensor:
+    def __init__(self, dates, timeframes, metrics, values):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")  # oldest first
+        self.timeframes = list(timeframes)
+        self.metrics = list(metrics)
+        self.values = np.asarray(values, dtype=np.float32)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Tensor from {timeframe: Z-Score frame}; dates are the union, metrics those in every frame."""
+        frames = {tf: df.reset_index() if "Date" not in df.columns else df for tf, df in frames.items()}
+        metrics = [c for c in next(iter(frames.values())).columns
+                   if c not in KEY_COLUMNS and not str(c).startswith("Unnamed")
+                   and all(c in df.columns for df in frames.values())]
+        days = {tf: pd.to_datetime(df["Date"], format="%m/%d/%Y").to_numpy().astype("datetime64[D]")
+                for tf, df in frames.items()}
+        dates = np.unique(np.concatenate(list(days.values())))
+        values = np.full((len(dates), len(frames), len(metrics)), np.nan, np.float32)
+        for t, (tf, df) in enumerate(frames.items()):
+            values[np.searchsorted(dates, days[tf]), t] = df[metrics].to_numpy(np.float32)
+        return cls(dates, frames, metrics, values)
+
+    def alignment(self):
+        """(metric, timeframe, timeframe) correlation over the dates each pair shares."""
+        valid = ~np.isnan(self.values)
+        x = np.where(valid, self.values, 0.0).astype(np.float64)
+        w = valid.astype(np.float64)
+        # Pairwise-complete Pearson: every moment is summed over the dates both timeframes have
+        n = np.einsum("dtm,dum->mtu", w, w)
+        sx = np.einsum("dtm,dum->mtu", x, w)
+        sxx = np.einsum("dtm,dum->mtu", x * x, w)
+        sxy = np.einsum("dtm,dum->mtu", x, x)
+        sy, syy = sx.transpose(0, 2, 1), sxx.transpose(0, 2, 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = (sxy - sx * sy / n) / np.sqrt((sxx - sx ** 2 / n) * (syy - sy ** 2 / n))
+        corr[n < 3] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def sign_agreement(self):
+        """(date, metric) share of timeframes on the majority side of zero."""
+        signs = np.sign(self.values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            up = (signs > 0).sum(axis=1)
+            down = (signs < 0).sum(axis=1)
+            return np.maximum(up, down) / (~np.isnan(self.values)).sum(axis=1)
+
+    def summary(self):
+        """One row per metric: correlation of each timeframe with the shortest, short vs long
+        (mean over the SHORT x LONG pairs) and mean sign agreement."""
+        corr = self.alignment()
+        base = self.timeframes[0]
+        out = pd.DataFrame({"Metric": self.metrics})
+        for t, tf in enumerate(self.timeframes[1:], start=1):
+            out[f"{base}↔{tf}"] = corr[:, 0, t]
+        short = [self.timeframes.index(tf) for tf in SHORT if tf in self.timeframes]
+        long = [self.timeframes.index(tf) for tf in LONG if tf in self.timeframes]
+        if short and long:
+            out["Short↔Long"] = np.nanmean(corr[:, short][:, :, long].reshape(len(self.metrics), -1), axis=1)
+        out["Sign Agreement %"] = np.nanmean(self.sign_agreement(), axis=0) * 100
+        return out
+
+    def divergences(self, threshold=DIVERGENCE, short=None, long=None):
+        """Days where `short` and `long` (default: first and last timeframe) differ by at least
+        `threshold`, newest first."""
+        s = self.timeframes.index(short or self.timeframes[0])
+        l = self.timeframes.index(long or self.timeframes[-1])
+        gap = self.values[:, s] - self.values[:, l]
+        with np.errstate(invalid="ignore"):
+            d, m = np.nonzero(np.abs(gap) >= threshold)
+        out = pd.DataFrame({
+            "Date": [format_date(day) for day in pd.to_datetime(self.dates[d])],
+            "Metric": np.asarray(self.metrics)[m],
+            self.timeframes[s]: self.values[d, s, m],
+            self.timeframes[l]: self.values[d, l, m],
+            "Gap": gap[d, m],
+        })
+        return out.iloc[np.argsort(-d, kind="stable")].reset_index(drop=True)
@@ -0,0 +1,171 @@
+"""Distribution-detection engine: `MarketCondition.csv` rows from profiles.
+
+For every Days window the composite TPO histogram (see profile_engine) is
+smoothed and split at low-volume nodes - ticks whose smoothed count falls
+below LVN_FRACTION of the POC count. Each remaining run of ticks holding at
+least MIN_MASS of the window's TPOs is a distribution:
+
+    NumDists      number of distributions
+    D1 Upper/Low  bounds of the top distribution
+    label         "U Alert" if the close is above the top distribution,
+                  "D Alert" if below the bottom one, otherwise
+                  "Bracketing" for a single distribution and "*" for several
+
+All windows of a chunk are processed as one 2-D array, so a market's full
+history is a few array passes per timeframe; daily updates only score the
+new sessions.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.data import ENGINE_DIR, MARKET_CONDITION_FILE, TIMEFRAMES
+from core.profile_engine import CHUNK_WINDOWS, DailyProfiles, format_date, profiles_path, tick_decimals
+
+LVN_FRACTION = 0.25
+MIN_MASS = 0.05
+SMOOTH_FRACTION = 1 / 40  # smoothing half-width as a share of the window's range
+BLANK_COLUMNS = 3  # MarketCondition.csv keeps three empty spacer columns
+
+
+def smooth(hist):
+    """Centered moving average per row, with a half-width scaled to each row's range.
+
+    Windows are clipped to the row's own traded range, not to the chunk's
+    shared width, so a row smooths the same whichever windows it is batched
+    with; ticks outside the range are 0.
+    """
+    rows, width = hist.shape
+    traded = hist > 0
+    first = np.argmax(traded, axis=1)[:, None]
+    last = width - 1 - np.argmax(traded[:, ::-1], axis=1)[:, None]
+    half = np.maximum(1, np.rint((last - first + 1) * SMOOTH_FRACTION)).astype(np.int64)
+
+    cum = np.zeros((rows, width + 1), dtype=np.float64)
+    np.cumsum(hist, axis=1, out=cum[:, 1:])
+    cols = np.arange(width)[None, :]
+    lo = np.clip(cols - half, first, last + 1)
+    hi = np.clip(cols + half + 1, first, last + 1)
+    total = np.take_along_axis(cum, hi, axis=1) - np.take_along_axis(cum, lo, axis=1)
+    inside = (cols >= first) & (cols <= last)
+    return np.where(inside, total / np.maximum(hi - lo, 1), 0.0)
+
+
+def distributions(hist):
+    """Distributions per row of `hist`.
+
+    Returns (row, first, last) arrays, one entry per distribution in row
+    then price order; first/last are column indices into `hist`.
+    """
+    smoothed = smooth(hist)
+    inside = smoothed >= LVN_FRACTION * smoothed.max(axis=1, keepdims=True)
+    padded = np.pad(inside, ((0, 0), (1, 1)))
+    edges = np.diff(padded.astype(np.int8), axis=1)
+    start_row, start_col = np.nonzero(edges == 1)
+    _, stop_col = np.nonzero(edges == -1)  # run ends, same order as starts
+
+    cum = np.zeros((hist.shape[0], hist.shape[1] + 1), dtype=np.int64)
+    np.cumsum(hist, axis=1, out=cum[:, 1:])
+    mass = cum[start_row, stop_col] - cum[start_row, start_col]
+    keep = mass >= MIN_MASS * cum[start_row, -1]
+    return start_row[keep], start_col[keep], stop_col[keep] - 1
+
+
+def classify(num_dists, close, top_upper, bottom_lower):
+    return np.select(
+        [close > top_upper, close < bottom_lower, num_dists == 1],
+        ["U Alert", "D Alert", "Bracketing"], "*")
+
+
+def timeframe_conditions(profiles, n, ends_all=None, chunk=CHUNK_WINDOWS):
+    """NumDists, D1 bounds and label for the n-session windows ending at `ends_all`."""
+    if ends_all is None:
+        ends_all = np.arange(n - 1, len(profiles))
+    ends_all = np.asarray(ends_all, dtype=np.int64)
+    ends_all = ends_all[ends_all >= n - 1]
+    decimals = tick_decimals(profiles.tick)
+
+    parts = []
+    for i in range(0, len(ends_all), chunk):
+        ends = ends_all[i:i + chunk]
+        base, hist = profiles.composite(n, ends)
+        row, first, last = distributions(hist)
+        count = np.bincount(row, minlength=len(ends))
+        # Entries are in row then price order, so each row's top and bottom are its last and first
+        top = np.searchsorted(row, np.arange(len(ends)), "right") - 1
+        bottom = np.searchsorted(row, np.arange(len(ends)), "left")
+        top, bottom = np.where(count > 0, top, 0), np.where(count > 0, bottom, 0)
+
+        def price(cols):
+            return np.where(count > 0, ((base + cols) * profiles.tick).round(decimals), np.nan)
+
+        parts.append(pd.DataFrame({
+            "_end": ends,
+            "NumDists": count,
+            "D1_Upper": price(last[top]) if len(row) else np.nan,
+            "D1_Lower": price(first[top]) if len(row) else np.nan,
+            "_bottom": price(first[bottom]) if len(row) else np.nan,
+        }))
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=["_end", "NumDists", "D1_Upper", "D1_Lower", "_bottom"])
+    close = profiles.day["close"][df["_end"].to_numpy(np.int64)]
+    df["Label"] = classify(df["NumDists"].to_numpy(), close, df["D1_Upper"].to_numpy(), df["_bottom"].to_numpy())
+    return df.drop(columns="_bottom")
+
+
+def market_condition(profiles, timeframes=TIMEFRAMES, since=0):
+    """MarketCondition.csv rows for sessions from index `since` on, newest first.
+
+    Only sessions with every timeframe's window complete are included.
+    """
+    ends = np.arange(max(since, max(timeframes) - 1), len(profiles))
+    out = pd.DataFrame({"Date": [format_date(d) for d in profiles.dates[ends]]})
+    labels, bounds = {}, {}
+    for n in timeframes:
+        df = timeframe_conditions(profiles, n, ends)
+        labels[f"{n}D"] = df["Label"].to_numpy()
+        for field in ("NumDists", "D1_Upper", "D1_Lower"):
+            bounds[f"{n}D_{field}"] = df[field].to_numpy()
+    columns = [out["Date"]] + [pd.Series(v, name=k) for k, v in labels.items()]
+    columns += [pd.Series([np.nan] * len(out), name="") for _ in range(BLANK_COLUMNS)]
+    columns += [pd.Series(v, name=k) for k, v in bounds.items()]
+    return pd.concat(columns, axis=1).iloc[::-1].reset_index(drop=True)
+
+
+def update_market_condition(store_path, out_path, timeframes=TIMEFRAMES, full=False):
+    """Write or refresh MarketCondition.csv from a DailyProfiles store; returns rows written.
+
+    Without `full`, dates already in `out_path` are kept and only later
+    sessions (plus the latest stored one, which may have been partial) are scored.
+    """
+    profiles = DailyProfiles.load(store_path)
+    since = 0
+    existing = None
+    if not full and os.path.exists(out_path):
+        existing = pd.read_csv(out_path)
+        stored = set(existing["Date"])
+        dates = [format_date(d) for d in profiles.dates]
+        since = next((i for i in range(len(dates) - 1, -1, -1) if dates[i] in stored), 0)
+    df = market_condition(profiles, timeframes, since)
+    if existing is not None:
+        existing.columns = df.columns
+        df = pd.concat([df, existing[~existing["Date"].isin(df["Date"])]], ignore_index=True)
+    df.to_csv(out_path, index=False)
+    return len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build MarketCondition.csv from stored daily profiles")
+    parser.add_argument("--store", default=profiles_path(os.path.join(ENGINE_DIR, "RawMetrics.csv")),
+                        help="DailyProfiles written by core.profile_engine (default: %(default)s)")
+    parser.add_argument("--out", default=os.path.join(ENGINE_DIR, os.path.basename(MARKET_CONDITION_FILE)))
+    parser.add_argument("--full", action="store_true", help="rebuild instead of updating incrementally")
+    args = parser.parse_args(argv)
+    rows = update_market_condition(args.store, args.out, full=args.full)
+    print(f"Wrote {rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Cross-market Z-Score analysis on one date axis.
+
+ZScorePanel holds one timeframe's Z-Scores for every market as a
+(date, market, metric) float32 array, NaN where a market has no row. Markets
+are merged in as their files change, and only dates newer than what is
+already loaded are read in. Questions about several markets are then
+array reductions:
+
+- co-exceedance: days on which two markets are both at or beyond a
+  threshold, as one matrix product of the exceedance indicators;
+- rolling correlation: windowed Pearson correlation between every pair of
+  markets, from cumulative sums over the days both have a value.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = 60
+
+
+def _days(dates):
+    return pd.to_datetime(pd.Series(np.asarray(dates)), format="%m/%d/%Y").to_numpy().astype("datetime64[D]")
+
+
+class ZScorePanel:
+    def __init__(self, markets, metrics):
+        self.markets = list(markets)
+        self.metrics = list(metrics)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.values = np.empty((0, len(self.markets), len(self.metrics)), dtype=np.float32)
+        self.latest = {}  # market -> newest date merged
+        self.lock = threading.Lock()
+
+    def update(self, market, zscore_df):
+        """Merge the rows of `zscore_df` newer than what is loaded for `market`; returns rows added."""
+        dates = _days(zscore_df["Date"])
+        fresh = dates > self.latest[market] if market in self.latest else np.ones(len(dates), bool)
+        if not fresh.any():
+            return 0
+        dates = dates[fresh]
+        columns = [m for m in self.metrics if m in zscore_df.columns]
+        block = zscore_df.loc[fresh, columns].to_numpy(np.float32)
+        with self.lock:
+            added = np.setdiff1d(dates, self.dates)
+            if len(added):
+                # Usually a few dates past the end; an older gap re-lays the axis once
+                merged = np.union1d(self.dates, added)
+                values = np.full((len(merged), len(self.markets), len(self.metrics)), np.nan, np.float32)
+                values[np.searchsorted(merged, self.dates)] = self.values
+                self.dates, self.values = merged, values
+            rows = np.searchsorted(self.dates, dates)
+            self.values[np.ix_(rows, [self.markets.index(market)], [self.metrics.index(c) for c in columns])] = \
+                block[:, None, :]
+            self.latest[market] = dates.max()
+        return len(dates)
+
+    def window(self, last=None):
+        """Slice of the `last` dates (all of them if None)."""
+        return slice(max(len(self.dates) - last, 0) if last else 0, len(self.dates))
+
+    def exceedances(self, threshold, last=None):
+        """(date, market, metric) indicator of |z| >= threshold; missing values never exceed."""
+        with np.errstate(invalid="ignore"):
+            return (np.abs(self.values[self.window(last)]) >= threshold).astype(np.float32)
+
+    def co_exceedance(self, threshold, metric=None, last=None):
+        """(market, market) days both were beyond `threshold` on `metric` (summed over all
+        metrics if None); the diagonal is each market's own count."""
+        e = self.exceedances(threshold, last)
+        if metric is not None:
+            e = e[:, :, self.metrics.index(metric)]
+            return e.T @ e
+        return np.einsum("tik,tjk->ij", e, e)
+
+    def metric_co_exceedance(self, threshold, last=None):
+        """Long table of (Metric, Market A, Market B, Days) for every metric and market pair."""
+        e = self.exceedances(threshold, last)
+        counts = np.einsum("tik,tjk->kij", e, e)
+        k, i, j = np.nonzero(np.triu(np.ones((len(self.markets),) * 2, bool), 1)[None] & (counts > 0))
+        return pd.DataFrame({
+            "Metric": np.asarray(self.metrics)[k],
+            "Market A": np.asarray(self.markets)[i],
+            "Market B": np.asarray(self.markets)[j],
+            "Days": counts[k, i, j].astype(np.int64),
+        }).sort_values("Days", ascending=False, kind="stable", ignore_index=True)
+
+    def rolling_correlation(self, metric, window=ROLLING_WINDOW, last=None):
+        """(dates, corr) with corr[t, i, j] the correlation of markets i and j over the
+        `window` dates ending at t, using the days both have a value; NaN under 3 such days."""
+        x = self.values[self.window(last), :, self.metrics.index(metric)].astype(np.float64)
+        valid = ~np.isnan(x)
+        x = np.where(valid, x, 0.0)
+        both = (valid[:, :, None] & valid[:, None, :]).astype(np.float64)
+        xi = x[:, :, None] * both  # x_i where j also has a value
+        xj = x[:, None, :] * both
+        sums = [both, xi, xj, xi * xi, xj * xj, xi * xj]
+        n, si, sj, sii, sjj, sij = [_rolling_sum(s, window) for s in sums]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sij - si * sj / n
+            corr = cov / np.sqrt((sii - si ** 2 / n) * (sjj - sj ** 2 / n))
+        corr[n < 3] = np.nan
+        return self.dates[self.window(last)], np.clip(corr, -1.0, 1.0)
+
+
+def _rolling_sum(values, window):
+    """Trailing-window sums along axis 0 (shorter at the start)."""
+    total = np.cumsum(values, axis=0)
+    total[window:] = total[window:] - total[:-window]
+    return total
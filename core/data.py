@@ -0,0 +1,114 @@
+import os
+import time
+import pandas as pd
+
+from core import metrics
+
+# Optional columnar backend - falls back to projected CSV reads without pyarrow
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+# QF_DATA_DIR points the app at another dataset (e.g. the benchmark's synthetic one)
+DATA_DIR = os.environ.get("QF_DATA_DIR", "data")
+
+TIMEFRAMES = [1, 3, 5, 10, 15, 20]
+
+# File paths
+MARKET_CONDITION_FILE = os.path.join(DATA_DIR, "MarketCondition.csv")
+RI_QC_FILE = os.path.join(DATA_DIR, "RI&QC.csv")
+RAW_METRICS_FILE = os.path.join(DATA_DIR, "RawMetrics.csv")
+NET_TABLE_FILES = {f"{i}TF": os.path.join(DATA_DIR, f"{i}TF Net Table.csv") for i in TIMEFRAMES}
+ZSCORE_FILES = {f"{i}TF": os.path.join(DATA_DIR, f"{i}tf Z-Score.csv") for i in TIMEFRAMES}
+# Default output of core.profile_engine / flow_engine / condition_engine, kept apart from the exported files
+ENGINE_DIR = os.path.join(DATA_DIR, ".engine")
+
+# Columns that identify a row rather than describe the market
+KEY_COLUMNS = ["Date", "Days"]
+
+MARKETS = ["GBPJPY", "EURUSD", "USDJPY", "XAUUSD", "NAS100", "BTCUSD", "ETHUSD"]
+
+# QF_MARKETS_DIR holds one directory per market, each laid out like data/
+# (see benchmarks.synthetic); without it only GBPJPY has data, in DATA_DIR
+MARKETS_DIR = os.environ.get("QF_MARKETS_DIR")
+
+
+def market_dirs():
+    """{market: data directory} for every market with data."""
+    if not MARKETS_DIR:
+        return {"GBPJPY": DATA_DIR}
+    dirs = {m: os.path.join(MARKETS_DIR, m) for m in MARKETS}
+    return {m: d for m, d in dirs.items() if os.path.isdir(d)}
+
+
+def market_file(data_dir, file_path):
+    """`file_path` (one of the paths above) inside another market's data directory."""
+    return os.path.join(data_dir, os.path.basename(file_path))
+
+
+def columnar_path(file_path):
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(os.path.dirname(file_path), ".columnar", f"{name}.parquet")
+
+
+def _columnar_is_fresh(file_path, parquet_path):
+    return (os.path.exists(parquet_path)
+            and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path))
+
+
+def to_columnar(file_path):
+    """Write a Parquet copy of a CSV source; returns the Parquet path or None."""
+    if pq is None:
+        return None
+    parquet_path = columnar_path(file_path)
+    if _columnar_is_fresh(file_path, parquet_path):
+        return parquet_path
+    df = pd.read_csv(file_path)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = parquet_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+
+def read_columns(file_path):
+    """Column names of a source without reading any rows."""
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    parquet_path = to_columnar(file_path)
+    if parquet_path:
+        return list(pq.read_schema(parquet_path).names)
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+
+def row_count(file_path):
+    parquet_path = to_columnar(file_path)
+    if parquet_path:
+        return pq.read_metadata(parquet_path).num_rows
+    with open(file_path) as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def metric_names(file_path):
+    return [c for c in read_columns(file_path) if c not in KEY_COLUMNS and not c.startswith("Unnamed")]
+
+
+def load_table(file_path, columns=None):
+    """Load a source, reading only `columns` (in file order) when given.
+
+    Raises FileNotFoundError like pd.read_csv so pages keep their handling.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(file_path)
+    if columns is not None:
+        wanted = set(columns)
+        columns = [c for c in read_columns(file_path) if c in wanted]
+    start = time.perf_counter()
+    parquet_path = to_columnar(file_path)
+    if parquet_path:
+        df = pd.read_parquet(parquet_path, columns=columns)
+    else:
+        df = pd.read_csv(file_path, usecols=columns)
+    metrics.data_load_seconds.observe(os.path.basename(file_path), value=time.perf_counter() - start)
+    return df
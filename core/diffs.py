@@ -0,0 +1,100 @@
+"""What changed since the previous session, across every source.
+
+For each source file the latest two dates are compared, per Days group
+where the file has one: numeric columns give a change, a percent change
+and a score (the change over the standard deviation of that column's daily
+changes, so moves in prices, TPO counts and z-scores rank on one scale);
+text columns (condition labels, QC buckets) give a changed / unchanged flag.
+
+Both tables are written at ingest as small views, so the changes page reads
+kilobytes per market instead of the sources.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import materialized
+from core.data import (DATA_DIR, KEY_COLUMNS, MARKET_CONDITION_FILE, NET_TABLE_FILES, RAW_METRICS_FILE,
+                       RI_QC_FILE, ZSCORE_FILES, load_table, market_file)
+from core.views import newest_first
+
+VIEW = "changes"
+LABEL_VIEW = "label_changes"
+SOURCES = {
+    "RawMetrics": [RAW_METRICS_FILE],
+    "Z-Score": list(ZSCORE_FILES.values()),
+    "Net Table": list(NET_TABLE_FILES.values()),
+    "MarketCondition": [MARKET_CONDITION_FILE],
+    "RI&QC": [RI_QC_FILE],
+}
+BIG_MOVE = 2.0  # |score| at or above this is flagged on the changes page
+
+
+def source_changes(df, source):
+    """(numeric changes, label changes) between the latest two dates of one source."""
+    df = newest_first(df)
+    fields = [c for c in df.columns if c not in KEY_COLUMNS and not str(c).startswith("Unnamed")]
+    numeric = [c for c in fields if pd.api.types.is_numeric_dtype(df[c])]
+    labels = [c for c in fields if c not in numeric]
+    groups = df.groupby("Days", sort=True) if "Days" in df.columns else [(None, df)]
+    moves, flips = [], []
+    for days, group in groups:
+        if len(group) < 2:
+            continue
+        timeframe = f"{int(days)}TF" if days is not None else ""
+        dates = {"Date": group["Date"].iloc[0], "Previous Date": group["Date"].iloc[1]}
+        if numeric:
+            values = group[numeric].to_numpy(np.float64)[::-1]  # oldest first
+            steps = np.diff(values, axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                spread = np.nanstd(steps, axis=0, ddof=1) if len(steps) > 1 else np.full(len(numeric), np.nan)
+                change = steps[-1]
+                moves.append(pd.DataFrame({
+                    "Source": source, "Timeframe": timeframe, "Metric": numeric, **dates,
+                    "Previous": values[-2], "Latest": values[-1], "Change": change,
+                    "Change %": np.where(values[-2] != 0, change / np.abs(values[-2]) * 100, np.nan),
+                    "Score": np.where(spread > 0, change / spread, np.nan),
+                }))
+        if labels:
+            latest, previous = group[labels].iloc[0].astype(str), group[labels].iloc[1].astype(str)
+            flips.append(pd.DataFrame({
+                "Source": source, "Timeframe": timeframe, "Field": labels, **dates,
+                "Previous": previous.to_numpy(), "Latest": latest.to_numpy(),
+                "Changed": (previous != latest).to_numpy(),
+            }))
+    return (pd.concat(moves, ignore_index=True) if moves else pd.DataFrame(),
+            pd.concat(flips, ignore_index=True) if flips else pd.DataFrame())
+
+
+def rank_moves(moves):
+    """Largest |score| first, with a 1-based Rank column."""
+    order = np.argsort(-np.nan_to_num(np.abs(moves["Score"].to_numpy()), nan=-1), kind="stable")
+    moves = moves.iloc[order].reset_index(drop=True)
+    moves.insert(0, "Rank", np.arange(1, len(moves) + 1))
+    return moves
+
+
+def all_changes(data_dir=DATA_DIR):
+    moves, flips = [], []
+    for source, paths in SOURCES.items():
+        for path in paths:
+            path = market_file(data_dir, path)
+            if os.path.exists(path):
+                m, f = source_changes(load_table(path), source)
+                moves.append(m)
+                flips.append(f)
+    moves = pd.concat(moves, ignore_index=True) if moves else pd.DataFrame()
+    flips = pd.concat(flips, ignore_index=True) if flips else pd.DataFrame()
+    return (rank_moves(moves) if not moves.empty else moves), flips
+
+
+def ingest(data_dir=DATA_DIR, state=None):
+    """Rebuild both views when any source file changed since the last run."""
+    mtimes = materialized.file_mtimes(market_file(data_dir, p) for paths in SOURCES.values() for p in paths)
+    if state and state.get("mtimes") == mtimes and materialized.view_mtime(VIEW, data_dir) is not None:
+        return state
+    moves, flips = all_changes(data_dir)
+    materialized.write_view(VIEW, moves, data_dir)
+    materialized.write_view(LABEL_VIEW, flips, data_dir)
+    return {"mtimes": mtimes}
@@ -0,0 +1,84 @@
+"""Event studies: what RawMetrics did around Z-Score threshold crossings.
+
+An event is the first day of an excursion beyond the threshold - |z| (or
+z, or -z for one direction) at or over it after a day under it. Windows
+around every event are cut from the metric series in one strided view
+(no per-event loop), rebased on the event day and averaged into a path
+with a normal-approximation confidence band. Windows from several
+timeframes or markets can be stacked before summarizing.
+"""
+import numpy as np
+import pandas as pd
+
+DIRECTIONS = {"Both": "both", "Positive": "up", "Negative": "down"}
+CONFIDENCE_Z = 1.96  # 95% band
+
+
+def crossings(zscores, threshold, direction="both"):
+    """Positions (oldest-first series) where the z-score moves beyond the threshold."""
+    z = np.asarray(zscores, dtype=np.float64)
+    if direction == "up":
+        beyond = z >= threshold
+    elif direction == "down":
+        beyond = z <= -threshold
+    else:
+        beyond = np.abs(z) >= threshold
+    previous = np.concatenate(([False], beyond[:-1]))
+    return np.flatnonzero(beyond & ~previous)
+
+
+def event_windows(values, positions, before, after):
+    """(events, before + 1 + after) array; row i spans positions[i] - before .. + after.
+
+    Windows running off either end of the series are NaN-padded.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    padded = np.concatenate((np.full(before, np.nan), values, np.full(after, np.nan)))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, before + after + 1)
+    return windows[np.asarray(positions, dtype=np.int64)]
+
+
+def summarize(windows, before, relative=True, z=CONFIDENCE_Z):
+    """Average path over event windows with a confidence band, one row per offset."""
+    if relative:
+        windows = windows - windows[:, [before]]
+    n = np.sum(~np.isnan(windows), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(windows, axis=0) if len(windows) else np.full(windows.shape[1], np.nan)
+        std = np.nanstd(windows, axis=0, ddof=1) if len(windows) > 1 else np.zeros(windows.shape[1])
+        half = z * std / np.sqrt(n)
+    return pd.DataFrame({
+        "Offset": np.arange(-before, windows.shape[1] - before),
+        "Mean": mean,
+        "Lower": mean - half,
+        "Upper": mean + half,
+        "Events": n,
+    })
+
+
+def oldest_first(df):
+    order = pd.to_datetime(df["Date"], format="%m/%d/%Y").argsort(kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+
+def align_events(zscore_df, metric, raw_df, days, column, threshold, direction="both"):
+    """Event dates for `metric` and the oldest-first `column` series they index into.
+
+    `zscore_df` has Date and `metric`; `raw_df` has Date, Days and `column`.
+    Returns (values, positions, event_dates).
+    """
+    zscores = oldest_first(zscore_df[["Date", metric]])
+    series = oldest_first(raw_df[raw_df["Days"] == days][["Date", column]])
+    event_dates = zscores["Date"].to_numpy()[crossings(zscores[metric].to_numpy(), threshold, direction)]
+    positions = pd.Index(series["Date"]).get_indexer(event_dates)
+    found = positions >= 0
+    return series[column].to_numpy(np.float64), positions[found], event_dates[found]
+
+
+def event_study(zscore_df, metric, raw_df, days, column, threshold, direction="both",
+                before=5, after=20, relative=True):
+    """Average `column` path around `metric` crossings; returns (summary, event_dates)."""
+    values, positions, event_dates = align_events(zscore_df, metric, raw_df, days, column,
+                                                  threshold, direction)
+    windows = event_windows(values, positions, before, after)
+    return summarize(windows, before, relative), event_dates
@@ -0,0 +1,235 @@
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+import plotly.colors as pc
+import plotly.graph_objects as go
+
+# Raster heatmap: z-scores are clipped to ±RASTER_ZMAX and quantized to palette indices
+RASTER_ZMAX = 3.0
+RASTER_LEVELS = 25
+RASTER_NAN_RGB = (200, 200, 200)
+
+
+def flow_trend_figure(chart_df, tf):
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(x=chart_df['Date'], y=chart_df['Net'],
+                             mode='lines+markers', name='Net Flow',
+                             line=dict(color='#667eea', width=3)))
+    fig.add_trace(go.Scatter(x=chart_df['Date'], y=chart_df['3D Net'],
+                             mode='lines+markers', name='3D Net',
+                             line=dict(color='#764ba2', width=2)))
+
+    fig.update_layout(title=f"Flow Trend - {tf}", height=400,
+                      hovermode='x unified')
+    return fig
+
+
+def key_metrics_figure(chart_data, key_metrics, days):
+    fig = go.Figure()
+    colors = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe']
+
+    for i, metric in enumerate(key_metrics):
+        fig.add_trace(go.Scatter(x=chart_data['Date'], y=chart_data[metric],
+                                 mode='lines+markers', name=metric,
+                                 line=dict(color=colors[i % len(colors)], width=2)))
+
+    fig.update_layout(title=f"Key Metrics Trend ({days}D)", height=400,
+                      hovermode='x unified')
+    return fig
+
+
+def flow_delta_figure(delta_df):
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(x=delta_df['Transition'], y=delta_df['Δ Net Flow'],
+                         name='Net Flow Delta', marker_color='#667eea'))
+    fig.add_trace(go.Bar(x=delta_df['Transition'], y=delta_df['Δ 3D Net'],
+                         name='3D Net Delta', marker_color='#764ba2'))
+
+    fig.update_layout(title="Flow Deltas Across Timeframes", height=400,
+                      barmode='group', hovermode='x unified')
+    return fig
+
+
+def zscore_heatmap_figure(zscore_df, tf, latest_n):
+    fig = go.Figure(data=go.Heatmap(
+        z=zscore_df.values,
+        x=zscore_df.columns,
+        y=zscore_df.index,
+        colorscale='RdBu_r',
+        zmid=0,
+        text=zscore_df.round(2).values,
+        texttemplate="%{text}",
+        textfont={"size": 10},
+        colorbar=dict(
+            title="Z-Score",
+            title_side="right"
+        )
+    ))
+
+    fig.update_layout(
+        title=f"Z-Score Heatmap - {tf} ({latest_n} Days)",
+        height=max(400, len(zscore_df) * 30),
+        xaxis_title="Metrics",
+        yaxis_title="Date",
+        font=dict(size=12)
+    )
+    return fig
+
+
+def metric_lines_figure(df_to_plot, metrics, fill=None):
+    fig = go.Figure()
+    mode = 'lines' if fill else 'lines+markers'
+    for metric in metrics:
+        fig.add_trace(go.Scatter(x=df_to_plot["Date"], y=df_to_plot[metric],
+                                 mode=mode, name=metric, fill=fill))
+    return fig
+
+
+def _raster_palette(levels=RASTER_LEVELS):
+    colors = pc.sample_colorscale('RdBu_r', list(np.linspace(0, 1, levels)))
+    palette = [pc.unlabel_rgb(c) for c in colors] + [RASTER_NAN_RGB]
+    return np.array(palette, dtype=np.uint8)
+
+
+RASTER_PALETTE = _raster_palette()
+
+
+def quantize_zscores(values, zmax=RASTER_ZMAX, levels=RASTER_LEVELS):
+    """uint8 palette indices for a 2-D z-score array; NaN maps to the last entry."""
+    values = np.asarray(values, dtype=np.float64)
+    scaled = (np.clip(values, -zmax, zmax) + zmax) * ((levels - 1) / (2 * zmax))
+    index = np.rint(np.nan_to_num(scaled)).astype(np.uint8)
+    index[np.isnan(values)] = levels
+    return index
+
+
+def _palette_png_data_uri(index, palette=RASTER_PALETTE):
+    # Palette-mode PNG: one byte per cell, the browser applies the colors
+    from PIL import Image
+    image = Image.fromarray(index)
+    image.putpalette(palette.ravel().tolist())
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def zscore_raster_figure(zscore_df, tf, max_date_ticks=12):
+    # One pixel per cell, rendered server-side - the payload no longer grows with hover text
+    index = quantize_zscores(zscore_df.to_numpy())
+    n_rows, n_cols = index.shape
+    fig = go.Figure(go.Image(source=_palette_png_data_uri(index), hoverinfo="skip"))
+
+    step = max(1, n_rows // max_date_ticks)
+    fig.update_xaxes(tickvals=list(range(n_cols)), ticktext=list(zscore_df.columns), tickangle=-45)
+    fig.update_yaxes(tickvals=list(range(0, n_rows, step)),
+                     ticktext=[str(d) for d in zscore_df.index[::step]],
+                     scaleanchor=False)
+    fig.update_layout(
+        title=f"Z-Score Overview - {tf} ({n_rows} Days, ±{RASTER_ZMAX:g} scale)",
+        height=600,
+        xaxis_title="Metrics",
+        yaxis_title="Date",
+        font=dict(size=12)
+    )
+    return fig
+
+
+def live_profile_figure(prices, volumes, snapshot):
+    fig = go.Figure(go.Bar(x=volumes, y=prices, orientation='h', name='Volume',
+                           marker_color='#667eea'))
+    for level, color in (("VAH", '#764ba2'), ("POC", '#f5576c'), ("VAL", '#764ba2')):
+        if snapshot[level] is not None:
+            fig.add_hline(y=snapshot[level], line_dash='dash', line_color=color,
+                          annotation_text=f"{level} {snapshot[level]:g}")
+    fig.update_layout(title=f"Developing Profile - {snapshot['Session']}", height=500,
+                      xaxis_title="Volume", yaxis_title="Price", bargap=0)
+    return fig
+
+
+def state_timeline_figure(timeline_df, tf):
+    dates = pd.to_datetime(timeline_df['Date'], format="%m/%d/%Y")
+    fig = go.Figure(go.Scatter(
+        x=dates, y=timeline_df['State'], mode='markers',
+        marker=dict(color=timeline_df['State'], colorscale='Viridis', size=6, symbol='square'),
+        hovertemplate="%{x|%Y-%m-%d}<br>State %{y}<extra></extra>"
+    ))
+    fig.update_yaxes(title="State", dtick=1)
+    fig.update_layout(title=f"Market State Timeline - {tf}", height=350,
+                      xaxis=dict(title="Date", rangeslider=dict(visible=True)))
+    return fig
+
+
+def event_study_figure(summary_df, column, metric, threshold, n_events):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=summary_df['Offset'], y=summary_df['Upper'], mode='lines',
+                             line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=summary_df['Offset'], y=summary_df['Lower'], mode='lines',
+                             line=dict(width=0), fill='tonexty', fillcolor='rgba(102,126,234,0.25)',
+                             name='95% band'))
+    fig.add_trace(go.Scatter(x=summary_df['Offset'], y=summary_df['Mean'], mode='lines+markers',
+                             name=f"Mean Δ {column}", line=dict(color='#667eea', width=3)))
+    fig.add_vline(x=0, line_dash='dash', line_color='orange')
+    fig.add_hline(y=0, line_color='grey', line_width=1)
+    fig.update_layout(title=f"{column} around {metric} crossing ±{threshold} ({n_events} events)",
+                      height=450, xaxis_title="Days from event", yaxis_title=f"Δ {column} vs event day",
+                      hovermode='x unified')
+    return fig
+
+
+def seasonality_figure(breakdown_df, source, metric, dimension, tf):
+    fig = go.Figure(go.Bar(
+        x=breakdown_df['Bucket'], y=breakdown_df['Mean'],
+        error_y=dict(type='data', array=breakdown_df['CI'], color='#764ba2'),
+        marker_color='#667eea', customdata=breakdown_df['Count'],
+        hovertemplate='%{x}<br>Mean %{y:.2f}<br>%{customdata} days<extra></extra>',
+    ))
+    fig.update_layout(title=f"{source} {metric} by {dimension} ({tf})", height=450,
+                      xaxis_title=dimension, yaxis_title=f"Mean {metric} (95% CI)",
+                      xaxis_type='category')
+    return fig
+
+
+def top_moves_figure(moves_df):
+    labels = (moves_df['Market'] + ' · ' + moves_df['Source'] + ' ' + moves_df['Timeframe'] + ' · '
+              + moves_df['Metric'])
+    colors = np.where(moves_df['Score'] >= 0, '#667eea', '#764ba2')
+    fig = go.Figure(go.Bar(
+        x=moves_df['Score'][::-1], y=labels[::-1], orientation='h', marker_color=colors[::-1],
+        customdata=np.stack([moves_df['Previous'], moves_df['Latest']], axis=1)[::-1],
+        hovertemplate='%{y}<br>Score %{x:+.2f}<br>%{customdata[0]:.4g} → %{customdata[1]:.4g}<extra></extra>',
+    ))
+    fig.update_layout(title="Biggest Moves Since the Previous Session", height=max(300, 24 * len(moves_df) + 120),
+                      xaxis_title="Change / typical daily change", yaxis_title=None)
+    return fig
+
+
+def co_exceedance_figure(matrix, markets, title):
+    fig = go.Figure(go.Heatmap(z=matrix, x=markets, y=markets, colorscale='Purples', text=matrix,
+                               texttemplate='%{text:.0f}', hovertemplate='%{y} & %{x}: %{z:.0f} days<extra></extra>'))
+    fig.update_layout(title=title, height=450, yaxis_autorange='reversed')
+    return fig
+
+
+def rolling_correlation_figure(dates, series, metric, reference, window):
+    fig = go.Figure()
+    for market, values in series.items():
+        fig.add_trace(go.Scatter(x=dates, y=values, mode='lines', name=market))
+    fig.add_hline(y=0, line_color='grey', line_width=1)
+    fig.update_layout(title=f"{window}-Day Correlation of {metric} Z-Scores with {reference}", height=450,
+                      xaxis_title="Date", yaxis_title="Correlation", yaxis_range=[-1, 1], hovermode='x unified')
+    return fig
+
+
+def coherence_figure(summary_df):
+    pairs = [c for c in summary_df.columns if '↔' in c]
+    fig = go.Figure(go.Heatmap(
+        z=summary_df[pairs].to_numpy(), x=pairs, y=summary_df['Metric'], zmin=-1, zmax=1,
+        colorscale='RdBu', hovertemplate='%{y}<br>%{x}: %{z:.2f}<extra></extra>',
+    ))
+    fig.update_layout(title="Cross-Timeframe Alignment (correlation over time)",
+                      height=max(400, 22 * len(summary_df) + 120), yaxis_autorange='reversed')
+    return fig
@@ -0,0 +1,188 @@
+"""Flow-table engine: `*TF Net Table.csv` rows from RawMetrics.
+
+Each timeframe's rows are scored against the previous window of the same
+length with four +/-2 votes per column, so both scores run -8..8:
+
+    Dir  value migration: POC, VAH and VAL versus the previous window, and
+         the close versus this window's POC
+    Act  in-window activity: rotation factor, range extension up versus
+         down, close in the upper versus lower half of the range, and TPOs
+         below versus above the POC (buying tails count as positive)
+
+Net = Dir + Act; the 3D columns are 3-row rolling sums within a timeframe.
+
+All timeframes are scored in one pass over RawMetrics sorted by (Days,
+date): differences and rolling sums are array kernels with group
+boundaries masked out, so a new day only needs its own rows plus the
+three before it. Output goes to data/.engine by default; a table that
+already exists is rewritten with its own header and CRLF rows.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.data import DATA_DIR, ENGINE_DIR, TIMEFRAMES
+
+NET_TABLE_COLUMNS = ["Date", "Days", "Dir", "Act", "Net", "3D Dir", "3D Act", "3D Net"]
+MIGRATION_COLUMNS = ["POC", "VAH", "VAL"]
+VOTE = 2
+ROLLING_ROWS = 3
+
+
+def net_table_path(out_dir, days):
+    return os.path.join(out_dir, f"{days}TF Net Table.csv")
+
+
+def _layout(path):
+    """(columns, header line) of an existing table, blank column names included; None if missing."""
+    if not os.path.exists(path):
+        return None
+    with open(path, newline="") as f:
+        header = f.readline().rstrip("\r\n")
+    return list(pd.read_csv(path, nrows=0).columns), header
+
+
+def write_table(table, path, layout=None):
+    """Write `table` with CRLF rows in `layout` (see _layout), or as NET_TABLE_COLUMNS."""
+    columns, header = layout or (NET_TABLE_COLUMNS, ",".join(NET_TABLE_COLUMNS))
+    with open(path, "w", newline="") as f:
+        f.write(header + "\r\n")
+        table.reindex(columns=columns).to_csv(f, index=False, header=False, lineterminator="\r\n")
+
+
+def _by_timeframe(raw_df):
+    df = raw_df.assign(_date=pd.to_datetime(raw_df["Date"], format="%m/%d/%Y"))
+    return df.sort_values(["Days", "_date"], kind="stable").reset_index(drop=True)
+
+
+def _previous(values, same_group):
+    """values[i - 1] where row i - 1 is in the same timeframe, else NaN."""
+    out = np.full(len(values), np.nan)
+    out[1:] = np.where(same_group, values[:-1], np.nan)
+    return out
+
+
+def rolling_sum(values, groups, window=ROLLING_ROWS):
+    """Sum of the last `window` values within each group; NaN until the window fills.
+
+    One cumulative sum for every group: window i is cs[i] - cs[i - window],
+    valid when both ends fall in the same group and nothing inside is NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    cs = np.concatenate(([0.0], np.cumsum(np.nan_to_num(values))))
+    gaps = np.concatenate(([0], np.cumsum(np.isnan(values))))
+    out = np.full(len(values), np.nan)
+    i = np.arange(window - 1, len(values))
+    ok = (groups[i] == groups[i - window + 1]) & (gaps[i + 1] == gaps[i + 1 - window])
+    out[i[ok]] = (cs[i + 1] - cs[i + 1 - window])[ok]
+    return out
+
+
+def flow_scores(raw_df):
+    """Dir / Act / Net and their 3D sums for every timeframe in `raw_df`.
+
+    Returns rows sorted newest first, Days ascending, like RawMetrics.
+    """
+    df = _by_timeframe(raw_df)
+    days = df["Days"].to_numpy()
+    same_group = days[1:] == days[:-1]
+
+    direction = np.sign(df["Close"].to_numpy() - df["POC"].to_numpy())
+    for column in MIGRATION_COLUMNS:
+        values = df[column].to_numpy(np.float64)
+        direction = direction + np.sign(values - _previous(values, same_group))
+
+    activity = (np.sign(df["RF"].to_numpy(np.float64))
+                + np.sign(df["RE High"].to_numpy(np.float64) - df["RE Low"].to_numpy(np.float64))
+                + np.sign(50.0 - df["Close%R"].to_numpy(np.float64))
+                + np.sign(df["TPO Bl. POC"].to_numpy(np.float64) - df["TPO Ab. POC"].to_numpy(np.float64)))
+    activity = np.where(np.isnan(direction), np.nan, activity)  # first window has no baseline
+
+    out = pd.DataFrame({"Date": df["Date"], "Days": days, "_date": df["_date"]})
+    out["Dir"] = VOTE * direction
+    out["Act"] = VOTE * activity
+    out["Net"] = out["Dir"] + out["Act"]
+    for column in ["Dir", "Act", "Net"]:
+        out[f"3D {column}"] = rolling_sum(out[column].to_numpy(), days)
+    out = out.sort_values(["_date", "Days"], ascending=[False, True], kind="stable")
+    out = out[NET_TABLE_COLUMNS].reset_index(drop=True)
+    score_columns = NET_TABLE_COLUMNS[2:]
+    out[score_columns] = out[score_columns].astype("Int64")
+    return out
+
+
+def _dates_newest_first(raw_df):
+    dates = pd.Series(raw_df["Date"].unique())
+    order = pd.to_datetime(dates, format="%m/%d/%Y").sort_values(ascending=False).index
+    return list(dates[order])
+
+
+def update_flow_tables(raw_path, out_dir, timeframes=TIMEFRAMES, full=False):
+    """Write or refresh the Net Table CSVs for `raw_path`; returns rows written per file.
+
+    Without `full`, only dates missing from the existing tables (plus the
+    latest stored date, which may have been partial) are scored, using the
+    ROLLING_ROWS windows before them as context.
+    """
+    raw_df = pd.read_csv(raw_path)
+    raw_df = raw_df[raw_df["Days"].isin(timeframes)]
+    paths = {n: net_table_path(out_dir, n) for n in timeframes}
+    # Rewritten files keep their own columns, e.g. the trailing blank one in 1TF
+    layouts = {n: _layout(p) for n, p in paths.items()}
+    existing = {}
+    if not full and all(layouts.values()):
+        dtypes = {c: "Int64" for c in NET_TABLE_COLUMNS[2:]}  # stay integers next to empty first rows
+        existing = {n: pd.read_csv(p, dtype=dtypes) for n, p in paths.items()}
+
+    if existing:
+        stored = set.intersection(*(set(df["Date"]) for df in existing.values()))
+        dates = _dates_newest_first(raw_df)
+        n_new = sum(1 for d in dates if d not in stored) + 1
+        raw_df = raw_df[raw_df["Date"].isin(dates[:n_new + ROLLING_ROWS])]
+        scores = flow_scores(raw_df)
+        scores = scores[scores["Date"].isin(dates[:n_new])]
+    else:
+        scores = flow_scores(raw_df)
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for n, path in paths.items():
+        table = scores[scores["Days"] == n]
+        if n in existing:
+            old = existing[n]
+            table = pd.concat([table, old[~old["Date"].isin(table["Date"])]], ignore_index=True)
+        write_table(table, path, layouts[n])
+        written[n] = len(table)
+    return written
+
+
+def _build_market(args):
+    return update_flow_tables(*args)
+
+
+def backfill(jobs, max_workers=None):
+    """Build Net Tables for several markets in parallel.
+
+    `jobs` maps market -> (raw_metrics_path, out_dir); returns rows written.
+    """
+    markets = list(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        counts = pool.map(_build_market, [jobs[m] + (TIMEFRAMES, True) for m in markets])
+    return dict(zip(markets, counts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the *TF Net Table.csv files from RawMetrics")
+    parser.add_argument("--raw", default=os.path.join(DATA_DIR, "RawMetrics.csv"))
+    parser.add_argument("--out", default=ENGINE_DIR, help="directory for the Net Table files (default: %(default)s)")
+    parser.add_argument("--full", action="store_true", help="rebuild instead of updating incrementally")
+    args = parser.parse_args(argv)
+    written = update_flow_tables(args.raw, args.out, full=args.full)
+    print(f"Wrote {sum(written.values())} rows to {len(written)} Net Tables in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Rolling indicators over the full history of each (Days, metric) series.
+
+IndicatorCache computes SMA, EMA, rolling std, Bollinger bands and rate of
+change over the whole series, so a chart of the last n days slices values
+whose windows are already full, with no NaN warm-up at the left edge.
+Results are cached per (Days, metric, indicator, window). When days are
+appended, each cached result is extended over only the new rows: EMA
+continues its recursion from the last value, and the windowed indicators
+recompute just the final `window + new` values.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+INDICATORS = ["SMA", "EMA", "Std", "Bollinger", "ROC"]
+OVERLAYS = ["SMA", "EMA", "Bollinger"]  # drawn on the metric's own scale
+BOLLINGER_K = 2.0
+
+
+def compute(kind, values, window, prior=None):
+    """{column: array} of indicator `kind` over `values` (oldest first).
+
+    `prior` is the previous EMA value when extending an EMA.
+    """
+    series = pd.Series(values, dtype=np.float64)
+    if kind == "SMA":
+        return {"SMA": series.rolling(window).mean().to_numpy()}
+    if kind == "EMA":
+        if prior is not None:
+            # Seeding with the last EMA continues the adjust=False recursion exactly
+            return {"EMA": pd.concat([pd.Series([prior]), series]).ewm(span=window, adjust=False)
+                    .mean().to_numpy()[1:]}
+        return {"EMA": series.ewm(span=window, adjust=False, min_periods=window).mean().to_numpy()}
+    if kind == "Std":
+        return {"Std": series.rolling(window).std().to_numpy()}
+    if kind == "Bollinger":
+        mid, std = series.rolling(window).mean(), series.rolling(window).std(ddof=0)
+        return {"Middle": mid.to_numpy(), "Upper": (mid + BOLLINGER_K * std).to_numpy(),
+                "Lower": (mid - BOLLINGER_K * std).to_numpy()}
+    if kind == "ROC":
+        return {"ROC": ((series / series.shift(window) - 1) * 100).to_numpy()}
+    raise ValueError(f"unknown indicator {kind!r}; expected one of {INDICATORS}")
+
+
+class IndicatorCache:
+    def __init__(self):
+        self.dates = {}  # (days, metric) -> datetime64[D], oldest first
+        self.values = {}  # (days, metric) -> float64 values
+        self.results = {}  # (days, metric, kind, window) -> {column: array}
+        self.lock = threading.Lock()
+
+    def update(self, raw_df):
+        """Append days of `raw_df` (Date, Days, metrics...) newer than each series; returns rows added."""
+        metrics = [c for c in raw_df.columns
+                   if c not in ("Date", "Days") and pd.api.types.is_numeric_dtype(raw_df[c])]
+        added = 0
+        with self.lock:
+            for days, group in raw_df.groupby("Days"):
+                dates = pd.to_datetime(group["Date"]).to_numpy().astype("datetime64[D]")
+                order = np.argsort(dates, kind="stable")
+                dates = dates[order]
+                for metric in metrics:
+                    key = (days, metric)
+                    known = self.dates.get(key)
+                    fresh = dates > known[-1] if known is not None and len(known) else np.ones(len(dates), bool)
+                    if not fresh.any():
+                        continue
+                    new = group[metric].to_numpy(np.float64)[order][fresh]
+                    self.dates[key] = np.concatenate((known, dates[fresh])) if known is not None else dates[fresh]
+                    self.values[key] = np.concatenate((self.values[key], new)) if known is not None else new
+                    self._extend(key, len(new))
+                    added += len(new)
+        return added
+
+    def _extend(self, key, n_new):
+        values = self.values[key]
+        for (days, metric, kind, window), result in list(self.results.items()):
+            if (days, metric) != key:
+                continue
+            old = len(values) - n_new
+            if kind == "EMA" and old:
+                prior = result["EMA"][-1]
+                tail = compute(kind, values[old:], window, prior if not np.isnan(prior) else None)
+            else:
+                start = max(old - window, 0)
+                tail = {c: v[old - start:] for c, v in compute(kind, values[start:], window).items()}
+            self.results[(days, metric, kind, window)] = {c: np.concatenate((result[c], tail[c])) for c in result}
+
+    def indicator(self, days, metric, kind, window):
+        """(dates, {column: values}) over the full history; computed once per key."""
+        key = (days, metric, kind, window)
+        with self.lock:
+            if key not in self.results:
+                self.results[key] = compute(kind, self.values.get((days, metric), np.empty(0)), window)
+            return self.dates.get((days, metric), np.empty(0, "datetime64[D]")), self.results[key]
+
+    def at(self, days, metric, kind, window, dates):
+        """DataFrame of indicator columns for the given `dates` (NaN where unknown)."""
+        known, result = self.indicator(days, metric, kind, window)
+        dates = pd.to_datetime(pd.Series(np.asarray(dates))).to_numpy().astype("datetime64[D]")
+        if not len(known):
+            return pd.DataFrame({c: np.full(len(dates), np.nan) for c in result})
+        pos = np.minimum(np.searchsorted(known, dates), len(known) - 1)
+        found = known[pos] == dates
+        return pd.DataFrame({c: np.where(found, v[pos], np.nan) for c, v in result.items()})
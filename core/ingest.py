@@ -0,0 +1,67 @@
+"""Ingest: refresh the materialized views after the data files change.
+
+    python -m core.ingest [--data-dir data | --all-markets] [--full]
+
+Each step folds whatever is new in the source files into its view under
+<data dir>/.views/ and returns its watermark, kept in state.json, so a daily
+run costs only the appended rows. --full drops the watermarks and rebuilds
+every view from the whole history. --all-markets ingests every market in
+parallel, one process each.
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from core import alerts, diffs, materialized, seasonality, summaries
+from core.data import DATA_DIR, market_dirs
+
+STEPS = {
+    seasonality.VIEW: seasonality.ingest,
+    diffs.VIEW: diffs.ingest,
+    summaries.VIEW: summaries.ingest,
+    alerts.STEP: alerts.ingest,
+}
+
+
+def run(data_dir=DATA_DIR, full=False, steps=None):
+    """Run the ingest steps (all by default); returns {step: seconds}."""
+    state = materialized.load_state(data_dir)
+    timings = {}
+    for name in steps or STEPS:
+        start = time.perf_counter()
+        state[name] = STEPS[name](data_dir, None if full else state.get(name))
+        materialized.save_state(state, data_dir)
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def run_markets(data_dirs, full=False, steps=None, max_workers=None):
+    """Ingest several markets in parallel; `data_dirs` maps market -> data directory.
+
+    Returns {market: {step: seconds}}.
+    """
+    markets = list(data_dirs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        timings = pool.map(run, [data_dirs[m] for m in markets], repeat(full), repeat(steps))
+    return dict(zip(markets, timings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the materialized views")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--all-markets", action="store_true", help="ingest every market in market_dirs()")
+    parser.add_argument("--full", action="store_true", help="rebuild every view from scratch")
+    parser.add_argument("--steps", nargs="+", choices=list(STEPS), help="only run these steps")
+    args = parser.parse_args(argv)
+    if args.all_markets:
+        timings = run_markets(market_dirs(), args.full, args.steps)
+    else:
+        timings = {args.data_dir: run(args.data_dir, args.full, args.steps)}
+    for market, steps in timings.items():
+        for name, seconds in steps.items():
+            print(f"{market} {name}: {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
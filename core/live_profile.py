@@ -0,0 +1,195 @@
+"""Developing volume profile for the current session, fed incrementally.
+
+A LiveProfile keeps the session's volume per price bucket in a preallocated
+array; each tick or bar adds into it and POC / VAH / VAL are re-derived with
+a few O(buckets) array passes, so Live Mode never recomputes the session.
+
+The feed is a local CSV that something else appends to (a file tail; a
+socket bridge can simply write the same lines). Rows are either ticks
+(Datetime, Price, Volume) or bars (Datetime, Open, High, Low, Close, Volume);
+a new calendar date starts a new session.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.data import DATA_DIR
+from core.profile_engine import tick_decimals
+
+LIVE_FEED_FILE = os.environ.get("QF_LIVE_FEED", os.path.join(DATA_DIR, "live_feed.csv"))
+LIVE_TICK = float(os.environ.get("QF_LIVE_TICK", "0.01"))
+BUCKETS = 4096
+VALUE_AREA = 0.70
+
+
+class LiveProfile:
+    """Session OHLCV plus a price-bucketed volume histogram."""
+
+    def __init__(self, tick=LIVE_TICK, buckets=BUCKETS, value_area=VALUE_AREA):
+        self.tick = tick
+        self.value_area_fraction = value_area
+        self.decimals = tick_decimals(tick)
+        self.volume_at = np.zeros(buckets, dtype=np.float64)
+        self.reset()
+
+    def reset(self, session=None):
+        self.volume_at[:] = 0.0
+        self.session = session
+        self.base = None  # tick index of volume_at[0]
+        self.open = self.high = self.low = self.close = None
+        self.volume = 0.0
+        self.updates = 0
+        self.poc = self.vah = self.val = None
+
+    def _bucket(self, price):
+        return int(np.floor(price / self.tick + 1e-9))
+
+    def _make_room(self, lo, hi):
+        # Keep [lo, hi] inside the array: recenter, growing only if the session outgrows it
+        size = len(self.volume_at)
+        if self.base is not None and lo >= self.base and hi < self.base + size:
+            return
+        used = np.flatnonzero(self.volume_at)
+        first, last = lo, hi
+        if len(used):
+            first, last = min(first, self.base + used[0]), max(last, self.base + used[-1])
+        while last - first + 1 > size // 2:
+            size *= 2
+        grown = np.zeros(size, dtype=np.float64)
+        new_base = (first + last) // 2 - size // 2
+        if len(used):
+            grown[self.base + used - new_base] = self.volume_at[used]
+        self.volume_at, self.base = grown, new_base
+
+    def update(self, price, volume, session=None, refresh=True):
+        """Add one trade."""
+        self.update_bar(price, price, price, price, volume, session, refresh)
+
+    def update_bar(self, open, high, low, close, volume, session=None, refresh=True):
+        """Add one bar, spreading its volume evenly over the buckets it traded.
+
+        Pass refresh=False when folding in a batch and call refresh() after it.
+        """
+        if session is not None and session != self.session:
+            self.reset(session)
+        lo, hi = self._bucket(low), self._bucket(high)
+        self._make_room(lo, hi)
+        self.volume_at[lo - self.base:hi - self.base + 1] += volume / (hi - lo + 1)
+
+        if self.open is None:
+            self.open, self.high, self.low = open, high, low
+        self.high, self.low = max(self.high, high), min(self.low, low)
+        self.close = close
+        self.volume += volume
+        self.updates += 1
+        if refresh:
+            self.refresh()
+
+    def refresh(self):
+        """Re-derive POC / VAH / VAL from the histogram."""
+        hist = self.volume_at
+        peak = hist.max()
+        if peak <= 0:
+            return
+        traded = np.flatnonzero(hist)
+        first, last = traded[0], traded[-1]
+        # POC ties go to the bucket nearest the middle of the range
+        candidates = np.flatnonzero(hist == peak)
+        poc = candidates[np.argmin(np.abs(candidates - (first + last) / 2.0))]
+
+        # Narrowest contiguous band holding the target volume that contains the POC
+        cum = np.concatenate(([0.0], np.cumsum(hist)))
+        target = self.value_area_fraction * cum[-1]
+        starts = np.arange(first, poc + 1)
+        ends = np.searchsorted(cum, cum[starts] + target - 1e-9 * cum[-1])
+        ok = ends <= len(hist)
+        highs = np.maximum(ends - 1, poc)
+        best = np.argmin(np.where(ok, highs - starts, np.iinfo(np.int64).max))
+        self.poc = self._price(poc)
+        self.val = self._price(starts[best])
+        self.vah = self._price(highs[best])
+
+    def _price(self, index):
+        return round((self.base + int(index)) * self.tick, self.decimals)
+
+    @property
+    def avg_volume(self):
+        return self.volume / self.updates if self.updates else None
+
+    def histogram(self):
+        """(prices, volumes) over the traded range, lowest price first."""
+        traded = np.flatnonzero(self.volume_at)
+        if not len(traded):
+            return np.array([]), np.array([])
+        span = np.arange(traded[0], traded[-1] + 1)
+        return ((self.base + span) * self.tick).round(self.decimals), self.volume_at[span]
+
+    def snapshot(self):
+        return {
+            "Session": self.session, "Open": self.open, "High": self.high, "Low": self.low,
+            "Close": self.close, "Volume": self.volume, "Avg Volume": self.avg_volume,
+            "POC": self.poc, "VAH": self.vah, "VAL": self.val, "Updates": self.updates,
+        }
+
+
+class FeedTail:
+    """Reads rows appended to a CSV feed since the previous poll."""
+
+    def __init__(self, path=LIVE_FEED_FILE):
+        self.path = path
+        self.offset = 0
+        self.header = None
+        self.partial = b""
+
+    def read_new(self):
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        if os.path.getsize(self.path) < self.offset:
+            # Feed was rotated or truncated; start over
+            self.offset, self.header, self.partial = 0, None, b""
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        self.offset += len(chunk)
+        lines = (self.partial + chunk).split(b"\n")
+        self.partial = lines.pop()  # incomplete until its newline arrives
+        rows = [line.decode().strip() for line in lines if line.strip()]
+        if self.header is None and rows:
+            self.header = [c.strip() for c in rows.pop(0).split(",")]
+        if not rows:
+            return pd.DataFrame(columns=self.header or [])
+        return pd.DataFrame([r.split(",") for r in rows], columns=self.header)
+
+
+class LiveSession:
+    """A feed tail driving a LiveProfile; safe to share between page sessions."""
+
+    def __init__(self, path=LIVE_FEED_FILE, tick=LIVE_TICK):
+        self.feed = FeedTail(path)
+        self.profile = LiveProfile(tick)
+        self.lock = threading.Lock()
+
+    def poll(self):
+        """Fold newly appended feed rows into the profile; returns the row count."""
+        with self.lock:
+            rows = self.feed.read_new()
+            if rows.empty:
+                return 0
+            sessions = pd.to_datetime(rows["Datetime"]).dt.date.to_numpy()
+            volume = rows["Volume"].astype(float).to_numpy()
+            if "Price" in rows.columns:
+                price = rows["Price"].astype(float).to_numpy()
+                for p, v, s in zip(price, volume, sessions):
+                    self.profile.update(p, v, s, refresh=False)
+            else:
+                o, h, l, c = (rows[k].astype(float).to_numpy() for k in ("Open", "High", "Low", "Close"))
+                for i in range(len(rows)):
+                    self.profile.update_bar(o[i], h[i], l[i], c[i], volume[i], sessions[i], refresh=False)
+            self.profile.refresh()
+            return len(rows)
+
+    def snapshot(self):
+        with self.lock:
+            return self.profile.snapshot(), self.profile.histogram()
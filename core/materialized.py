@@ -0,0 +1,69 @@
+"""Storage for the materialized views built by core.ingest.
+
+Views are small precomputed tables under <data dir>/.views/, written as
+Parquet when pyarrow is available and CSV otherwise. state.json holds each
+ingest step's watermark so reruns only fold in new rows.
+"""
+import json
+import os
+
+import pandas as pd
+
+from core.data import DATA_DIR, pq
+
+VIEWS_DIRNAME = ".views"
+STATE_FILE = "state.json"
+
+
+def views_dir(data_dir=DATA_DIR):
+    return os.path.join(data_dir, VIEWS_DIRNAME)
+
+
+def view_path(name, data_dir=DATA_DIR):
+    return os.path.join(views_dir(data_dir), f"{name}.parquet" if pq else f"{name}.csv")
+
+
+def write_view(name, df, data_dir=DATA_DIR):
+    path = view_path(name, data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    if pq:
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def read_view(name, data_dir=DATA_DIR):
+    """The view as a DataFrame, or None if it hasn't been built."""
+    path = view_path(name, data_dir)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path) if pq else pd.read_csv(path)
+
+
+def view_mtime(name, data_dir=DATA_DIR):
+    path = view_path(name, data_dir)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def file_mtimes(paths):
+    """{file name: mtime} for the files in `paths` that exist; steps compare it to skip rebuilds."""
+    return {os.path.basename(p): os.path.getmtime(p) for p in paths if os.path.exists(p)}
+
+
+def load_state(data_dir=DATA_DIR):
+    path = os.path.join(views_dir(data_dir), STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, data_dir=DATA_DIR):
+    path = os.path.join(views_dir(data_dir), STATE_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
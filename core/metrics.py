@@ -0,0 +1,175 @@
+"""Prometheus-compatible metrics served from the Streamlit process.
+
+A small in-process registry rendered in the Prometheus text format on
+http://127.0.0.1:$QF_METRICS_PORT/metrics (default 9464, 0 disables).
+The server thread starts on the first page run in the process.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIVE_SESSION_TTL = 90  # seconds; Live Mode reruns every 30 s
+
+_lock = threading.Lock()
+_server = None
+_serve_attempted = False
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, _labels(self.label_names, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        with _lock:
+            self.values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, *labels, value):
+        with _lock:
+            counts, total, n = self.values.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[labels] = (counts, total + value, n + 1)
+
+    def samples(self):
+        for labels, (counts, total, n) in self.values.items():
+            for bound, count in zip(self.buckets, counts):
+                yield (f"{self.name}_bucket",
+                       _labels(self.label_names + ("le",), labels + (repr(bound),)), count)
+            yield f"{self.name}_bucket", _labels(self.label_names + ("le",), labels + ("+Inf",)), n
+            yield f"{self.name}_sum", _labels(self.label_names, labels), total
+            yield f"{self.name}_count", _labels(self.label_names, labels), n
+
+
+page_render_seconds = Histogram("qf_page_render_seconds", "Page script run time", ["page"])
+page_reruns_total = Counter("qf_page_reruns_total", "Page script runs", ["page"])
+data_load_seconds = Histogram("qf_data_load_seconds", "Time to read a data source from disk", ["source"])
+cache_entries = Gauge("qf_cache_data_entries", "st.cache_data entries per cached function", ["function"])
+cache_bytes = Gauge("qf_cache_data_bytes", "st.cache_data memory per cached function", ["function"])
+live_sessions = Gauge("qf_live_mode_sessions", "Sessions with Live Mode on")
+
+REGISTRY = [page_render_seconds, page_reruns_total, data_load_seconds,
+            cache_entries, cache_bytes, live_sessions]
+
+_live_seen = {}
+
+
+def mark_live(session_id, on):
+    with _lock:
+        if on:
+            _live_seen[session_id] = time.time()
+        else:
+            _live_seen.pop(session_id, None)
+
+
+def _collect_live_sessions():
+    cutoff = time.time() - LIVE_SESSION_TTL
+    with _lock:
+        for sid in [s for s, seen in _live_seen.items() if seen < cutoff]:
+            del _live_seen[sid]
+        count = len(_live_seen)
+    live_sessions.set(value=count)
+
+
+def _collect_cache_stats():
+    try:
+        from streamlit.runtime.caching import get_data_cache_stats_provider
+    except ImportError:
+        return
+    stats = get_data_cache_stats_provider().get_stats()
+    if isinstance(stats, dict):  # newer Streamlit groups stats by family
+        stats = [s for family in stats.values() for s in family]
+    entries, size = {}, {}
+    for stat in stats:
+        entries[stat.cache_name] = entries.get(stat.cache_name, 0) + 1
+        size[stat.cache_name] = size.get(stat.cache_name, 0) + stat.byte_length
+    with _lock:
+        cache_entries.values = {(k,): v for k, v in entries.items()}
+        cache_bytes.values = {(k,): v for k, v in size.items()}
+
+
+def render():
+    """The registry in Prometheus text exposition format."""
+    _collect_live_sessions()
+    _collect_cache_stats()
+    lines = []
+    with _lock:
+        for metric in REGISTRY:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=None, host="127.0.0.1"):
+    """Start the /metrics endpoint once per process; returns the server or None."""
+    global _server, _serve_attempted
+    if _serve_attempted:
+        return _server
+    with _lock:
+        if _serve_attempted:
+            return _server
+        _serve_attempted = True
+        port = int(os.environ.get("QF_METRICS_PORT", "9464") if port is None else port)
+        if port == 0:
+            return None
+        try:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            # Another worker on this host already owns the port
+            return None
+        threading.Thread(target=_server.serve_forever, name="qf-metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,419 @@
+"""Market-profile (TPO) engine: RawMetrics rows from intraday OHLCV bars.
+
+Bars are a DataFrame with Datetime, Open, High, Low, Close, Volume (e.g.
+30-minute bars); each calendar date is one session. For every session and
+every `Days` window (the N sessions ending on it) the engine builds a TPO
+histogram over price ticks - each bar adds one TPO to every tick between its
+Low and High - and derives the RawMetrics columns from it:
+
+    POC          tick with the most TPOs (ties go to the one nearest mid-range)
+    VAH / VAL    narrowest contiguous band around the POC holding 70% of TPOs
+    IB High/Low  range of the window's first IB_BARS bars
+    RE High/Low  range extension beyond the IB, in pips
+    RF           rotation factor: +/-1 per bar for higher/lower highs and lows
+    TPO Ab./Bl.  TPOs above / below the POC tick; Total TPO is all of them
+    Q1-Q4 TPO    TPOs per quarter of the window's range, Q1 on top
+    QC           quarter holding the close
+    VTY          TPOs per bar; Avg Volume is volume per bar
+
+TFF and SF come from the external batch and are left empty here; when an
+existing file is rewritten they are kept from its rows for the same Date
+and Days. The default output is data/.engine/RawMetrics.csv, next to (not
+over) the exported file.
+
+Each session's histogram is built once (np.bincount over a difference
+array) and kept in DailyProfiles; an N-day composite is a difference of
+prefix sums over days, so any window length - the six Days timeframes or
+ad-hoc ones like 7 or 30 - costs one subtraction per window. New sessions
+are folded into the stored daily histograms without touching older ones.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from core.data import ENGINE_DIR, KEY_COLUMNS, TIMEFRAMES
+
+RAW_METRICS_COLUMNS = [
+    "Date", "Days", "Open", "High", "Low", "Close", "POC", "VAH", "VAL", "IB High", "IB Low",
+    "RE High", "RE Low", "RF", "TPO Ab. POC", "TPO Bl. POC", "Total TPO", "Range (pips)",
+    "V.A Range", "IB Range", "Volume", "Avg Volume", "VTY", "TFF", "Close%R", "SF",
+    "Q1 TPO", "Q2 TPO", "Q3 TPO", "Q4 TPO", "QC",
+]
+EXTERNAL_COLUMNS = ["TFF", "SF"]  # not computed here
+VALUE_AREA = 0.70
+IB_BARS = 2  # first hour of 30-minute bars
+CHUNK_WINDOWS = 512
+EPS = 1e-9
+
+
+def tick_decimals(step):
+    return max(0, -Decimal(str(step)).as_tuple().exponent)
+
+
+def format_date(d):
+    return f"{d.month}/{d.day}/{d.year}"
+
+
+DAY_FIELDS = ["open", "high", "low", "close", "volume", "n_bars", "ib_high", "ib_low",
+              "rotation", "rotation_in", "last_high", "last_low"]
+
+
+class DailyProfiles:
+    """Per-session aggregates and TPO histograms, computed once per day.
+
+    Histograms are stored ragged: day d covers ticks base[d] .. base[d] +
+    widths[d] - 1 at counts[offsets[d]:offsets[d] + widths[d]]. Composites for
+    any window length are sums of consecutive days.
+    """
+
+    def __init__(self, tick, dates, day, base, widths, counts):
+        self.tick = tick
+        self.dates = pd.DatetimeIndex(dates)
+        self.day = day
+        self.base = np.asarray(base, dtype=np.int64)
+        self.widths = np.asarray(widths, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.widths)[:-1])).astype(np.int64)
+        self.counts = np.asarray(counts, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_bars(cls, bars, tick, ib_bars=IB_BARS, previous_bar=None):
+        """Build from bars; `previous_bar` is the (high, low) of the bar before them."""
+        bars = bars.sort_values("Datetime", kind="stable").reset_index(drop=True)
+        ts = pd.to_datetime(bars["Datetime"])
+        codes, dates = pd.factorize(ts.dt.normalize(), sort=True)
+        n_days = len(dates)
+        start = np.searchsorted(codes, np.arange(n_days), "left")
+        stop = np.searchsorted(codes, np.arange(n_days), "right")
+        high, low = bars["High"].to_numpy(np.float64), bars["Low"].to_numpy(np.float64)
+
+        grouped = bars.groupby(codes)
+        opening = grouped.cumcount().to_numpy() < ib_bars
+        ib = bars[opening].groupby(codes[opening])
+
+        # Rotation factor: +/-1 per bar for higher/lower highs and lows than the bar before
+        rotation = np.zeros(len(bars), dtype=np.int64)
+        rotation[1:] = np.sign(np.diff(high)).astype(np.int64) + np.sign(np.diff(low)).astype(np.int64)
+        if previous_bar is not None and len(bars):
+            rotation[0] = int(np.sign(high[0] - previous_bar[0]) + np.sign(low[0] - previous_bar[1]))
+
+        day = {
+            "open": grouped["Open"].first().to_numpy(np.float64),
+            "high": grouped["High"].max().to_numpy(np.float64),
+            "low": grouped["Low"].min().to_numpy(np.float64),
+            "close": grouped["Close"].last().to_numpy(np.float64),
+            "volume": grouped["Volume"].sum().to_numpy(np.float64),
+            "n_bars": (stop - start).astype(np.int64),
+            "ib_high": ib["High"].max().to_numpy(np.float64),
+            "ib_low": ib["Low"].min().to_numpy(np.float64),
+            "rotation": np.add.reduceat(rotation, start) - rotation[start],
+            "rotation_in": rotation[start],
+            "last_high": high[stop - 1],
+            "last_low": low[stop - 1],
+        }
+
+        lo = np.floor(low / tick + EPS).astype(np.int64)
+        hi = np.floor(high / tick + EPS).astype(np.int64)
+        base = np.minimum.reduceat(lo, start)
+        widths = np.maximum.reduceat(hi, start) - base + 1
+        # One spare slot per day keeps each day's difference array self-contained
+        segment = np.concatenate(([0], np.cumsum(widths + 1)[:-1]))
+        offset = segment[codes] - base[codes]
+        size = int(widths.sum() + n_days)
+        diff = (np.bincount(offset + lo, minlength=size)
+                - np.bincount(offset + hi + 1, minlength=size))
+        keep = np.ones(size, dtype=bool)
+        keep[segment + widths] = False
+        counts = np.cumsum(diff)[keep]
+        return cls(tick, dates, day, base, widths, counts)
+
+    def truncate(self, n_days):
+        """Keep the first `n_days` sessions."""
+        kept = int(self.offsets[n_days]) if n_days < len(self) else len(self.counts)
+        return DailyProfiles(self.tick, self.dates[:n_days], {k: v[:n_days] for k, v in self.day.items()},
+                             self.base[:n_days], self.widths[:n_days], self.counts[:kept])
+
+    def extend(self, bars, ib_bars=IB_BARS):
+        """Profiles with the sessions in `bars` from the last stored date on.
+
+        The last stored session is rebuilt too, since it may have been partial.
+        Returns (profiles, index of the first rebuilt session).
+        """
+        if not len(self):
+            return DailyProfiles.from_bars(bars, self.tick, ib_bars), 0
+        ts = pd.to_datetime(bars["Datetime"])
+        since = len(self) - 1
+        new = bars[(ts.dt.normalize() >= self.dates[since]).to_numpy()]
+        if new.empty:
+            return self, len(self)
+        kept = self.truncate(since)
+        previous = (kept.day["last_high"][-1], kept.day["last_low"][-1]) if since else None
+        added = DailyProfiles.from_bars(new, self.tick, ib_bars, previous)
+        return DailyProfiles(
+            self.tick, kept.dates.append(added.dates),
+            {k: np.concatenate((kept.day[k], added.day[k])) for k in DAY_FIELDS},
+            np.concatenate((kept.base, added.base)), np.concatenate((kept.widths, added.widths)),
+            np.concatenate((kept.counts, added.counts)),
+        ), since
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, tick=self.tick, dates=self.dates.values, base=self.base,
+                            widths=self.widths, counts=self.counts,
+                            **{f"day_{k}": v for k, v in self.day.items()})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(float(f["tick"]), f["dates"], {k: f[f"day_{k}"] for k in DAY_FIELDS},
+                       f["base"], f["widths"], f["counts"])
+
+    def composite(self, n, ends):
+        """TPO histograms of the `n`-session windows ending at each of `ends`.
+
+        Day histograms are laid on a common tick grid and prefix-summed, so
+        each window is one subtraction. Returns (base, hist): base[i] is the
+        tick index of hist[i, 0].
+        """
+        d0, d1 = int(ends[0]) - n + 1, int(ends[-1])
+        widths = self.widths[d0:d1 + 1]
+        lo = int(self.base[d0:d1 + 1].min())
+        width = int((self.base[d0:d1 + 1] + widths).max()) - lo
+
+        first, last = self.offsets[d0], self.offsets[d1] + self.widths[d1]
+        row = np.repeat(np.arange(1, d1 - d0 + 2), widths)
+        col = np.arange(first, last) - np.repeat(self.offsets[d0:d1 + 1] - self.base[d0:d1 + 1] + lo, widths)
+        prefix = np.zeros((d1 - d0 + 2, width), dtype=np.int32)
+        prefix[row, col] = self.counts[first:last]
+        np.cumsum(prefix, axis=0, out=prefix)
+
+        rows = np.asarray(ends) - d0 + 1
+        hist = prefix[rows] - prefix[rows - n]
+
+        # Re-base each window on its own low so later passes only scan its range
+        windows = np.lib.stride_tricks.sliding_window_view(np.arange(d0, d1 + 1), n)[rows - n]
+        window_lo = self.base[windows].min(axis=1)
+        window_width = int(((self.base + self.widths)[windows].max(axis=1) - window_lo).max())
+        cols = (window_lo - lo)[:, None] + np.arange(window_width)[None, :]
+        hist = np.take_along_axis(np.pad(hist, ((0, 0), (0, window_width))), cols, axis=1)
+        return window_lo, hist
+
+
+def _rolling(values, n, how):
+    return getattr(pd.Series(values).rolling(n), how)().to_numpy()
+
+
+def point_of_control(hist):
+    counts = hist.max(axis=1, keepdims=True)
+    traded = hist > 0
+    first = np.argmax(traded, axis=1)
+    last = hist.shape[1] - 1 - np.argmax(traded[:, ::-1], axis=1)
+    mid = (first + last) / 2.0
+    distance = np.abs(np.arange(hist.shape[1])[None, :] - mid[:, None])
+    distance[hist != counts] = np.inf
+    return np.argmin(distance, axis=1)
+
+
+def value_area(hist, poc, fraction=VALUE_AREA):
+    """Narrowest contiguous [lo, hi] around `poc` holding `fraction` of TPOs, per row."""
+    rows, width = hist.shape
+    cum = np.zeros((rows, width + 1), dtype=np.int64)
+    np.cumsum(hist, axis=1, out=cum[:, 1:])
+    target = np.ceil(fraction * cum[:, -1]).astype(np.int64)
+
+    # Rows are made globally increasing so one searchsorted answers every row
+    gap = int(cum[:, -1].max() + target.max()) + 1
+    row_offset = np.arange(rows, dtype=np.int64)[:, None] * gap
+    flat = (cum + row_offset).ravel()
+    lo = np.arange(width)[None, :]
+    end = np.searchsorted(flat, cum[:, :-1] + target[:, None] + row_offset) - np.arange(rows)[:, None] * (width + 1)
+    hi = np.maximum(end - 1, poc[:, None])
+    span = np.where((lo <= poc[:, None]) & (end <= width), hi - lo, np.iinfo(np.int64).max)
+    best = np.argmin(span, axis=1)
+    return best, hi[np.arange(rows), best]
+
+
+def quarter_tpos(hist, base, tick, high, low):
+    price = (base[:, None] + np.arange(hist.shape[1])[None, :]) * tick
+    quarter = (high - low) / 4.0
+    safe = np.where(quarter > 0, quarter, 1.0)
+    index = np.clip(np.floor((high[:, None] - price) / safe[:, None]), 0, 3).astype(np.int8)
+    return np.stack([(hist * (index == q)).sum(axis=1) for q in range(4)], axis=1)
+
+
+def timeframe_metrics(profiles, n, pip, ends_all=None, chunk=CHUNK_WINDOWS):
+    """RawMetrics columns for the n-session windows ending at `ends_all`
+    (default: every complete window), oldest first."""
+    if ends_all is None:
+        ends_all = np.arange(n - 1, len(profiles))
+    ends_all = np.asarray(ends_all, dtype=np.int64)
+    ends_all = ends_all[ends_all >= n - 1]
+    if len(ends_all) == 0:
+        return pd.DataFrame(columns=RAW_METRICS_COLUMNS)
+    tick, day = profiles.tick, profiles.day
+    first_all = ends_all - n + 1
+    high = _rolling(day["high"], n, "max")[ends_all]
+    low = _rolling(day["low"], n, "min")[ends_all]
+
+    parts = []
+    for i in range(0, len(ends_all), chunk):
+        ends = ends_all[i:i + chunk]
+        base, hist = profiles.composite(n, ends)
+        poc = point_of_control(hist)
+        val, vah = value_area(hist, poc)
+        cum = np.cumsum(hist, axis=1)
+        total = cum[:, -1]
+        rows = np.arange(len(ends))
+        below = np.where(poc > 0, cum[rows, poc - 1], 0)
+        above = total - cum[rows, poc]
+        parts.append(pd.DataFrame({
+            "POC": (base + poc) * tick,
+            "VAH": (base + vah) * tick,
+            "VAL": (base + val) * tick,
+            "TPO Ab. POC": above,
+            "TPO Bl. POC": below,
+            "Total TPO": total,
+            **dict(zip(["Q1 TPO", "Q2 TPO", "Q3 TPO", "Q4 TPO"],
+                       quarter_tpos(hist, base, tick, high[i:i + chunk], low[i:i + chunk]).T)),
+        }))
+    df = pd.concat(parts, ignore_index=True)
+
+    close = day["close"][ends_all]
+    ib_high, ib_low = day["ib_high"][first_all], day["ib_low"][first_all]
+    volume = _rolling(day["volume"], n, "sum")[ends_all]
+    n_bars = _rolling(day["n_bars"], n, "sum")[ends_all]
+    # Rotation inside each session plus the hand-offs between sessions in the window
+    rotation = _rolling(day["rotation"] + day["rotation_in"], n, "sum")[ends_all] - day["rotation_in"][first_all]
+    span = np.where(high > low, high - low, np.nan)
+    close_r = (high - close) / span * 100
+
+    df["Date"] = [format_date(d) for d in profiles.dates[ends_all]]
+    df["Days"] = n
+    df["Open"] = day["open"][first_all]
+    df["High"] = high
+    df["Low"] = low
+    df["Close"] = close
+    df["IB High"] = ib_high
+    df["IB Low"] = ib_low
+    df["RE High"] = np.maximum(high - ib_high, 0) / pip
+    df["RE Low"] = np.maximum(ib_low - low, 0) / pip
+    df["RF"] = rotation.astype(np.int64)
+    df["Range (pips)"] = (high - low) / pip
+    df["V.A Range"] = (df["VAH"] - df["VAL"]) / pip
+    df["IB Range"] = (ib_high - ib_low) / pip
+    df["Volume"] = volume
+    df["Avg Volume"] = volume / n_bars
+    df["VTY"] = df["Total TPO"] / n_bars
+    df["TFF"] = np.nan
+    df["Close%R"] = close_r
+    df["SF"] = np.nan
+    df["QC"] = np.select([close_r < 25, close_r < 50, close_r < 75], ["Q1", "Q2", "Q3"], "Q4")
+
+    # Undo float noise from tick arithmetic so the CSV matches the external batch
+    df[["POC", "VAH", "VAL"]] = df[["POC", "VAH", "VAL"]].round(tick_decimals(tick))
+    pips = ["RE High", "RE Low", "Range (pips)", "V.A Range", "IB Range"]
+    df[pips] = df[pips].round(1)
+    df["_end"] = ends_all
+    return df[RAW_METRICS_COLUMNS + ["_end"]]
+
+
+def raw_metrics(profiles, pip, timeframes=TIMEFRAMES, since=0):
+    """RawMetrics.csv rows for sessions from index `since` on: newest date
+    first, Days ascending. Any window length works, e.g. timeframes=[7, 30]."""
+    ends = np.arange(since, len(profiles))
+    df = pd.concat([timeframe_metrics(profiles, n, pip, ends) for n in timeframes], ignore_index=True)
+    df = df.sort_values(["_end", "Days"], ascending=[False, True], kind="stable")
+    return df.drop(columns="_end").reset_index(drop=True)
+
+
+def build_raw_metrics(bars, tick, pip=None, timeframes=TIMEFRAMES, ib_bars=IB_BARS):
+    """RawMetrics.csv rows for all sessions in `bars`."""
+    return raw_metrics(DailyProfiles.from_bars(bars, tick, ib_bars), pip or tick, timeframes)
+
+
+def load_bars(path):
+    bars = pd.read_csv(path)
+    if "Datetime" not in bars.columns and {"Date", "Time"} <= set(bars.columns):
+        bars["Datetime"] = bars["Date"].astype(str) + " " + bars["Time"].astype(str)
+    return bars
+
+
+def profiles_path(out_path):
+    return os.path.join(os.path.dirname(out_path), ".profiles", "daily_profiles.npz")
+
+
+def keep_external(df, existing):
+    """`df` with EXTERNAL_COLUMNS taken from the rows of `existing` with the same Date and Days."""
+    known = existing.drop_duplicates(KEY_COLUMNS).set_index(KEY_COLUMNS)[EXTERNAL_COLUMNS]
+    df[EXTERNAL_COLUMNS] = known.reindex(pd.MultiIndex.from_frame(df[KEY_COLUMNS])).to_numpy()
+    return df
+
+
+def update_market(bars_path, tick, pip, out_path, timeframes=TIMEFRAMES, full=False):
+    """Bring `out_path` up to date with the bars file; returns rows written.
+
+    Daily histograms are kept next to the output, so a run after a new
+    session only profiles that session and recomputes its windows.
+    """
+    pip = pip or tick
+    bars = load_bars(bars_path)
+    store = profiles_path(out_path)
+    if full or not os.path.exists(store) or not os.path.exists(out_path):
+        profiles, since = DailyProfiles.from_bars(bars, tick), 0
+    else:
+        profiles, since = DailyProfiles.load(store).extend(bars)
+    df = raw_metrics(profiles, pip, timeframes, since)
+    existing = pd.read_csv(out_path) if os.path.exists(out_path) else None
+    if existing is not None:
+        df = keep_external(df, existing)
+    if since:
+        # Replace only the (Date, Days) rows just scored, so other window lengths survive
+        rescored = pd.MultiIndex.from_frame(existing[KEY_COLUMNS]).isin(pd.MultiIndex.from_frame(df[KEY_COLUMNS]))
+        df = pd.concat([df, existing[~rescored]], ignore_index=True)
+        dates = pd.to_datetime(df["Date"], format="%m/%d/%Y")
+        df = df.iloc[np.lexsort((df["Days"].to_numpy(), -dates.to_numpy().astype(np.int64)))].reset_index(drop=True)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    df.to_csv(out_path, index=False)
+    profiles.save(store)
+    return len(df)
+
+
+def _build_market(args):
+    return update_market(*args)
+
+
+def backfill(jobs, max_workers=None):
+    """Build RawMetrics for several markets in parallel.
+
+    `jobs` maps market -> (bars_path, tick, pip, out_path); returns rows written.
+    """
+    markets = list(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        counts = pool.map(_build_market, [jobs[m] for m in markets])
+    return dict(zip(markets, counts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build RawMetrics.csv from intraday bars")
+    parser.add_argument("bars", help="CSV with Datetime, Open, High, Low, Close, Volume")
+    parser.add_argument("--tick", type=float, required=True, help="price increment per TPO row")
+    parser.add_argument("--pip", type=float, help="pip size for the (pips) columns (default: tick)")
+    parser.add_argument("--out", default=os.path.join(ENGINE_DIR, "RawMetrics.csv"))
+    parser.add_argument("--days", type=int, nargs="+", default=TIMEFRAMES,
+                        help="window lengths to compute (default: %(default)s)")
+    parser.add_argument("--full", action="store_true", help="rebuild instead of updating incrementally")
+    args = parser.parse_args(argv)
+    rows = update_market(args.bars, args.tick, args.pip, args.out, args.days, args.full)
+    print(f"Wrote {rows} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Opt-in per-rerun profiling for the page scripts.
+
+Enable with QF_PROFILE=1 in the server environment or ?profile=1 in the URL.
+When disabled every hook is a no-op on a shared null profiler, so pages can
+stay instrumented in production.
+
+    prof = profiling.start("Heatmap")
+    ...load...
+    prof.lap("load")
+    st.plotly_chart(prof.sized("heatmap", fig))
+    prof.finish()
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+
+from core import metrics
+
+logger = logging.getLogger("quantiveflow.profile")
+HISTORY_KEY = "_profile_runs"
+HISTORY_SIZE = 20
+
+_local = threading.local()
+
+
+def enabled():
+    if os.environ.get("QF_PROFILE", "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return st.query_params.get("profile") == "1"
+    except Exception:
+        return False
+
+
+class NullProfiler:
+    enabled = False
+
+    def lap(self, stage):
+        pass
+
+    def sized(self, name, obj):
+        return obj
+
+    def finish(self):
+        _observe_page()
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.stages = {}
+        self.cache = []
+        self.elements = []
+
+    def lap(self, stage):
+        # Time since the previous lap is charged to `stage`
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+    def record_cache(self, name, hit, seconds):
+        self.cache.append({"name": name, "hit": hit, "ms": round(seconds * 1000, 3)})
+
+    def sized(self, name, obj):
+        start = time.perf_counter()
+        self.elements.append({"name": name, "bytes": payload_bytes(obj)})
+        # Sizing is profiler overhead, keep it out of the page's stages
+        self.last += time.perf_counter() - start
+        return obj
+
+    def record(self):
+        total = time.perf_counter() - self.started
+        return {
+            "page": self.page,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_ms": round(total * 1000, 3),
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            "cache_hits": sum(1 for c in self.cache if c["hit"]),
+            "cache_misses": sum(1 for c in self.cache if not c["hit"]),
+            "cache": self.cache,
+            "elements": self.elements,
+        }
+
+    def finish(self):
+        self.lap("render")
+        _observe_page()
+        _local.profiler = None
+        record = self.record()
+        logger.info(json.dumps(record))
+        history = st.session_state.setdefault(HISTORY_KEY, [])
+        history.append(record)
+        del history[:-HISTORY_SIZE]
+        render_panel(record, history)
+        return record
+
+
+def _observe_page():
+    page = getattr(_local, "page", None)
+    if page is not None:
+        metrics.page_render_seconds.observe(page[0], value=time.perf_counter() - page[1])
+        _local.page = None
+
+
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def start(page):
+    # Render latency and rerun counts are always exported; the rest is opt-in
+    metrics.serve()
+    from core import api, push  # both import core.sources, which needs this module loaded
+    api.serve()
+    push.serve()
+    metrics.page_reruns_total.inc(page)
+    _local.page = (page, time.perf_counter())
+    if not enabled():
+        _local.profiler = None
+        return NULL_PROFILER
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+    _local.profiler = Profiler(page)
+    return _local.profiler
+
+
+def payload_bytes(obj):
+    """Approximate size of what Streamlit sends to the browser for `obj`."""
+    if hasattr(obj, "to_plotly_json"):
+        return len(obj.to_json())
+    data = getattr(obj, "data", obj)  # pandas Styler wraps the frame
+    if hasattr(data, "memory_usage"):
+        try:
+            import pyarrow as pa
+            return pa.Table.from_pandas(data).nbytes
+        except ImportError:
+            return int(data.memory_usage(deep=True).sum())
+    return len(str(obj).encode())
+
+
+def cache_data(fn=None, **kwargs):
+    """st.cache_data that also reports hit/miss to the active profiler."""
+    if fn is None:
+        return functools.partial(cache_data, **kwargs)
+
+    @functools.wraps(fn)
+    def compute(*args, **kw):
+        # Only runs on a cache miss
+        _local.missed = True
+        return fn(*args, **kw)
+
+    cached = st.cache_data(compute, **kwargs)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kw):
+        profiler = getattr(_local, "profiler", None)
+        if profiler is None:
+            return cached(*args, **kw)
+        _local.missed = False
+        start = time.perf_counter()
+        result = cached(*args, **kw)
+        label = f"{fn.__name__}({', '.join(str(a) for a in args)})"
+        profiler.record_cache(label, not _local.missed, time.perf_counter() - start)
+        return result
+
+    wrapper.clear = cached.clear
+    return wrapper
+
+
+def render_panel(record, history):
+    with st.sidebar.expander("⏱️ Profiler", expanded=True):
+        st.caption(f"{record['page']} · {record['total_ms']:.1f} ms total")
+        st.dataframe(
+            [{"Stage": k, "ms": v} for k, v in sorted(record["stages_ms"].items(), key=lambda kv: -kv[1])],
+            hide_index=True, use_container_width=True
+        )
+        st.caption(f"Cache: {record['cache_hits']} hit / {record['cache_misses']} miss")
+        if record["cache"]:
+            st.dataframe(record["cache"], hide_index=True, use_container_width=True)
+        if record["elements"]:
+            st.dataframe(record["elements"], hide_index=True, use_container_width=True)
+        st.line_chart([r["total_ms"] for r in history if r["page"] == record["page"]])
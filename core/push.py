@@ -0,0 +1,211 @@
+"""Push channel for newly ingested rows and Z-Score threshold crossings.
+
+One Watcher per process checks the mtimes of every market's sources every
+POLL_INTERVAL seconds. When a file changes, it reads the file through
+core.sources (a cache hit if a page or the API already has it) and turns
+the dates newer than the last poll into events:
+
+    {"type": "rows", "market": "GBPJPY", "source": "5tf Z-Score",
+     "columns": [...], "data": [[...], ...]}
+    {"type": "alert", "market": "GBPJPY", "tf": "5TF", "date": "6/13/2025",
+     "metric": "RF", "z": 2.61}
+
+An alert is a metric moving to |z| >= QF_PUSH_THRESHOLD (default 2.0) from
+under it on the previous row. Events go out once, to every subscriber on
+ws://127.0.0.1:$QF_PUSH_PORT/ (default 9466, 0 disables). Subscribers are
+idle asyncio connections. A subscriber narrows what it receives by sending
+{"markets": [...], "types": ["rows", "alert"]}.
+
+Pages use wait() rather than a subscription, so Live Mode reruns when
+something arrives instead of on a timer. Only one process on a host can
+bind the port; the others run a Watcher of their own without a server, so
+wait() wakes in every Streamlit worker. With QF_PUSH_PORT=0 nothing runs
+and wait() just sleeps out its timeout.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+from websockets.asyncio import server as websocket_server
+
+from core.data import NET_TABLE_FILES, ZSCORE_FILES, market_dirs, market_file, metric_names
+from core.diffs import SOURCES
+from core.sources import load_source, mtime
+
+logger = logging.getLogger("quantiveflow.push")
+POLL_INTERVAL = 2.0  # seconds between mtime checks
+THRESHOLD = float(os.environ.get("QF_PUSH_THRESHOLD", "2.0"))
+EVENT_TYPES = ("rows", "alert")
+
+_lock = threading.Lock()
+_serve_attempted = False
+_hub = None
+_changed = threading.Condition()
+_version = 0
+
+
+def _dates(values):
+    return pd.to_datetime(pd.Series(np.asarray(values)), format="%m/%d/%Y").to_numpy()
+
+
+class Watcher:
+    def __init__(self, data_dirs=None, threshold=THRESHOLD):
+        self.data_dirs = data_dirs if data_dirs is not None else market_dirs()
+        self.threshold = threshold
+        self.seen = {}  # path -> (mtime, newest date)
+        timeframes = {os.path.basename(p): tf for files in (ZSCORE_FILES, NET_TABLE_FILES) for tf, p in files.items()}
+        self.sources = [(market, source, timeframes.get(os.path.basename(p)), market_file(data_dir, p))
+                        for market, data_dir in self.data_dirs.items()
+                        for source, paths in SOURCES.items() for p in paths]
+
+    def poll(self):
+        """Events for rows added since the last poll; the first poll only records where each file is.
+
+        `seen` is only replaced once every file has been handled, so a poll that
+        raises part-way leaves it as it was and the next poll reports the same rows.
+        """
+        events = []
+        seen = dict(self.seen)
+        for market, source, tf, path in self.sources:
+            modified = mtime(path)
+            previous = seen.get(path)
+            if modified is None or (previous is not None and previous[0] == modified):
+                continue
+            try:
+                df = load_source(path)
+                dates = _dates(df["Date"])
+            except (OSError, ValueError):
+                continue  # caught mid-write; the mtime is not recorded, so the next poll retries
+            seen[path] = (modified, dates[0] if len(dates) else None)
+            if previous is None or previous[1] is None:
+                continue
+            fresh = int((dates > previous[1]).sum())  # newest first, so the first `fresh` rows
+            if not fresh:
+                continue
+            new = df.head(fresh).iloc[::-1]
+            events.append({"type": "rows", "market": market,
+                           "source": os.path.splitext(os.path.basename(path))[0],
+                           **json.loads(new.to_json(orient="split", index=False))})
+            if source == "Z-Score":
+                events.extend(self.crossings(market, tf, df.head(fresh + 1).iloc[::-1], metric_names(path)))
+        self.seen = seen
+        return events
+
+    def crossings(self, market, tf, rows, metrics):
+        """Alerts for `rows` (oldest first, the first one already seen) moving beyond the threshold."""
+        z = rows[metrics].to_numpy(np.float64)
+        with np.errstate(invalid="ignore"):
+            beyond = np.abs(z) >= self.threshold
+        start = 1 if len(rows) > 1 else 0
+        previous = beyond[start - 1:-1] if start else np.zeros_like(beyond)
+        days, columns = np.nonzero(beyond[start:] & ~previous)
+        return [{"type": "alert", "market": market, "tf": tf, "date": rows["Date"].iloc[start + d],
+                 "metric": metrics[c], "z": round(float(z[start + d, c]), 3)} for d, c in zip(days, columns)]
+
+
+def _subscription(message):
+    request = json.loads(message)
+    if not isinstance(request, dict):
+        raise ValueError("subscription must be a JSON object")
+    unknown = set(request.get("types", [])) - set(EVENT_TYPES)
+    if unknown:
+        raise ValueError(f"unknown event types {sorted(unknown)}; expected {list(EVENT_TYPES)}")
+    return {k: set(request[k]) for k in ("markets", "types") if k in request}
+
+
+def _wants(subscription, event):
+    return (event["market"] in subscription.get("markets", [event["market"]])
+            and event["type"] in subscription.get("types", [event["type"]]))
+
+
+class Hub:
+    def __init__(self, watcher):
+        self.watcher = watcher
+        self.subscribers = {}  # connection -> subscription
+
+    async def handler(self, connection):
+        self.subscribers[connection] = {}
+        try:
+            await connection.send(json.dumps({"type": "hello", "markets": list(self.watcher.data_dirs),
+                                              "threshold": self.watcher.threshold}))
+            async for message in connection:
+                try:
+                    self.subscribers[connection] = _subscription(message)
+                except ValueError as e:
+                    await connection.send(json.dumps({"type": "error", "error": str(e)}))
+        finally:
+            del self.subscribers[connection]
+
+    def publish(self, events):
+        for event in events:
+            # Encoded once per event; broadcast skips subscribers that are not keeping up
+            subscribers = [c for c, s in self.subscribers.items() if _wants(s, event)]
+            websocket_server.broadcast(subscribers, json.dumps(event))
+
+    async def watch(self):
+        while True:
+            try:
+                events = await asyncio.to_thread(self.watcher.poll)
+            except Exception:
+                logger.exception("push watcher poll failed")
+                events = []
+            if events:
+                self.publish(events)
+                _notify()
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+def _notify():
+    global _version
+    with _changed:
+        _version += 1
+        _changed.notify_all()
+
+
+def version():
+    """Counter bumped whenever the watcher publishes events."""
+    return _version
+
+
+def wait(since, timeout):
+    """Block until version() moves past `since` or `timeout` seconds pass; True if it moved."""
+    with _changed:
+        return _changed.wait_for(lambda: _version != since, timeout)
+
+
+async def _run(hub, sock):
+    if sock is None:
+        await hub.watch()  # no subscribers here; only wakes this process's wait()
+        return
+    async with websocket_server.serve(hub.handler, sock=sock):
+        await hub.watch()
+
+
+def serve(port=None, host="127.0.0.1"):
+    """Start the watcher, and the WebSocket server if the port is free, once per process.
+
+    Returns the Hub, or None when disabled.
+    """
+    global _hub, _serve_attempted
+    if _serve_attempted:
+        return _hub
+    with _lock:
+        if _serve_attempted:
+            return _hub
+        _serve_attempted = True
+        port = int(os.environ.get("QF_PUSH_PORT", "9466") if port is None else port)
+        if port == 0:
+            return None
+        try:
+            sock = socket.create_server((host, port))
+        except OSError:
+            # Another worker on this host already owns the port; still watch for wait()
+            sock = None
+        _hub = Hub(Watcher())
+        threading.Thread(target=asyncio.run, args=(_run(_hub, sock),), name="qf-push", daemon=True).start()
+    return _hub
@@ -0,0 +1,60 @@
+"""Percentile ranks of metric values against their own history.
+
+PercentileIndex keeps one sorted array per (Days, metric); the empirical
+CDF at any value is a searchsorted away. Appended days are merged into the
+sorted arrays in place of a re-sort, and rows already indexed are skipped,
+so the index can be refreshed on every page run.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+YEAR_DAYS = 252
+
+
+class PercentileIndex:
+    def __init__(self):
+        self.sorted = {}  # (days, metric) -> sorted values
+        self.seen = {}  # (days, metric) -> dates already merged
+        self.lock = threading.Lock()
+
+    def update(self, raw_df):
+        """Merge rows of `raw_df` (Date, Days, metrics...) not indexed yet; returns values added."""
+        metrics = [c for c in raw_df.columns
+                   if c not in ("Date", "Days") and pd.api.types.is_numeric_dtype(raw_df[c])]
+        added = 0
+        with self.lock:
+            for days, group in raw_df.groupby("Days"):
+                for metric in metrics:
+                    key = (days, metric)
+                    seen = self.seen.setdefault(key, set())
+                    fresh = group[~group["Date"].isin(seen)]
+                    if fresh.empty:
+                        continue
+                    values = np.sort(fresh[metric].dropna().to_numpy(np.float64))
+                    current = self.sorted.get(key, np.empty(0))
+                    self.sorted[key] = np.insert(current, np.searchsorted(current, values), values)
+                    seen.update(fresh["Date"])
+                    added += len(values)
+        return added
+
+    def percentile(self, days, metric, values):
+        """Share of history (in %) at or below each of `values`; NaN if not indexed."""
+        history = self.sorted.get((days, metric))
+        values = np.asarray(values, dtype=np.float64)
+        if history is None or not len(history):
+            return np.full(values.shape, np.nan)[()]
+        ranks = np.searchsorted(history, values, side="right") / len(history) * 100
+        return np.where(np.isnan(values), np.nan, ranks)[()]
+
+
+def rolling_percentile(values, window=YEAR_DAYS):
+    """Percentile of each value within the trailing `window` values (oldest first)."""
+    values = np.asarray(values, dtype=np.float64)
+    padded = np.concatenate((np.full(window - 1, np.nan), values))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    below = (windows <= values[:, None]).sum(axis=1)
+    count = (~np.isnan(windows)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(np.isnan(values), np.nan, below / count * 100)
@@ -0,0 +1,171 @@
+"""Market states: days clustered by their Z-Score profile.
+
+Mini-batch k-means (k-means++ seeding, per-center learning rates) in
+NumPy groups each timeframe's Z-Score vectors into N_STATES discrete
+states. The fitted model is saved per market (data directory) and
+timeframe under data/.models/; dates newer than the fit are assigned to
+the nearest center without refitting.
+
+Fitting runs in a background thread (or from the CLI) so page renders only
+ever load a model and assign labels:
+
+    python -m core.regimes --tf 1TF 3TF
+"""
+import argparse
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.data import DATA_DIR, KEY_COLUMNS, ZSCORE_FILES, load_table
+
+N_STATES = 6
+BATCH_SIZE = 256
+ITERATIONS = 300
+MODEL_DIR = os.path.join(DATA_DIR, ".models")
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def model_path(tf, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, f"states_{tf}.npz")
+
+
+def features(zscore_df):
+    """Z-Score frame -> (dates, float32 matrix, columns); missing values count as 0."""
+    df = zscore_df.set_index("Date") if "Date" in zscore_df.columns else zscore_df
+    df = df[[c for c in df.columns if c not in KEY_COLUMNS and not str(c).startswith("Unnamed")]]
+    return df.index.to_numpy(), np.nan_to_num(df.to_numpy(np.float32)), list(df.columns)
+
+
+def squared_distances(x, centers):
+    return (np.einsum("ij,ij->i", x, x)[:, None] - 2.0 * (x @ centers.T)
+            + np.einsum("ij,ij->i", centers, centers)[None, :])
+
+
+def assign(x, centers):
+    return np.argmin(squared_distances(x, centers), axis=1)
+
+
+def kmeans_plus_plus(x, k, rng):
+    centers = [x[rng.integers(len(x))]]
+    closest = squared_distances(x, centers[0][None, :])[:, 0]
+    for _ in range(1, k):
+        weights = np.maximum(closest, 0)
+        pick = rng.choice(len(x), p=weights / weights.sum()) if weights.sum() > 0 else rng.integers(len(x))
+        centers.append(x[pick])
+        closest = np.minimum(closest, squared_distances(x, x[pick][None, :])[:, 0])
+    return np.array(centers, dtype=np.float32)
+
+
+def fit_minibatch_kmeans(x, k=N_STATES, batch_size=BATCH_SIZE, iterations=ITERATIONS, seed=0):
+    """Cluster centers for the rows of `x` (Sculley's mini-batch k-means)."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centers = kmeans_plus_plus(x, k, rng)
+    counts = np.zeros(k, dtype=np.int64)
+    for _ in range(iterations):
+        batch = x[rng.integers(len(x), size=min(batch_size, len(x)))]
+        nearest = assign(batch, centers)
+        # Each center moves toward its batch mean with rate (batch hits) / (all-time hits)
+        hits = np.bincount(nearest, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, nearest, batch)
+        counts += hits
+        moved = hits > 0
+        rate = hits[moved] / counts[moved]
+        centers[moved] += rate[:, None] * (sums[moved] / hits[moved][:, None] - centers[moved])
+    # Order states by how stretched their profile is, so labels stay comparable between refits
+    order = np.argsort(np.linalg.norm(centers, axis=1), kind="stable")
+    return centers[order]
+
+
+class StateModel:
+    def __init__(self, centers, columns, dates, labels):
+        self.centers = np.asarray(centers, dtype=np.float32)
+        self.columns = list(columns)
+        self.dates = np.asarray(dates)
+        self.labels = np.asarray(labels, dtype=np.int64)
+
+    @classmethod
+    def fit(cls, zscore_df, k=N_STATES, seed=0):
+        dates, x, columns = features(zscore_df)
+        centers = fit_minibatch_kmeans(x, k, seed=seed)
+        return cls(centers, columns, dates, assign(x, centers))
+
+    def timeline(self, zscore_df):
+        """Date / State for every row of `zscore_df`; dates unseen at fit time
+        are assigned to the nearest center."""
+        dates, x, columns = features(zscore_df)
+        known = dict(zip(self.dates, self.labels))
+        labels = np.array([known.get(d, -1) for d in dates], dtype=np.int64)
+        new = labels < 0
+        if new.any():
+            x = x[:, [columns.index(c) for c in self.columns]]
+            labels[new] = assign(x[new], self.centers)
+        return pd.DataFrame({"Date": dates, "State": labels})
+
+    def describe(self, timeline, top=3):
+        """One row per state: its share of days and the metrics that define it."""
+        shares = timeline["State"].value_counts(normalize=True)
+        rows = []
+        for state, center in enumerate(self.centers):
+            strongest = np.argsort(-np.abs(center))[:top]
+            rows.append({
+                "State": state,
+                "Days": int((timeline["State"] == state).sum()),
+                "Share": f"{shares.get(state, 0) * 100:.1f}%",
+                "Profile": ", ".join(f"{self.columns[i]} {center[i]:+.2f}" for i in strongest),
+            })
+        return pd.DataFrame(rows)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, centers=self.centers, columns=np.array(self.columns),
+                            dates=self.dates.astype(str), labels=self.labels)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f["centers"], f["columns"].tolist(), f["dates"], f["labels"])
+
+
+def refit(zscore_file, path, k=N_STATES):
+    model = StateModel.fit(load_table(zscore_file), k)
+    model.save(path)
+    return model
+
+
+def refit_in_background(zscore_file, path, k=N_STATES):
+    """Start a refit thread for `path` unless one is already running."""
+    with _jobs_lock:
+        job = _jobs.get(path)
+        if job is None or not job.is_alive():
+            job = threading.Thread(target=refit, args=(zscore_file, path, k), daemon=True,
+                                   name=f"qf-states-{os.path.basename(path)}")
+            _jobs[path] = job
+            job.start()
+        return job
+
+
+def refitting(path):
+    job = _jobs.get(path)
+    return job is not None and job.is_alive()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit market-state models from the Z-Score files")
+    parser.add_argument("--tf", nargs="+", default=list(ZSCORE_FILES), help="timeframes to fit")
+    parser.add_argument("--states", type=int, default=N_STATES)
+    args = parser.parse_args(argv)
+    for tf in args.tf:
+        model = refit(ZSCORE_FILES[tf], model_path(tf), args.states)
+        print(f"{tf}: {len(model.dates)} days -> {len(model.centers)} states, saved to {model_path(tf)}")
+
+
+if __name__ == "__main__":
+    main()
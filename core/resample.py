@@ -0,0 +1,124 @@
+"""Weekly, monthly and quarterly levels over the daily rows of each Days group.
+
+ResamplePyramid aggregates each (Days, metric) series into calendar buckets
+once and keeps the result. Price columns aggregate as OHLC (first Open,
+highest High, lowest Low, last Close), so a weekly candle is the week's
+candle; every other metric is the bucket mean. Buckets are labelled with
+their last trading date, which lines up with the daily rows (and the
+indicator cache) on that date.
+
+When days are appended only the buckets from the first new day onward are
+re-aggregated, and a range ending mid-bucket (an as-of date) gets that
+partial bucket from the daily rows up to its end, never from later days.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+LEVELS = {"Daily": None, "Weekly": "W", "Monthly": "M", "Quarterly": "Q"}
+LEVEL_DAYS = {"Daily": 1, "Weekly": 5, "Monthly": 21, "Quarterly": 63}  # trading days per bucket
+AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last"}
+MAX_POINTS = 260  # auto_level keeps a chart at or under this many bars
+
+
+def auto_level(n_days):
+    """The finest level that shows `n_days` trading days in at most MAX_POINTS bars."""
+    for level, days in LEVEL_DAYS.items():
+        if n_days / days <= MAX_POINTS:
+            return level
+    return list(LEVELS)[-1]
+
+
+def bucket_keys(dates, level):
+    """datetime64[D] start of the `level` bucket holding each date."""
+    return (pd.DatetimeIndex(dates).to_period(LEVELS[level]).start_time
+            .to_numpy().astype("datetime64[D]"))
+
+
+def aggregate(dates, values, level, how="mean"):
+    """(bucket keys, last date per bucket, aggregated values) for dates in ascending order."""
+    keys = bucket_keys(dates, level)
+    frame = pd.DataFrame({"Key": keys, "Date": dates, "Value": values})
+    grouped = frame.groupby("Key", sort=False)
+    return (grouped["Key"].first().to_numpy(), grouped["Date"].last().to_numpy(),
+            grouped["Value"].agg(how).to_numpy(np.float64))
+
+
+class ResamplePyramid:
+    def __init__(self):
+        self.dates = {}  # (days, metric) -> datetime64[D], oldest first
+        self.values = {}  # (days, metric) -> float64 values
+        self.levels = {}  # (days, metric, level) -> (keys, dates, values)
+        self.lock = threading.Lock()
+
+    def update(self, raw_df):
+        """Append days of `raw_df` (Date, Days, metrics...) newer than each series; returns rows added."""
+        metrics = [c for c in raw_df.columns
+                   if c not in ("Date", "Days") and pd.api.types.is_numeric_dtype(raw_df[c])]
+        added = 0
+        with self.lock:
+            for days, group in raw_df.groupby("Days"):
+                dates = pd.to_datetime(group["Date"]).to_numpy().astype("datetime64[D]")
+                order = np.argsort(dates, kind="stable")
+                dates = dates[order]
+                for metric in metrics:
+                    key = (days, metric)
+                    known = self.dates.get(key)
+                    fresh = dates > known[-1] if known is not None and len(known) else np.ones(len(dates), bool)
+                    if not fresh.any():
+                        continue
+                    new = group[metric].to_numpy(np.float64)[order][fresh]
+                    self.dates[key] = np.concatenate((known, dates[fresh])) if known is not None else dates[fresh]
+                    self.values[key] = np.concatenate((self.values[key], new)) if known is not None else new
+                    self._extend(key, dates[fresh][0])
+                    added += len(new)
+        return added
+
+    def _extend(self, key, first_new):
+        dates, values = self.dates[key], self.values[key]
+        for (days, metric, level), (keys, labels, aggregated) in list(self.levels.items()):
+            if (days, metric) != key:
+                continue
+            # Everything before the bucket of the first new day is final
+            start = bucket_keys([first_new], level)[0]
+            kept = np.searchsorted(keys, start)
+            rows = np.searchsorted(dates, start)
+            tail = aggregate(dates[rows:], values[rows:], level, AGGREGATIONS.get(metric, "mean"))
+            self.levels[(days, metric, level)] = tuple(np.concatenate((old[:kept], new))
+                                                       for old, new in zip((keys, labels, aggregated), tail))
+
+    def level(self, days, metric, level):
+        """(keys, dates, values) of `metric` at `level` over the full history; built once per key."""
+        key = (days, metric, level)
+        with self.lock:
+            if key not in self.levels:
+                dates = self.dates.get((days, metric), np.empty(0, "datetime64[D]"))
+                self.levels[key] = aggregate(dates, self.values.get((days, metric), np.empty(0)), level,
+                                             AGGREGATIONS.get(metric, "mean"))
+            return self.levels[key]
+
+    def frame(self, days, metrics, level, start, end):
+        """Date + `metrics` at `level` for the buckets overlapping [start, end], oldest first."""
+        start, end = np.datetime64(pd.Timestamp(start), "D"), np.datetime64(pd.Timestamp(end), "D")
+        columns = {"Date": np.empty(0, "datetime64[D]")}
+        for metric in metrics:
+            dates = self.dates.get((days, metric), np.empty(0, "datetime64[D]"))
+            values = self.values.get((days, metric), np.empty(0))
+            if LEVELS[level] is None:
+                rows = slice(np.searchsorted(dates, start), np.searchsorted(dates, end, side="right"))
+                columns["Date"], columns[metric] = dates[rows], values[rows]
+                continue
+            first, last = bucket_keys([start, end], level)
+            keys, labels, aggregated = self.level(days, metric, level)
+            buckets = slice(np.searchsorted(keys, first), np.searchsorted(keys, last, side="right"))
+            labels, aggregated = labels[buckets], aggregated[buckets]
+            if len(labels) and labels[-1] > end:
+                # The range ends inside this bucket: aggregate only its days up to `end`
+                rows = slice(np.searchsorted(dates, last), np.searchsorted(dates, end, side="right"))
+                _, label, partial = aggregate(dates[rows], values[rows], level, AGGREGATIONS.get(metric, "mean"))
+                labels = np.concatenate((labels[:-1], label))
+                aggregated = np.concatenate((aggregated[:-1], partial))
+            columns["Date"], columns[metric] = labels, aggregated
+        columns["Date"] = pd.to_datetime(columns["Date"])
+        return pd.DataFrame(columns)
@@ -0,0 +1,137 @@
+"""Seasonality: RawMetrics and Net flow broken down by calendar bucket.
+
+Every (source, Days, metric) is summarized per weekday, month and session of
+month (the n-th trading day of its month) as count / mean / M2 running
+moments. They are built at ingest and merged with the moments of newly
+appended dates (Chan et al.'s pairwise update), so a daily run touches only
+the new rows and a query is a lookup in a table of a few thousand rows,
+whatever the length of the history.
+
+Dates at or before the watermark are treated as final; use --full after
+rewriting history.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from core import materialized
+from core.data import DATA_DIR, KEY_COLUMNS, NET_TABLE_FILES, RAW_METRICS_FILE, load_table
+
+VIEW = "seasonality"
+DIMENSIONS = ["Weekday", "Month", "Session of Month"]
+KEYS = ["Source", "Days", "Dimension", "Bucket", "Metric"]
+WEEKDAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+CONFIDENCE_Z = 1.96
+
+
+def sources(data_dir=DATA_DIR):
+    """{source: [csv paths]} for a data directory."""
+    return {
+        "RawMetrics": [os.path.join(data_dir, os.path.basename(RAW_METRICS_FILE))],
+        "Net Table": [os.path.join(data_dir, os.path.basename(p)) for p in NET_TABLE_FILES.values()],
+    }
+
+
+def calendar_buckets(dates):
+    """{dimension: bucket number} for a Series of datetimes (any order)."""
+    unique = pd.Series(np.sort(dates.unique()))
+    session = unique.groupby(unique.dt.to_period("M")).cumcount() + 1
+    return {
+        "Weekday": dates.dt.dayofweek.to_numpy(),
+        "Month": dates.dt.month.to_numpy(),
+        "Session of Month": pd.Series(session.to_numpy(), index=unique).reindex(dates).to_numpy(),
+    }
+
+
+def moments(df, source, dates, buckets):
+    """Count / Mean / M2 per KEYS for the numeric metrics of `df`."""
+    metrics = [c for c in df.columns if c not in KEY_COLUMNS and pd.api.types.is_numeric_dtype(df[c])]
+    long = df[["Days"] + metrics].assign(_row=np.arange(len(df))).melt(
+        id_vars=["Days", "_row"], var_name="Metric", value_name="Value").dropna(subset=["Value"])
+    frames = []
+    for dimension in DIMENSIONS:
+        grouped = long.assign(Bucket=buckets[dimension][long["_row"].to_numpy()]).groupby(
+            ["Days", "Bucket", "Metric"])["Value"]
+        stats = grouped.agg(["count", "mean"]).set_axis(["Count", "Mean"], axis=1)
+        stats["M2"] = grouped.var(ddof=0) * stats["Count"]
+        frames.append(stats.reset_index().assign(Dimension=dimension))
+    out = pd.concat(frames, ignore_index=True).assign(Source=source)
+    return out[KEYS + ["Count", "Mean", "M2"]]
+
+
+def merge_moments(a, b):
+    """Combine two moment tables keyed by KEYS."""
+    if a is None or a.empty:
+        return b
+    joined = a.merge(b, on=KEYS, how="outer", suffixes=("_a", "_b"))
+    na, nb = joined["Count_a"].fillna(0), joined["Count_b"].fillna(0)
+    ma, mb = joined["Mean_a"].fillna(0), joined["Mean_b"].fillna(0)
+    n = na + nb
+    delta = mb - ma
+    joined["Count"] = n.astype(np.int64)
+    joined["Mean"] = ma + delta * nb / n
+    joined["M2"] = joined["M2_a"].fillna(0) + joined["M2_b"].fillna(0) + delta ** 2 * na * nb / n
+    return joined[KEYS + ["Count", "Mean", "M2"]]
+
+
+def ingest(data_dir=DATA_DIR, state=None):
+    """Fold dates newer than each file's watermark into the view; returns the new state."""
+    state = dict(state or {})
+    view = materialized.read_view(VIEW, data_dir) if state else None
+    fresh = []
+    for source, paths in sources(data_dir).items():
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            name = os.path.basename(path)
+            df = load_table(path)
+            dates = pd.to_datetime(df["Date"], format="%m/%d/%Y")
+            new = (dates > pd.Timestamp(state[name])).to_numpy() if name in state else np.ones(len(df), bool)
+            if new.any():
+                buckets = calendar_buckets(dates)
+                fresh.append(moments(df[new].reset_index(drop=True), source, dates[new],
+                                     {k: v[new] for k, v in buckets.items()}))
+                state[name] = dates.max().strftime("%Y-%m-%d")
+    if fresh or view is None:
+        for part in fresh:
+            view = merge_moments(view, part)
+        if view is not None:
+            materialized.write_view(VIEW, view.sort_values(KEYS, ignore_index=True), data_dir)
+    return state
+
+
+def bucket_label(dimension, bucket):
+    if dimension == "Weekday":
+        return WEEKDAY_NAMES[bucket]
+    if dimension == "Month":
+        return MONTH_NAMES[bucket - 1]
+    return str(bucket)
+
+
+def breakdown(view, source, days, metric, dimension):
+    """Mean, spread and confidence half-width of `metric` per bucket of `dimension`.
+
+    `view` is the seasonality view indexed by KEYS (see `index_view`).
+    """
+    try:
+        rows = view.loc[(source, days, dimension, slice(None), metric)]
+    except KeyError:
+        return pd.DataFrame(columns=["Bucket", "Mean", "Std", "CI", "Count"])
+    rows = rows.reset_index()
+    count = rows["Count"].to_numpy(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(rows["M2"].to_numpy() / (count - 1))
+        half = CONFIDENCE_Z * std / np.sqrt(count)
+    return pd.DataFrame({
+        "Bucket": [bucket_label(dimension, int(b)) for b in rows["Bucket"]],
+        "Mean": rows["Mean"].to_numpy(),
+        "Std": std,
+        "CI": half,
+        "Count": rows["Count"].to_numpy(),
+    })
+
+
+def index_view(view):
+    return view.set_index(KEYS).sort_index()
@@ -0,0 +1,80 @@
+"""Similar-days search over Z-Score state vectors.
+
+Each date's row of a `*tf Z-Score.csv` (optionally every timeframe's row,
+concatenated) is a point in metric space. The index keeps those vectors as
+one float32 matrix with precomputed squared norms, so a query is a blocked
+matrix-vector product:
+
+    |x - q|^2 = |x|^2 - 2 x.q + |q|^2
+
+which stays in the millisecond range for decades of history across
+markets. Missing z-scores count as 0 (the metric's mean).
+"""
+import numpy as np
+import pandas as pd
+
+from core.data import KEY_COLUMNS
+
+HORIZONS = (1, 5, 10, 20)
+EXCLUDE_DAYS = 5  # neighbours this close to the query date share most of its window
+BLOCK_ROWS = 65536
+
+
+class SimilarityIndex:
+    def __init__(self, dates, matrix, columns):
+        self.dates = np.asarray(dates)
+        self.matrix = np.ascontiguousarray(np.nan_to_num(np.asarray(matrix, dtype=np.float32)))
+        self.columns = list(columns)
+        self.norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self.position = {d: i for i, d in enumerate(self.dates)}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Index from {timeframe: Z-Score frame}; more than one frame concatenates
+        each date's vectors, keeping dates present in all of them."""
+        parts = []
+        for tf, df in frames.items():
+            df = df.drop(columns=[c for c in KEY_COLUMNS if c in df.columns and c != "Date"])
+            df = df.set_index("Date") if "Date" in df.columns else df
+            df = df[[c for c in df.columns if not str(c).startswith("Unnamed")]]
+            parts.append(df.add_prefix(f"{tf} ") if len(frames) > 1 else df)
+        joined = pd.concat(parts, axis=1, join="inner")
+        return cls(joined.index.to_numpy(), joined.to_numpy(), joined.columns)
+
+    def distances(self, vector):
+        """Euclidean distance from `vector` to every indexed date."""
+        vector = np.nan_to_num(np.asarray(vector, dtype=np.float32))
+        out = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            out[block] = self.norms[block] - 2.0 * (self.matrix[block] @ vector)
+        out += vector @ vector
+        return np.sqrt(np.maximum(out, 0.0))
+
+    def query(self, date, k=10, exclude_days=EXCLUDE_DAYS):
+        """The `k` dates closest to `date`, nearest first, skipping its neighbours in time."""
+        i = self.position[date]
+        distance = self.distances(self.matrix[i])
+        distance[max(0, i - exclude_days):i + exclude_days + 1] = np.inf
+        k = min(k, int(np.isfinite(distance).sum()))
+        nearest = np.argpartition(distance, k - 1)[:k] if k else np.array([], dtype=np.int64)
+        nearest = nearest[np.argsort(distance[nearest], kind="stable")]
+        return pd.DataFrame({"Date": self.dates[nearest], "Distance": distance[nearest]})
+
+
+def forward_returns(raw_df, horizons=HORIZONS):
+    """Percent change of the 1-day Close `h` sessions after each date, indexed by Date."""
+    df = raw_df[raw_df["Days"] == 1][["Date", "Close"]].copy()
+    df["_date"] = pd.to_datetime(df["Date"], format="%m/%d/%Y")
+    df = df.sort_values("_date").set_index("Date")
+    close = df["Close"]
+    return pd.DataFrame({f"+{h}D %": (close.shift(-h) / close - 1) * 100 for h in horizons})
+
+
+def similar_days(index, returns, date, k=10):
+    """Nearest dates to `date` with the forward returns that followed each of them."""
+    neighbours = index.query(date, k)
+    return neighbours.join(returns, on="Date")
@@ -0,0 +1,37 @@
+"""Source frames cached once per process, shared by the pages and the HTTP API.
+
+load_source() keys its st.cache_data entry on the file's mtime, so a frame a
+page loaded is a cache hit for an API request (and the reverse), and a file
+rewritten by the exporter or core.ingest is read again on the next call
+instead of waiting for a Refresh Data click. Page caches built on top of it
+(indexes, column subsets) must take the mtime as part of their key too, or
+they keep serving the frame from before the rewrite.
+"""
+import os
+
+from core import profiling
+from core.data import load_table
+from core.views import newest_first
+
+MAX_ENTRIES = 256  # superseded mtimes age out of the cache
+
+
+def mtime(file_path):
+    """Modification time of a source, or None if it is missing."""
+    try:
+        return os.path.getmtime(file_path)
+    except OSError:
+        return None
+
+
+@profiling.cache_data(max_entries=MAX_ENTRIES)
+def _load(file_path, columns, mtime):
+    return newest_first(load_table(file_path, list(columns) if columns is not None else None)).reset_index(drop=True)
+
+
+def load_source(file_path, columns=None):
+    """Rows of a source newest first, only `columns` when given.
+
+    Raises FileNotFoundError like load_table.
+    """
+    return _load(file_path, tuple(columns) if columns is not None else None, mtime(file_path))
@@ -0,0 +1,93 @@
+"""Per-market summary records for the all-markets overview.
+
+One row per market: the latest condition label per timeframe, RI and QC,
+the flow consensus across timeframes and the strongest latest-day Z-Scores.
+It is written at ingest as a view of a few hundred bytes, so the overview
+reads seven small records instead of seven full datasets.
+"""
+import numpy as np
+import pandas as pd
+
+from core import materialized
+from core.data import (DATA_DIR, MARKET_CONDITION_FILE, NET_TABLE_FILES, RI_QC_FILE, ZSCORE_FILES, load_table,
+                       market_file, metric_names)
+from core.views import CONDITION_TIMEFRAMES, CRITICAL_Z, flow_consensus, net_sentiment, newest_first
+
+VIEW = "market_summary"
+EXTREME_Z = 2.0
+TOP_ANOMALIES = 3
+RI_COLUMNS = ["RI_4", "RI_4_QC", "RI_8", "RI_8_QC"]
+
+
+def _latest_row(path, columns=None):
+    """Newest row of a source as a Series, or None if the file is missing or empty."""
+    try:
+        df = load_table(path, columns)
+    except FileNotFoundError:
+        return None
+    return newest_first(df).iloc[0] if not df.empty else None
+
+
+def market_record(data_dir=DATA_DIR):
+    """The summary record (a dict) for the market whose files are in `data_dir`."""
+    record = {"Date": None, "Sentiment": None, "Net Agreement": None}
+
+    condition = _latest_row(market_file(data_dir, MARKET_CONDITION_FILE), ["Date"] + CONDITION_TIMEFRAMES)
+    if condition is not None:
+        record["Date"] = condition["Date"]
+        record.update({tf: condition[tf] for tf in CONDITION_TIMEFRAMES})
+
+    ri = _latest_row(market_file(data_dir, RI_QC_FILE), ["Date"] + RI_COLUMNS)
+    if ri is not None:
+        record.update({c: ri[c] for c in RI_COLUMNS})
+
+    latest_flows = {}
+    for tf, path in NET_TABLE_FILES.items():
+        row = _latest_row(market_file(data_dir, path))
+        if row is not None:
+            latest_flows[tf] = row.to_frame().T
+    if latest_flows:
+        consensus = flow_consensus(latest_flows)
+        record["Sentiment"] = net_sentiment(consensus)
+        net = consensus[consensus["Metric"] == "Net"]["Agreement Count"]
+        record["Net Agreement"] = net.iloc[0] if not net.empty else None
+
+    zscores = {}
+    for tf, path in ZSCORE_FILES.items():
+        path = market_file(data_dir, path)
+        try:
+            row = _latest_row(path, ["Date"] + metric_names(path))
+        except FileNotFoundError:
+            continue
+        if row is not None:
+            zscores[tf] = pd.to_numeric(row.drop("Date"), errors="coerce")
+    if zscores:
+        z = pd.concat(zscores, names=["Timeframe", "Metric"]).dropna()
+        strongest = z.abs().sort_values(ascending=False, kind="stable").head(TOP_ANOMALIES).index
+        record["Extreme"] = int((z.abs() >= EXTREME_Z).sum())
+        record["Critical"] = int((z.abs() >= CRITICAL_Z).sum())
+        record["Top Anomalies"] = ", ".join(f"{metric} {tf} {z[(tf, metric)]:+.2f}" for tf, metric in strongest)
+    return record
+
+
+def ingest(data_dir=DATA_DIR, state=None):
+    """Rewrite the record when any of its source files changed since the last run."""
+    paths = [MARKET_CONDITION_FILE, RI_QC_FILE, *NET_TABLE_FILES.values(), *ZSCORE_FILES.values()]
+    mtimes = materialized.file_mtimes(market_file(data_dir, p) for p in paths)
+    if state and state.get("mtimes") == mtimes and materialized.view_mtime(VIEW, data_dir) is not None:
+        return state
+    materialized.write_view(VIEW, pd.DataFrame([market_record(data_dir)]), data_dir)
+    return {"mtimes": mtimes}
+
+
+def overview(records):
+    """Grid of {market: record DataFrame or None}, one row per market, missing markets included."""
+    rows = []
+    for market, record in records.items():
+        row = record.iloc[0].to_dict() if record is not None and not record.empty else {}
+        rows.append({"Market": market, **row})
+    df = pd.DataFrame(rows)
+    for column in ["Extreme", "Critical"]:
+        if column in df.columns:
+            df[column] = df[column].astype("Int64")
+    return df.replace({np.nan: None})
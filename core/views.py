@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+CONDITION_TIMEFRAMES = ["1D", "3D", "5D", "10D", "15D", "20D"]
+FLOW_METRICS = ["Dir", "Act", "Net", "3D Net"]
+DELTA_PAIRS = [("1TF", "3TF"), ("3TF", "5TF"), ("5TF", "10TF"), ("10TF", "15TF"), ("15TF", "20TF")]
+CRITICAL_Z = 2.5
+
+
+def newest_first(df):
+    """`df` ordered by its Date column (or Date index) newest first; ties keep file order.
+
+    Dates are parsed, so 6/9 sorts before 6/13 rather than after it as a string.
+    """
+    dates = df["Date"] if "Date" in df.columns else df.index
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%m/%d/%Y")
+    order = np.argsort(-np.asarray(dates, dtype="datetime64[D]").astype(np.int64), kind="stable")
+    return df.iloc[order]
+
+
+def latest_first(df):
+    return newest_first(df).reset_index(drop=True)
+
+
+def condition_overview(market_df):
+    latest_condition = latest_first(market_df).iloc[0]
+    condition_data = []
+    for tf in CONDITION_TIMEFRAMES:
+        condition_data.append({
+            "Timeframe": tf,
+            "Condition": latest_condition[tf],
+            "Distributions": latest_condition[f"{tf}_NumDists"],
+            "Upper Limit": f"{latest_condition[f'{tf}_D1_Upper']:.4f}",
+            "Lower Limit": f"{latest_condition[f'{tf}_D1_Lower']:.4f}"
+        })
+    return pd.DataFrame(condition_data)
+
+
+def flow_deltas(net_tables):
+    delta_data = []
+    for tf1, tf2 in DELTA_PAIRS:
+        df1, df2 = net_tables.get(tf1), net_tables.get(tf2)
+        if df1 is not None and df2 is not None and not df1.empty and not df2.empty:
+            r1, r2 = df1.iloc[0], df2.iloc[0]
+            delta_data.append({
+                "Transition": f"{tf1} → {tf2}",
+                "Δ Direction": r1["Dir"] - r2["Dir"],
+                "Δ Activity": r1["Act"] - r2["Act"],
+                "Δ Net Flow": r1["Net"] - r2["Net"],
+                "Δ 3D Net": r1["3D Net"] - r2["3D Net"]
+            })
+    return pd.DataFrame(delta_data)
+
+
+def flow_consensus(net_tables):
+    consensus_data = {"Metric": [], "Agreement Count": [], "Consensus": []}
+    for metric in FLOW_METRICS:
+        signs = []
+        for df in net_tables.values():
+            if df is not None and not df.empty:
+                signs.append(np.sign(df.iloc[0][metric]))
+
+        if signs:
+            mode_sign = max(set(signs), key=signs.count)
+            agreement_count = signs.count(mode_sign)
+            consensus = "Bullish" if mode_sign > 0 else "Bearish" if mode_sign < 0 else "Neutral"
+
+            consensus_data["Metric"].append(metric)
+            consensus_data["Agreement Count"].append(f"{agreement_count}/{len(signs)}")
+            consensus_data["Consensus"].append(consensus)
+    return pd.DataFrame(consensus_data)
+
+
+def net_sentiment(consensus_df):
+    net = consensus_df[consensus_df['Metric'] == 'Net']['Consensus']
+    return net.iloc[0] if not net.empty else "Neutral"
+
+
+def custom_metrics(row0, row1):
+    return {
+        "Value Area Position": (
+            "Higher" if row0["VAL"] >= row1["VAL"] and row0["VAH"] >= row1["VAH"] else
+            "Lower" if row0["VAL"] <= row1["VAL"] and row0["VAH"] <= row1["VAH"] else
+            "OL Higher" if row0["VAL"] >= row1["VAH"] else
+            "OL Lower" if row0["VAH"] <= row1["VAL"] else
+            "Inside" if row0["VAL"] <= row1["VAH"] and row0["VAH"] >= row1["VAL"] else
+            "Outside"
+        ),
+        "POC Movement": "POC Up" if row0["POC"] > row1["POC"] else "POC Down" if row0["POC"] < row1["POC"] else "Unchanged",
+        "POC to Prev VA": (
+            "Below VA" if row0["POC"] < row1["VAL"] else
+            "Above VA" if row0["POC"] > row1["VAH"] else
+            "Inside VA"
+        ),
+        "Range Expansion": (
+            "Both Sides Expand" if row0["Low"] < row1["Low"] and row0["High"] > row1["High"] else
+            "Lower Break" if row0["Low"] < row1["Low"] else
+            "Upper Break" if row0["High"] > row1["High"] else
+            "Inside Day"
+        ),
+        "Close-V.A": (
+            "Below VA" if row0["Close"] < row0["VAL"] else
+            "Above VA" if row0["Close"] > row0["VAH"] else
+            "Inside VA"
+        ),
+        "TPO Imbalance": (
+            "Top-Weighted" if row0["TPO Ab. POC"] > row0["TPO Bl. POC"] else
+            "Bottom-Weighted" if row0["TPO Bl. POC"] > row0["TPO Ab. POC"] else
+            "Balanced"
+        )
+    }
+
+
+def anomaly_stats(zscore_df, threshold):
+    total_values = zscore_df.size
+    extreme_values = int((np.abs(zscore_df) >= threshold).sum().sum())
+    critical_values = int((np.abs(zscore_df) >= CRITICAL_Z).sum().sum())
+    anomaly_rate = (extreme_values / total_values * 100) if total_values > 0 else 0
+    return {
+        "total": total_values,
+        "extreme": extreme_values,
+        "critical": critical_values,
+        "rate": anomaly_rate,
+    }
+
+
+def severity(zscore):
+    return "Critical" if abs(zscore) >= CRITICAL_Z else "High" if abs(zscore) >= 2.0 else "Moderate"
+
+
+def top_anomalies(zscore_df, n=10, formatted=True):
+    # `formatted` renders Z-Score as a 3-decimal string for display; False keeps the float
+    flat_values = zscore_df.abs().unstack().sort_values(ascending=False)
+    anomaly_data = []
+    for (metric, date), _ in flat_values.head(n).items():
+        original_value = zscore_df.loc[date, metric]
+        anomaly_data.append({
+            "Date": date,
+            "Metric": metric,
+            "Z-Score": f"{original_value:.3f}" if formatted else float(original_value),
+            "Severity": severity(original_value),
+            "Direction": "Positive" if original_value > 0 else "Negative"
+        })
+    return pd.DataFrame(anomaly_data)
+
+
+def days_slice(raw_df, days, latest_n):
+    filtered_df = raw_df[raw_df["Days"] == days].sort_values("Date", ascending=True)
+    return filtered_df.tail(latest_n).copy()
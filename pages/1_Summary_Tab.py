@@ -4,6 +4,13 @@ import numpy as np
 import os
 import plotly.express as px
 import plotly.graph_objects as go
+from core.data import MARKET_CONDITION_FILE, RI_QC_FILE, RAW_METRICS_FILE, NET_TABLE_FILES
+from core.views import condition_overview, custom_metrics, flow_consensus, flow_deltas, net_sentiment, newest_first
+from core.figures import flow_delta_figure, flow_trend_figure, key_metrics_figure, live_profile_figure
+from core.live_profile import LIVE_FEED_FILE, LiveSession
+from core import metrics, profiling, push
+from core.asof import AsOfIndex, as_of_control, keep_playing
+from core.sources import load_source, mtime
 
 # Page configuration
 st.set_page_config(page_title="Summary Dashboard – QuantiveFlow™", layout="wide")
@@ -70,12 +77,17 @@ if current_market != 'GBPJPY':
     st.error(f"🚫 {current_market} market data is not accessible. Please switch to GBP/JPY for full functionality.")
     st.stop()
 
+prof = profiling.start("Summary")
+
 # File paths
-# File paths
-market_condition_file = "data/MarketCondition.csv"
-ri_qc_file = "data/RI&QC.csv"
-raw_metrics_file = "data/RawMetrics.csv"
-tf_files = {f"{i}TF": f"data/{i}TF Net Table.csv" for i in [1,3,5,10,15,20]}
+market_condition_file = MARKET_CONDITION_FILE
+ri_qc_file = RI_QC_FILE
+raw_metrics_file = RAW_METRICS_FILE
+tf_files = NET_TABLE_FILES
+
+# RawMetrics columns used by the Custom Metrics tab
+custom_metric_columns = ("Date", "Days", "Open", "High", "Low", "Close", "POC", "VAH", "VAL",
+                         "TPO Ab. POC", "TPO Bl. POC")
 
 # Refresh button
 col1, col2, col3 = st.columns([1, 1, 2])
@@ -87,16 +99,36 @@ with col1:
 
 with col2:
     auto_refresh = st.checkbox("⚡ Live Mode", help="Enable for frequent updates")
+    metrics.mark_live(profiling.session_id(), auto_refresh)
+    pushed = push.version()  # events published after this point trigger the next live rerun
 
 # Helper functions
-@st.cache_data
-def load_csv_safe(file_path):
+def load_csv_safe(file_path, columns=None):
+    # Cached in core.sources, shared with the HTTP API
     try:
-        return pd.read_csv(file_path)
+        return load_source(file_path, columns)
     except FileNotFoundError:
         st.warning(f"Data file not found: {os.path.basename(file_path)}")
         return pd.DataFrame()
 
+@profiling.cache_data
+def _load_indexed(file_path, columns, modified):
+    df = load_csv_safe(file_path, columns)
+    if df.empty:
+        return df, AsOfIndex([])
+    df = newest_first(df).reset_index(drop=True)
+    return df, AsOfIndex.from_frame(df)
+
+def load_indexed(file_path, columns=None):
+    # Rows newest first with their as-of index, so any past date is a slice.
+    # Keyed on the mtime like load_source, so a Live Mode rerun sees rewritten files
+    return _load_indexed(file_path, columns, mtime(file_path))
+
+@st.cache_resource
+def live_session(feed_path):
+    # One accumulator per feed, shared by every Live Mode session in the process
+    return LiveSession(feed_path)
+
 def flow_color_class(val):
     if isinstance(val, str): return ""
     if val > 0: return "flow-positive"
@@ -108,9 +140,34 @@ def format_flow_value(val):
     return f"{val:+.2f}" if abs(val) >= 0.01 else f"{val:+.4f}"
 
 # Load all data
-market_df = load_csv_safe(market_condition_file)
-ri_df = load_csv_safe(ri_qc_file)
-metrics_df = load_csv_safe(raw_metrics_file)
+market_df, market_index = load_indexed(market_condition_file)
+ri_df, ri_index = load_indexed(ri_qc_file)
+metrics_df, metrics_index = load_indexed(raw_metrics_file, custom_metric_columns)
+prof.lap("load")
+
+# Every view below is the latest rows as of this date (the newest date unless time travel is on)
+as_of = as_of_control(market_index if len(market_index) else metrics_index, "summary")
+market_df = market_index.window(market_df, as_of, 1)
+ri_df = ri_index.window(ri_df, as_of, 1)
+metrics_df = metrics_index.window(metrics_df, as_of, 10)
+prof.lap("filter")
+
+# Developing profile for the current session, folded in from the live feed
+if auto_refresh and as_of is None:
+    live = live_session(LIVE_FEED_FILE)
+    live.poll()
+    snapshot, (live_prices, live_volumes) = live.snapshot()
+    prof.lap("live")
+    st.subheader("📡 Developing Profile")
+    if snapshot["Updates"]:
+        cols = st.columns(5)
+        for col, key in zip(cols, ["POC", "VAH", "VAL", "Volume", "Avg Volume"]):
+            col.metric(key, f"{snapshot[key]:,.2f}" if key.endswith("Volume") else f"{snapshot[key]:g}")
+        fig = live_profile_figure(live_prices, live_volumes, snapshot)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("live_profile", fig), use_container_width=True)
+    else:
+        st.info(f"Waiting for the live feed ({os.path.basename(LIVE_FEED_FILE)})")
 
 # Main dashboard layout
 tab1, tab2, tab3, tab4 = st.tabs(["🏠 Overview", "📈 Flow Analysis", "🧮 Custom Metrics", "🔄 Flow Deltas"])
@@ -124,23 +181,9 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
 
-        market_df = market_df.sort_values("Date", ascending=False)
-        latest_condition = market_df.iloc[0]
-
-        cols = ["1D", "3D", "5D", "10D", "15D", "20D"]
-        condition_data = []
-
-        for tf in cols:
-            condition_data.append({
-                "Timeframe": tf,
-                "Condition": latest_condition[tf],
-                "Distributions": latest_condition[f"{tf}_NumDists"],
-                "Upper Limit": f"{latest_condition[f'{tf}_D1_Upper']:.4f}",
-                "Lower Limit": f"{latest_condition[f'{tf}_D1_Lower']:.4f}"
-            })
-
-        condition_df = pd.DataFrame(condition_data)
-        st.dataframe(condition_df, use_container_width=True, hide_index=True)
+        condition_df = condition_overview(market_df)
+        prof.lap("compute")
+        st.dataframe(prof.sized("condition_table", condition_df), use_container_width=True, hide_index=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
         # RI & QC Overview
@@ -151,7 +194,6 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
 
-            ri_df = ri_df.sort_values("Date", ascending=False)
             latest_ri = ri_df.iloc[0]
 
             col1, col2, col3, col4 = st.columns(4)
@@ -173,10 +215,11 @@ with tab2:
     # Load all flow tables
     net_tables = {}
     for tf, file_path in tf_files.items():
-        df = load_csv_safe(file_path)
+        df, df_index = load_indexed(file_path)
+        df = df_index.window(df, as_of, 10).reset_index(drop=True)
         if not df.empty:
-            df = df.sort_values("Date", ascending=False).reset_index(drop=True)
             net_tables[tf] = df
+    prof.lap("load")
 
     if net_tables:
         # Timeframe selector
@@ -204,19 +247,10 @@ with tab2:
 
             # Flow history chart
             if len(flow_df) >= 10:
-                chart_df = flow_df.head(10)
-                fig = go.Figure()
-
-                fig.add_trace(go.Scatter(x=chart_df['Date'], y=chart_df['Net'],
-                                       mode='lines+markers', name='Net Flow',
-                                       line=dict(color='#667eea', width=3)))
-                fig.add_trace(go.Scatter(x=chart_df['Date'], y=chart_df['3D Net'],
-                                       mode='lines+markers', name='3D Net',
-                                       line=dict(color='#764ba2', width=2)))
-
-                fig.update_layout(title=f"Flow Trend - {selected_tf}", height=400,
-                                hovermode='x unified')
-                st.plotly_chart(fig, use_container_width=True)
+                prof.lap("render")
+                fig = flow_trend_figure(flow_df.head(10), selected_tf)
+                prof.lap("figure")
+                st.plotly_chart(prof.sized("flow_trend", fig), use_container_width=True)
 
             # Detailed flow table
             with st.expander("📊 Detailed Flow Data"):
@@ -231,48 +265,20 @@ with tab3:
         tf_options = sorted(metrics_df['Days'].unique())
         selected_days = st.selectbox("📅 Select Analysis Period", tf_options, key="metrics_tf")
 
+        prof.lap("render")
         filtered_df = metrics_df[metrics_df["Days"] == selected_days].reset_index(drop=True)
+        prof.lap("filter")
 
         if len(filtered_df) >= 2:
             row0, row1 = filtered_df.iloc[0], filtered_df.iloc[1]
 
             # Custom calculations
-            custom_metrics = {
-                "Value Area Position": (
-                    "Higher" if row0["VAL"] >= row1["VAL"] and row0["VAH"] >= row1["VAH"] else
-                    "Lower" if row0["VAL"] <= row1["VAL"] and row0["VAH"] <= row1["VAH"] else
-                    "OL Higher" if row0["VAL"] >= row1["VAH"] else
-                    "OL Lower" if row0["VAH"] <= row1["VAL"] else
-                    "Inside" if row0["VAL"] <= row1["VAH"] and row0["VAH"] >= row1["VAL"] else
-                    "Outside"
-                ),
-                "POC Movement": "POC Up" if row0["POC"] > row1["POC"] else "POC Down" if row0["POC"] < row1["POC"] else "Unchanged",
-                "POC to Prev VA": (
-                    "Below VA" if row0["POC"] < row1["VAL"] else
-                    "Above VA" if row0["POC"] > row1["VAH"] else
-                    "Inside VA"
-                ),
-                "Range Expansion": (
-                    "Both Sides Expand" if row0["Low"] < row1["Low"] and row0["High"] > row1["High"] else
-                    "Lower Break" if row0["Low"] < row1["Low"] else
-                    "Upper Break" if row0["High"] > row1["High"] else
-                    "Inside Day"
-                ),
-                "Close-V.A": (
-                    "Below VA" if row0["Close"] < row0["VAL"] else
-                    "Above VA" if row0["Close"] > row0["VAH"] else
-                    "Inside VA"
-                ),
-                "TPO Imbalance": (
-                    "Top-Weighted" if row0["TPO Ab. POC"] > row0["TPO Bl. POC"] else
-                    "Bottom-Weighted" if row0["TPO Bl. POC"] > row0["TPO Ab. POC"] else
-                    "Balanced"
-                )
-            }
+            metric_labels = custom_metrics(row0, row1)
+            prof.lap("compute")
 
             # Display custom metrics in cards
             col1, col2 = st.columns(2)
-            metrics_items = list(custom_metrics.items())
+            metrics_items = list(metric_labels.items())
 
             with col1:
                 for i in range(0, len(metrics_items), 2):
@@ -290,54 +296,26 @@ with tab3:
             # Key metrics visualization
             key_metrics = ['POC', 'VAH', 'VAL', 'High', 'Low', 'Close']
             if all(col in filtered_df.columns for col in key_metrics):
+                prof.lap("render")
                 chart_data = filtered_df.head(10)[['Date'] + key_metrics]
-
-                fig = go.Figure()
-                colors = ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe']
-
-                for i, metric in enumerate(key_metrics):
-                    fig.add_trace(go.Scatter(x=chart_data['Date'], y=chart_data[metric],
-                                           mode='lines+markers', name=metric,
-                                           line=dict(color=colors[i % len(colors)], width=2)))
-
-                fig.update_layout(title=f"Key Metrics Trend ({selected_days}D)", height=400,
-                                hovermode='x unified')
-                st.plotly_chart(fig, use_container_width=True)
+                fig = key_metrics_figure(chart_data, key_metrics, selected_days)
+                prof.lap("figure")
+                st.plotly_chart(prof.sized("key_metrics", fig), use_container_width=True)
 
 with tab4:
     # Flow Delta Analysis
     if net_tables:
         st.markdown("### 🔄 Flow Delta Analysis")
 
-        delta_pairs = [("1TF", "3TF"), ("3TF", "5TF"), ("5TF", "10TF"), ("10TF", "15TF"), ("15TF", "20TF")]
-        delta_data = []
-
-        for tf1, tf2 in delta_pairs:
-            df1, df2 = net_tables.get(tf1), net_tables.get(tf2)
-            if df1 is not None and df2 is not None and not df1.empty and not df2.empty:
-                r1, r2 = df1.iloc[0], df2.iloc[0]
-                delta_data.append({
-                    "Transition": f"{tf1} → {tf2}",
-                    "Δ Direction": r1["Dir"] - r2["Dir"],
-                    "Δ Activity": r1["Act"] - r2["Act"],
-                    "Δ Net Flow": r1["Net"] - r2["Net"],
-                    "Δ 3D Net": r1["3D Net"] - r2["3D Net"]
-                })
-
-        if delta_data:
-            delta_df = pd.DataFrame(delta_data)
+        prof.lap("render")
+        delta_df = flow_deltas(net_tables)
+        prof.lap("compute")
 
+        if not delta_df.empty:
             # Delta visualization
-            fig = go.Figure()
-
-            fig.add_trace(go.Bar(x=delta_df['Transition'], y=delta_df['Δ Net Flow'],
-                               name='Net Flow Delta', marker_color='#667eea'))
-            fig.add_trace(go.Bar(x=delta_df['Transition'], y=delta_df['Δ 3D Net'],
-                               name='3D Net Delta', marker_color='#764ba2'))
-
-            fig.update_layout(title="Flow Deltas Across Timeframes", height=400,
-                            barmode='group', hovermode='x unified')
-            st.plotly_chart(fig, use_container_width=True)
+            fig = flow_delta_figure(delta_df)
+            prof.lap("figure")
+            st.plotly_chart(prof.sized("flow_deltas", fig), use_container_width=True)
 
             # Delta table
             st.dataframe(delta_df, use_container_width=True, hide_index=True)
@@ -345,24 +323,9 @@ with tab4:
         # Flow Consensus Analysis
         st.markdown("### 🧠 Flow Consensus")
 
-        consensus_data = {"Metric": [], "Agreement Count": [], "Consensus": []}
-        for metric in ["Dir", "Act", "Net", "3D Net"]:
-            signs = []
-            for tf in tf_files:
-                df = net_tables.get(tf)
-                if df is not None and not df.empty:
-                    signs.append(np.sign(df.iloc[0][metric]))
-
-            if signs:
-                mode_sign = max(set(signs), key=signs.count)
-                agreement_count = signs.count(mode_sign)
-                consensus = "Bullish" if mode_sign > 0 else "Bearish" if mode_sign < 0 else "Neutral"
-
-                consensus_data["Metric"].append(metric)
-                consensus_data["Agreement Count"].append(f"{agreement_count}/{len(signs)}")
-                consensus_data["Consensus"].append(consensus)
-
-        consensus_df = pd.DataFrame(consensus_data)
+        prof.lap("render")
+        consensus_df = flow_consensus(net_tables)
+        prof.lap("compute")
 
         # Consensus visualization
         col1, col2 = st.columns([2, 1])
@@ -371,7 +334,7 @@ with tab4:
 
         with col2:
             # Overall market sentiment
-            net_consensus = consensus_df[consensus_df['Metric'] == 'Net']['Consensus'].iloc[0] if not consensus_df.empty else "Neutral"
+            net_consensus = net_sentiment(consensus_df)
             sentiment_color = "#28a745" if net_consensus == "Bullish" else "#dc3545" if net_consensus == "Bearish" else "#6c757d"
 
             st.markdown(f"""
@@ -382,7 +345,11 @@ with tab4:
             </div>
             """, unsafe_allow_html=True)
 
+prof.finish()
+keep_playing()
+
 # Auto-refresh functionality
 if auto_refresh:
-    time.sleep(30)  # 30-second refresh in live mode
+    # Rerun as soon as new rows are pushed; the 30 s fallback keeps the intraday feed moving
+    push.wait(pushed, 30)
     st.rerun()
\ No newline at end of file
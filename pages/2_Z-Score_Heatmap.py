@@ -4,6 +4,15 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import os
+from core.data import RAW_METRICS_FILE, ZSCORE_FILES, load_table, metric_names, row_count
+from core.views import anomaly_stats, newest_first, top_anomalies
+from core.figures import coherence_figure, event_study_figure, zscore_heatmap_figure, zscore_raster_figure
+from core.similarity import SimilarityIndex, forward_returns, similar_days
+from core.events import DIRECTIONS, event_study
+from core.coherence import DIVERGENCE, ZScoreTensor
+from core import profiling
+from core.asof import AsOfIndex, as_of_control, keep_playing
+from core.sources import load_source, mtime
 
 # Page configuration
 st.set_page_config(page_title="Z-Score Heatmap – QuantiveFlow™", layout="wide")
@@ -90,15 +99,79 @@ if current_market != 'GBPJPY':
     st.error(f"🚫 {current_market} market data is not accessible. Please switch to GBP/JPY for full functionality.")
     st.stop()
 
+prof = profiling.start("Heatmap")
+
 # File paths
-zscore_files = {
-    "1TF": "data/1tf Z-Score.csv",
-    "3TF": "data/3tf Z-Score.csv",
-    "5TF": "data/5tf Z-Score.csv",
-    "10TF": "data/10tf Z-Score.csv",
-    "15TF": "data/15tf Z-Score.csv",
-    "20TF": "data/20tf Z-Score.csv",
-}
+zscore_files = ZSCORE_FILES
+
+# Ranges longer than this render as a quantized raster overview
+INTERACTIVE_HEATMAP_DAYS = 60
+
+# Load and process data; `modified` (the file's mtime) keys the caches so a rewritten file is read again
+@profiling.cache_data
+def load_zscore_data(file_path, columns, modified):
+    try:
+        df = load_source(file_path, ["Date"] + list(columns) if columns is not None else None)
+        if 'Date' in df.columns:
+            df = df.set_index("Date")
+        return df
+    except FileNotFoundError:
+        st.error(f"Z-Score file not found: {os.path.basename(file_path)}")
+        return pd.DataFrame()
+
+@profiling.cache_data
+def load_zscore_metrics(file_path):
+    try:
+        return metric_names(file_path)
+    except FileNotFoundError:
+        return []
+
+@profiling.cache_data
+def load_zscore_index(file_path, modified):
+    # Built from the Date column alone; rows line up with load_zscore_data's newest-first order
+    try:
+        return AsOfIndex.from_frame(newest_first(load_table(file_path, ["Date"])))
+    except FileNotFoundError:
+        return AsOfIndex([])
+
+@profiling.cache_data
+def load_zscore_row_count(file_path, modified):
+    try:
+        return row_count(file_path)
+    except FileNotFoundError:
+        return 0
+
+@st.cache_resource
+def load_similarity_index(file_paths, mtimes):
+    # Shared across sessions; mtimes key the cache so a data refresh rebuilds it
+    frames = {tf: load_table(path) for tf, path in file_paths}
+    return SimilarityIndex.from_frames(frames)
+
+@st.cache_resource
+def load_zscore_tensor(file_paths, mtimes):
+    # Every timeframe stacked once; mtimes key the cache so a data refresh rebuilds it
+    return ZScoreTensor.from_frames({tf: load_table(path) for tf, path in file_paths})
+
+@profiling.cache_data
+def load_forward_returns(file_path):
+    try:
+        return forward_returns(load_table(file_path, ["Date", "Days", "Close"]))
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+@profiling.cache_data
+def load_raw_series(file_path, column):
+    try:
+        return load_table(file_path, ["Date", "Days", column])
+    except FileNotFoundError:
+        return pd.DataFrame()
+
+@profiling.cache_data
+def load_raw_metric_names(file_path):
+    try:
+        return metric_names(file_path)
+    except FileNotFoundError:
+        return []
 
 # Controls
 col1, col2, col3, col4 = st.columns(4)
@@ -108,8 +181,9 @@ with col1:
                               help="Select analysis timeframe")
 
 with col2:
-    latest_n = st.slider("📆 Days to View", 1, 20, 10,
-                        help="Number of recent days to analyze")
+    max_days = max(20, load_zscore_row_count(zscore_files[selected_tf], mtime(zscore_files[selected_tf])))
+    latest_n = st.slider("📆 Days to View", 1, max_days, 10,
+                        help=f"Number of recent days to analyze (over {INTERACTIVE_HEATMAP_DAYS} shows a raster overview)")
 
 with col3:
     if st.button("🔄 Refresh Data", help="Update Z-Score data"):
@@ -120,32 +194,34 @@ with col4:
     threshold = st.selectbox("⚠️ Alert Threshold", [1.5, 2.0, 2.5], index=1,
                            help="Z-Score threshold for anomaly alerts")
 
-# Load and process data
-@st.cache_data
-def load_zscore_data(file_path):
-    try:
-        df = pd.read_csv(file_path)
-        if 'Date' in df.columns:
-            df = df.set_index("Date")
-        return df
-    except FileNotFoundError:
-        st.error(f"Z-Score file not found: {os.path.basename(file_path)}")
-        return pd.DataFrame()
+zscore_index = load_zscore_index(zscore_files[selected_tf], mtime(zscore_files[selected_tf]))
+as_of = as_of_control(zscore_index, "heatmap")
+
+# Metric subset - only these columns are read from disk
+all_metrics = load_zscore_metrics(zscore_files[selected_tf])
+shown_metrics = st.multiselect("🧮 Metrics", all_metrics, default=all_metrics,
+                               help="Metrics to include in the heatmap and alerts")
 
 # Load selected data
-zscore_df = load_zscore_data(zscore_files[selected_tf])
+prof.lap("render")
+zscore_df = load_zscore_data(zscore_files[selected_tf], tuple(shown_metrics),
+                             mtime(zscore_files[selected_tf])) if shown_metrics else pd.DataFrame()
+prof.lap("load")
 
 if zscore_df.empty:
     st.warning("No Z-Score data available for the selected timeframe.")
 else:
-    # Filter recent data
-    zscore_df_latest = zscore_df.head(latest_n)
+    # Latest rows as of the selected date
+    zscore_df_latest = zscore_index.window(zscore_df, as_of, latest_n)
+    prof.lap("filter")
 
     # Calculate anomaly statistics
-    total_values = zscore_df_latest.size
-    extreme_values = (np.abs(zscore_df_latest) >= threshold).sum().sum()
-    critical_values = (np.abs(zscore_df_latest) >= 2.5).sum().sum()
-    anomaly_rate = (extreme_values / total_values * 100) if total_values > 0 else 0
+    stats = anomaly_stats(zscore_df_latest, threshold)
+    total_values = stats["total"]
+    extreme_values = stats["extreme"]
+    critical_values = stats["critical"]
+    anomaly_rate = stats["rate"]
+    prof.lap("compute")
 
     # Display key metrics
     st.markdown("""
@@ -170,7 +246,7 @@ else:
     """.format(anomaly_rate, extreme_values, critical_values, total_values), unsafe_allow_html=True)
 
     # Main visualization tabs
-    tab1, tab2, tab3 = st.tabs(["🔥 Interactive Heatmap", "📊 Anomaly Analysis", "📈 Time Series"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["🔥 Interactive Heatmap", "📊 Anomaly Analysis", "📈 Time Series", "🔎 Similar Days", "🧪 Event Study", "🧬 Coherence"])
 
     with tab1:
         st.markdown("""
@@ -180,31 +256,33 @@ else:
           """, unsafe_allow_html=True)
 
         # Create interactive Plotly heatmap
-        fig = go.Figure(data=go.Heatmap(
-            z=zscore_df_latest.values,
-            x=zscore_df_latest.columns,
-            y=zscore_df_latest.index,
-            colorscale='RdBu_r',
-            zmid=0,
-            text=zscore_df_latest.round(2).values,
-            texttemplate="%{text}",
-            textfont={"size": 10},
-            colorbar=dict(
-                title="Z-Score",
-                title_side="right"
+        prof.lap("render")
+        if len(zscore_df_latest) > INTERACTIVE_HEATMAP_DAYS:
+            fig = zscore_raster_figure(zscore_df_latest, selected_tf)
+            prof.lap("figure")
+            st.plotly_chart(prof.sized("heatmap_raster", fig), use_container_width=True)
+
+            # Zoom window - small enough windows switch back to the interactive heatmap
+            dates = zscore_df_latest.index
+            positions = list(range(len(dates) - 1, -1, -1))
+            oldest, newest = st.select_slider(
+                "🔍 Zoom Window", options=positions,
+                value=(min(INTERACTIVE_HEATMAP_DAYS // 3, len(dates)) - 1, 0),
+                format_func=lambda i: str(dates[i]),
+                help=f"Select up to {INTERACTIVE_HEATMAP_DAYS} days for the interactive heatmap"
             )
-
-        ))
-
-        fig.update_layout(
-            title=f"Z-Score Heatmap - {selected_tf} ({latest_n} Days)",
-            height=max(400, len(zscore_df_latest) * 30),
-            xaxis_title="Metrics",
-            yaxis_title="Date",
-            font=dict(size=12)
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+            zoom_df = zscore_df_latest.iloc[newest:oldest + 1]
+            if len(zoom_df) <= INTERACTIVE_HEATMAP_DAYS:
+                prof.lap("render")
+                fig = zscore_heatmap_figure(zoom_df, selected_tf, len(zoom_df))
+                prof.lap("figure")
+                st.plotly_chart(prof.sized("heatmap", fig), use_container_width=True)
+            else:
+                st.info(f"🔍 Narrow the zoom window to {INTERACTIVE_HEATMAP_DAYS} days or fewer for the interactive heatmap.")
+        else:
+            fig = zscore_heatmap_figure(zscore_df_latest, selected_tf, latest_n)
+            prof.lap("figure")
+            st.plotly_chart(prof.sized("heatmap", fig), use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Alert summary
@@ -233,25 +311,11 @@ else:
         st.markdown("### 📊 Detailed Anomaly Analysis")
 
         # Find most extreme values
-        flat_values = zscore_df_latest.abs().unstack().sort_values(ascending=False)
-        top_anomalies = flat_values.head(10)
-
-        if not top_anomalies.empty:
-            anomaly_data = []
-            for (metric, date), zscore in top_anomalies.items():
-                original_value = zscore_df_latest.loc[date, metric]
-                severity = "Critical" if abs(original_value) >= 2.5 else "High" if abs(original_value) >= 2.0 else "Moderate"
-                direction = "Positive" if original_value > 0 else "Negative"
-
-                anomaly_data.append({
-                    "Date": date,
-                    "Metric": metric,
-                    "Z-Score": f"{original_value:.3f}",
-                    "Severity": severity,
-                    "Direction": direction
-                })
-
-            anomaly_df = pd.DataFrame(anomaly_data)
+        prof.lap("render")
+        anomaly_df = top_anomalies(zscore_df_latest, 10)
+        prof.lap("compute")
+
+        if not anomaly_df.empty:
             st.dataframe(anomaly_df, use_container_width=True, hide_index=True)
 
             # Anomaly distribution chart
@@ -264,7 +328,8 @@ else:
                 color_continuous_scale="Reds"
             )
             fig_bar.update_layout(height=300)
-            st.plotly_chart(fig_bar, use_container_width=True)
+            prof.lap("figure")
+            st.plotly_chart(prof.sized("severity_bar", fig_bar), use_container_width=True)
         else:
             st.info("No significant anomalies detected in the current dataset.")
 
@@ -282,6 +347,7 @@ else:
 
         if selected_metrics:
             # Create time series plot
+            prof.lap("render")
             fig_ts = go.Figure()
 
             colors = px.colors.qualitative.Set1
@@ -314,16 +380,127 @@ else:
                 legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
             )
 
-            st.plotly_chart(fig_ts, use_container_width=True)
+            prof.lap("figure")
+            st.plotly_chart(prof.sized("time_series", fig_ts), use_container_width=True)
 
             # Statistical summary
             st.markdown("#### 📈 Statistical Summary")
             stats_df = zscore_df_latest[selected_metrics].describe().round(3)
             st.dataframe(stats_df, use_container_width=True)
 
+    with tab4:
+        st.markdown("### 🔎 Similar Historical Days")
+
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            query_date = st.selectbox("Compare date", zscore_df.index.tolist(),
+                                      index=min(zscore_index.locate(as_of), len(zscore_df) - 1),
+                                      help="Find the days whose Z-Score profile is closest to this one")
+        with col2:
+            n_similar = st.slider("Matches", 5, 25, 10)
+        with col3:
+            all_timeframes = st.checkbox("All timeframes", help="Match on every timeframe's Z-Scores at once")
+
+        prof.lap("render")
+        index_files = zscore_files if all_timeframes else {selected_tf: zscore_files[selected_tf]}
+        index_files = tuple((tf, path) for tf, path in index_files.items() if os.path.exists(path))
+        similarity_index = load_similarity_index(index_files, tuple(os.path.getmtime(p) for _, p in index_files))
+        returns_df = load_forward_returns(RAW_METRICS_FILE)
+        prof.lap("load")
+
+        if query_date not in similarity_index.position or returns_df.empty:
+            st.info("Similarity search needs this date in every Z-Score file and RawMetrics.csv.")
+        else:
+            similar_df = similar_days(similarity_index, returns_df, query_date, n_similar)
+            prof.lap("compute")
+            if similar_df.empty:
+                st.info("Not enough history to find similar days.")
+            else:
+                outcome_cols = [c for c in similar_df.columns if c.endswith("%")]
+                cols = st.columns(len(outcome_cols))
+                for col, name in zip(cols, outcome_cols):
+                    outcomes = similar_df[name].dropna()
+                    col.metric(f"Avg {name}", f"{outcomes.mean():+.2f}%" if len(outcomes) else "n/a",
+                               f"{(outcomes > 0).mean() * 100:.0f}% up" if len(outcomes) else None,
+                               delta_color="off")
+                st.dataframe(prof.sized("similar_days", similar_df.round(3)),
+                             use_container_width=True, hide_index=True)
+                st.caption(f"Searched {len(similarity_index)} days × {len(similarity_index.columns)} Z-Scores; "
+                           "returns are from the 1-day Close in RawMetrics.")
+
+    with tab5:
+        st.markdown("### 🧪 Event Study")
+        raw_metric_options = load_raw_metric_names(RAW_METRICS_FILE)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            event_metric = st.selectbox("Trigger metric", zscore_df.columns.tolist(),
+                                        help="Events are days this Z-Score first crosses the alert threshold")
+        with col2:
+            event_direction = st.selectbox("Direction", list(DIRECTIONS))
+        with col3:
+            traced_column = st.selectbox("Trace RawMetrics column", raw_metric_options,
+                                         index=raw_metric_options.index("Close") if "Close" in raw_metric_options else 0)
+        with col4:
+            before, after = st.slider("Window (days before / after)", -20, 40, (-5, 20))
+
+        if traced_column:
+            prof.lap("render")
+            raw_series = load_raw_series(RAW_METRICS_FILE, traced_column)
+            prof.lap("load")
+            study_df, event_dates = event_study(
+                zscore_df.reset_index(), event_metric, raw_series, int(selected_tf[:-2]), traced_column,
+                threshold, DIRECTIONS[event_direction], before=-min(before, 0), after=max(after, 0))
+            prof.lap("compute")
+            if len(event_dates) == 0:
+                st.info(f"No {event_metric} crossings of ±{threshold} in the loaded history.")
+            else:
+                fig = event_study_figure(study_df, traced_column, event_metric, threshold, len(event_dates))
+                prof.lap("figure")
+                st.plotly_chart(prof.sized("event_study", fig), use_container_width=True)
+                st.caption("Events: " + ", ".join(str(d) for d in event_dates[::-1][:20])
+                           + (" …" if len(event_dates) > 20 else ""))
+
+    with tab6:
+        st.markdown("### 🧬 Cross-Timeframe Coherence")
+        tensor_files = tuple((tf, path) for tf, path in zscore_files.items() if os.path.exists(path))
+        prof.lap("render")
+        tensor = load_zscore_tensor(tensor_files, tuple(os.path.getmtime(p) for _, p in tensor_files))
+        prof.lap("load")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            short_tf = st.selectbox("Short timeframe", tensor.timeframes, index=0)
+        with col2:
+            long_tf = st.selectbox("Long timeframe", tensor.timeframes, index=len(tensor.timeframes) - 1)
+        with col3:
+            gap_threshold = st.slider("Divergence (|Δz|)", 1.0, 6.0, DIVERGENCE, 0.5)
+
+        prof.lap("render")
+        coherence_df = tensor.summary()
+        divergence_df = tensor.divergences(gap_threshold, short_tf, long_tf)
+        if as_of is not None:
+            divergence_df = divergence_df[pd.to_datetime(divergence_df["Date"], format="%m/%d/%Y") <= as_of]
+        prof.lap("compute")
+        fig = coherence_figure(coherence_df)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("coherence", fig), use_container_width=True)
+        st.dataframe(coherence_df.style.format(precision=2), use_container_width=True, hide_index=True)
+
+        st.markdown(f"#### ⚡ Days {short_tf} diverged from {long_tf} by {gap_threshold:g}+")
+        if divergence_df.empty:
+            st.info("No divergences at this threshold.")
+        else:
+            st.dataframe(prof.sized("divergences", divergence_df.round(3)), use_container_width=True, hide_index=True)
+        st.caption(f"{len(tensor.dates)} dates × {len(tensor.timeframes)} timeframes × {len(tensor.metrics)} metrics. "
+                   "Alignment is each pair's correlation over time; sign agreement is the average share of "
+                   "timeframes on the majority side of zero.")
+
     # Raw data table (expandable)
     with st.expander("📄 View Raw Z-Score Data"):
-        st.dataframe(zscore_df_latest.round(3), use_container_width=True)
+        st.dataframe(prof.sized("raw_table", zscore_df_latest.round(3)), use_container_width=True)
+
+prof.finish()
 
 # Interpretation guide
 st.markdown("---")
@@ -354,3 +531,5 @@ with col3:
     - Exhaustion/momentum signals
     - Critical inflection points
     """)
+
+keep_playing()
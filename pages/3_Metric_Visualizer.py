@@ -5,6 +5,14 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import os
+from core.data import RAW_METRICS_FILE, ZSCORE_FILES, load_table, metric_names
+from core.views import days_slice, newest_first
+from core.figures import metric_lines_figure, seasonality_figure, state_timeline_figure
+from core import ingest, materialized, profiling, regimes, seasonality
+from core.asof import AsOfIndex, as_of_control, keep_playing
+from core.ranks import YEAR_DAYS, PercentileIndex, rolling_percentile
+from core.indicators import OVERLAYS, IndicatorCache
+from core.resample import LEVELS, ResamplePyramid, auto_level
 
 # Page configuration
 st.set_page_config(page_title="Metric Visualizer – QuantiveFlow™", layout="wide")
@@ -95,24 +103,70 @@ if current_market != 'GBPJPY':
     st.error(f"🚫 {current_market} market data is not accessible. Please switch to GBP/JPY for full functionality.")
     st.stop()
 
+prof = profiling.start("Visualizer")
+
 # File paths
-raw_metrics_file = "data/RawMetrics.csv"
+raw_metrics_file = RAW_METRICS_FILE
 
 # Load data function
-@st.cache_data
-def load_metrics_data(file_path):
+@profiling.cache_data
+def load_metrics_data(file_path, columns=None):
     try:
-        df = pd.read_csv(file_path)
+        df = load_table(file_path, columns=list(columns) if columns is not None else None)
         df['Date'] = pd.to_datetime(df['Date'])
-        return df
+        return newest_first(df).reset_index(drop=True)
     except FileNotFoundError:
         st.error(f"Metrics file not found: {os.path.basename(file_path)}")
         return pd.DataFrame()
 
-# Load data
-raw_df = load_metrics_data(raw_metrics_file)
+@profiling.cache_data
+def load_metrics_index(file_path):
+    # Built from the Date column alone; rows line up with load_metrics_data's newest-first order
+    try:
+        return AsOfIndex.from_frame(newest_first(load_table(file_path, ["Date"])))
+    except FileNotFoundError:
+        return AsOfIndex([])
+
+@st.cache_resource
+def percentile_index(file_path):
+    # One index per source, shared by all sessions; pages merge in rows as they load them
+    return PercentileIndex()
+
+@st.cache_resource
+def indicator_cache(file_path):
+    # Full-history indicators shared by all sessions; new days extend them in place
+    return IndicatorCache()
+
+@st.cache_resource
+def resample_pyramid(file_path):
+    # Weekly/monthly/quarterly levels shared by all sessions; new days re-aggregate only their buckets
+    return ResamplePyramid()
+
+@profiling.cache_data
+def load_market_states(zscore_file, model_file, mtimes):
+    # Loads a fitted model and labels any newer days; fitting itself happens off-render
+    model = regimes.StateModel.load(model_file)
+    timeline = model.timeline(load_table(zscore_file))
+    return timeline, model.describe(timeline)
+
+@profiling.cache_data
+def load_seasonality(mtime):
+    # Aggregates are maintained by core.ingest; rendering only looks them up
+    view = materialized.read_view(seasonality.VIEW)
+    return seasonality.index_view(view) if view is not None else None
+
+@profiling.cache_data
+def load_metric_columns(file_path):
+    try:
+        return metric_names(file_path)
+    except FileNotFoundError:
+        st.error(f"Metrics file not found: {os.path.basename(file_path)}")
+        return []
+
+# Only the schema is read up front; rows are loaded for the selected metrics
+metric_columns = load_metric_columns(raw_metrics_file)
 
-if raw_df.empty:
+if not metric_columns:
     st.warning("No metrics data available.")
     st.stop()
 
@@ -136,6 +190,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+metrics_index = load_metrics_index(raw_metrics_file)
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
@@ -145,8 +201,8 @@ with col1:
     selected_days = timeframe_map[selected_tf]
 
 with col2:
-    latest_n = st.slider("📆 Days to Analyze", 5, 100, 30,
-                        help="Number of recent days to visualize")
+    latest_n = st.slider("📆 Days to Analyze", 5, max(len(metrics_index), 100), 30,
+                        help="Number of recent days to visualize; long ranges are drawn as weekly, monthly or quarterly bars")
 
 with col3:
     chart_type = st.selectbox("📊 Chart Type",
@@ -158,23 +214,10 @@ with col4:
         st.cache_data.clear()
         st.success("Data refreshed!")
 
-# Filter data
-filtered_df = raw_df[raw_df["Days"] == selected_days].copy()
-filtered_df = filtered_df.sort_values("Date", ascending=True)
-
-if filtered_df.empty:
-    st.warning(f"No data available for {selected_tf} timeframe.")
-    st.stop()
-
-# Get recent data
-df_to_plot = filtered_df.tail(latest_n).copy()
-
-# Available metrics
-exclude_cols = ["Date", "Days"]
-metric_columns = [col for col in df_to_plot.columns if col not in exclude_cols]
+as_of = as_of_control(metrics_index, "visualizer")
 
 # Main visualization tabs
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Interactive Charts", "📈 Comparative Analysis", "🔍 Correlation Matrix", "📋 Statistical Summary"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Interactive Charts", "📈 Comparative Analysis", "🔍 Correlation Matrix", "📋 Statistical Summary", "🧭 Market States", "📅 Seasonality"])
 
 with tab1:
     st.markdown("### 📊 Interactive Metric Visualization")
@@ -191,52 +234,86 @@ with tab1:
         )
 
     with col2:
-        show_ma = st.checkbox("📈 Show Moving Average", help="Add moving average overlay")
+        resolution = st.selectbox("🔎 Resolution", ["Auto"] + list(LEVELS),
+                                  help="Auto picks the finest level that keeps the chart readable")
+        show_ma = st.checkbox("📈 Show Indicator", help="Overlay an indicator computed over the full history")
         if show_ma:
-            ma_period = st.number_input("MA Period", 3, 20, 5)
+            ma_kind = st.selectbox("Indicator", OVERLAYS)
+            ma_period = st.number_input("Period", 3, 200, 5)
+
+with tab2:
+    st.markdown("### 📈 Comparative Metric Lines")
+    selected = st.multiselect("Select metrics for comparative plotting:", metric_columns, default=metric_columns[:3])
+
+# Load only the columns the widgets above need
+projected = ["Date", "Days"] + [m for m in metric_columns if m in set(selected_metrics) | set(selected)]
+prof.lap("render")
+raw_df = load_metrics_data(raw_metrics_file, tuple(projected))
+prof.lap("load")
+
+if raw_df.empty:
+    st.warning("No metrics data available.")
+    st.stop()
+
+# Filter data and get recent rows as of the selected date
+df_to_plot = days_slice(metrics_index.window(raw_df, as_of, latest_n), selected_days, latest_n)
+prof.lap("filter")
+
+if df_to_plot.empty:
+    st.warning(f"No data available for {selected_tf} timeframe.")
+    st.stop()
 
+with tab1:
     if not selected_metrics:
         st.warning("Please select at least one metric.")
     else:
-        fig = go.Figure()
+        level = auto_level(len(df_to_plot)) if resolution == "Auto" else resolution
+        chart_df, chart_metrics = df_to_plot, selected_metrics
+        if level != "Daily":
+            # Buckets come from the full-history pyramid; only the range's edges are aggregated here
+            pyramid = resample_pyramid(raw_metrics_file)
+            pyramid.update(raw_df)
+            chart_metrics = [m for m in selected_metrics if pd.api.types.is_numeric_dtype(df_to_plot[m])]
+            chart_df = pyramid.frame(selected_days, chart_metrics, level,
+                                     df_to_plot["Date"].iloc[0], df_to_plot["Date"].iloc[-1])
+            st.caption(f"Showing {len(chart_df)} {level.lower()} bars for {len(df_to_plot)} days")
 
         if chart_type == "Line Chart":
-            for metric in selected_metrics:
-                fig.add_trace(go.Scatter(x=df_to_plot["Date"], y=df_to_plot[metric],
-                                         mode='lines+markers', name=metric))
+            fig = metric_lines_figure(chart_df, chart_metrics)
 
         elif chart_type == "Area Chart":
-            for metric in selected_metrics:
-                fig.add_trace(go.Scatter(x=df_to_plot["Date"], y=df_to_plot[metric],
-                                         mode='lines', name=metric, fill='tozeroy'))
+            fig = metric_lines_figure(chart_df, chart_metrics, fill='tozeroy')
 
-        elif chart_type == "Candlestick" and all(col in selected_metrics for col in ["Open", "High", "Low", "Close"]):
+        elif chart_type == "Candlestick" and all(col in chart_metrics for col in ["Open", "High", "Low", "Close"]):
             fig = go.Figure(data=[go.Candlestick(
-                x=df_to_plot['Date'],
-                open=df_to_plot['Open'],
-                high=df_to_plot['High'],
-                low=df_to_plot['Low'],
-                close=df_to_plot['Close'],
+                x=chart_df['Date'],
+                open=chart_df['Open'],
+                high=chart_df['High'],
+                low=chart_df['Low'],
+                close=chart_df['Close'],
                 name="Price"
             )])
-        elif chart_type == "Multi-Axis" and len(selected_metrics) >= 2:
+        elif chart_type == "Multi-Axis" and len(chart_metrics) >= 2:
             fig = make_subplots(specs=[[{"secondary_y": True}]])
-            fig.add_trace(go.Scatter(x=df_to_plot["Date"], y=df_to_plot[selected_metrics[0]],
-                                     name=selected_metrics[0]), secondary_y=False)
-            fig.add_trace(go.Scatter(x=df_to_plot["Date"], y=df_to_plot[selected_metrics[1]],
-                                     name=selected_metrics[1]), secondary_y=True)
+            fig.add_trace(go.Scatter(x=chart_df["Date"], y=chart_df[chart_metrics[0]],
+                                     name=chart_metrics[0]), secondary_y=False)
+            fig.add_trace(go.Scatter(x=chart_df["Date"], y=chart_df[chart_metrics[1]],
+                                     name=chart_metrics[1]), secondary_y=True)
         else:
             st.info("📌 For Candlestick, you must select Open, High, Low, Close. For Multi-Axis, select at least two metrics.")
             st.stop()
 
-        # Add moving average
+        # Indicator overlay - sliced from full-history values, so the first window is warm too
         if show_ma:
-            for metric in selected_metrics:
-                if df_to_plot[metric].dtype in [np.float64, np.int64]:
-                    ma = df_to_plot[metric].rolling(window=ma_period).mean()
-                    fig.add_trace(go.Scatter(x=df_to_plot["Date"], y=ma,
-                                             mode='lines', name=f"{metric} MA ({ma_period})",
-                                             line=dict(dash='dash')))
+            indicators = indicator_cache(raw_metrics_file)
+            indicators.update(raw_df)
+            for metric in chart_metrics:
+                if chart_df[metric].dtype in [np.float64, np.int64]:
+                    overlay = indicators.at(selected_days, metric, ma_kind, ma_period, chart_df["Date"])
+                    for column in overlay.columns:
+                        fig.add_trace(go.Scatter(x=chart_df["Date"], y=overlay[column],
+                                                 mode='lines', name=f"{metric} {column} ({ma_period})",
+                                                 line=dict(dash='dash')))
 
         fig.update_layout(
             xaxis_title="Date",
@@ -245,30 +322,131 @@ with tab1:
             template="plotly_white",
             height=500
         )
-        st.plotly_chart(fig, use_container_width=True)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("metric_chart", fig), use_container_width=True)
 
 # ----------------------------
 # Tab 2: Comparative Analysis
 # ----------------------------
 with tab2:
-    st.markdown("### 📈 Comparative Metric Lines")
-    selected = st.multiselect("Select metrics for comparative plotting:", metric_columns, default=metric_columns[:3])
     if selected:
+        prof.lap("render")
         fig = px.line(df_to_plot, x="Date", y=selected)
-        st.plotly_chart(fig, use_container_width=True)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("comparative", fig), use_container_width=True)
 
 # ----------------------------
 # Tab 3: Correlation Matrix
 # ----------------------------
 with tab3:
     st.markdown("### 🔍 Correlation Matrix")
+    prof.lap("render")
     corr = df_to_plot[selected_metrics].corr()
+    prof.lap("compute")
     fig = px.imshow(corr, text_auto=True, color_continuous_scale="RdBu", zmin=-1, zmax=1)
-    st.plotly_chart(fig, use_container_width=True)
+    prof.lap("figure")
+    st.plotly_chart(prof.sized("correlation", fig), use_container_width=True)
 
 # ----------------------------
 # Tab 4: Summary Statistics
 # ----------------------------
 with tab4:
     st.markdown("### 📋 Statistical Summary")
-    st.dataframe(df_to_plot[selected_metrics].describe().T.style.format(precision=2), use_container_width=True)
\ No newline at end of file
+    prof.lap("render")
+    summary_df = df_to_plot[selected_metrics].describe().T
+
+    # Where the latest value sits in this timeframe's full history and its last year
+    rank_index = percentile_index(raw_metrics_file)
+    rank_index.update(raw_df)
+    history = days_slice(metrics_index.window(raw_df, as_of), selected_days, len(metrics_index))
+    latest = history.iloc[-1]
+    ranked = [m for m in summary_df.index if pd.api.types.is_numeric_dtype(history[m])]
+    summary_df.loc[ranked, "Latest"] = [latest[m] for m in ranked]
+    if as_of is None:
+        summary_df.loc[ranked, "Pctl (All)"] = [rank_index.percentile(selected_days, m, latest[m]) for m in ranked]
+    else:
+        # The shared index includes later days; a past view ranks against the history it had
+        summary_df.loc[ranked, "Pctl (All)"] = [(history[m] <= latest[m]).sum() / history[m].notna().sum() * 100
+                                                for m in ranked]
+    summary_df.loc[ranked, f"Pctl ({YEAR_DAYS}D)"] = [rolling_percentile(history[m].to_numpy(), YEAR_DAYS)[-1]
+                                                      for m in ranked]
+    prof.lap("compute")
+    st.dataframe(prof.sized("summary_table", summary_df.style.format(precision=2)), use_container_width=True)
+
+# ----------------------------
+# Tab 5: Market States
+# ----------------------------
+with tab5:
+    st.markdown("### 🧭 Market States")
+    zscore_file = ZSCORE_FILES[selected_tf]
+    state_model_file = regimes.model_path(selected_tf)
+
+    if st.button("🔁 Refit States", help="Re-cluster the full history in the background"):
+        regimes.refit_in_background(zscore_file, state_model_file)
+
+    if regimes.refitting(state_model_file):
+        st.info("⏳ Fitting market states in the background - refresh in a moment.")
+    elif not os.path.exists(zscore_file):
+        st.warning(f"Z-Score file not found: {os.path.basename(zscore_file)}")
+    elif not os.path.exists(state_model_file):
+        regimes.refit_in_background(zscore_file, state_model_file)
+        st.info("⏳ No state model for this timeframe yet - fitting in the background, refresh in a moment.")
+    else:
+        prof.lap("render")
+        timeline_df, states_df = load_market_states(
+            zscore_file, state_model_file,
+            (os.path.getmtime(zscore_file), os.path.getmtime(state_model_file)))
+        prof.lap("load")
+        fig = state_timeline_figure(timeline_df, selected_tf)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("state_timeline", fig), use_container_width=True)
+        st.dataframe(states_df, use_container_width=True, hide_index=True)
+
+# ----------------------------
+# Tab 6: Seasonality
+# ----------------------------
+with tab6:
+    st.markdown("### 📅 Seasonality")
+    if materialized.view_mtime(seasonality.VIEW) is None:
+        # First run on this market: build the aggregates once, later ingests only add new days
+        with st.spinner("Building seasonality aggregates..."):
+            ingest.run(steps=[seasonality.VIEW])
+    prof.lap("render")
+    season_view = load_seasonality(materialized.view_mtime(seasonality.VIEW))
+    prof.lap("load")
+
+    if season_view is None:
+        st.warning("No RawMetrics or Net Table data to break down.")
+    else:
+        sc1, sc2, sc3 = st.columns(3)
+        with sc1:
+            season_source = st.radio("Source", list(seasonality.sources()), horizontal=True)
+        try:
+            available = sorted(season_view.loc[(season_source, selected_days)]
+                               .index.get_level_values("Metric").unique())
+        except KeyError:
+            available = []
+        with sc2:
+            default_metric = "Net" if "Net" in available else (available[0] if available else None)
+            season_metric = st.selectbox("Metric", available,
+                                         index=available.index(default_metric) if available else 0)
+        with sc3:
+            season_dimension = st.radio("Group by", seasonality.DIMENSIONS, horizontal=True)
+
+        if not available:
+            st.warning(f"No {season_source} data for {selected_tf}.")
+        else:
+            prof.lap("render")
+            breakdown_df = seasonality.breakdown(season_view, season_source, selected_days,
+                                                 season_metric, season_dimension)
+            prof.lap("compute")
+            fig = seasonality_figure(breakdown_df, season_source, season_metric, season_dimension, selected_tf)
+            prof.lap("figure")
+            st.plotly_chart(prof.sized("seasonality", fig), use_container_width=True)
+            st.dataframe(breakdown_df.style.format({"Mean": "{:.2f}", "Std": "{:.2f}", "CI": "±{:.2f}"}),
+                         use_container_width=True, hide_index=True)
+            st.caption("Mean per bucket over the full history with a 95% confidence interval. "
+                       "Aggregates are refreshed by `python -m core.ingest`.")
+
+prof.finish()
+keep_playing()
@@ -0,0 +1,103 @@
+import streamlit as st
+import pandas as pd
+from core.data import market_dirs
+from core.figures import top_moves_figure
+from core import diffs, ingest, materialized, profiling
+
+# Page configuration
+st.set_page_config(page_title="What Changed – QuantiveFlow™", layout="wide")
+
+# Security check
+if not st.session_state.get("logged_in"):
+    st.error("🔒 Access Denied: Please login first via the main page")
+    st.stop()
+
+# Header
+st.title("🆕 What Changed Since the Previous Session")
+st.markdown("Every metric, Z-Score, flow value, condition label and QC bucket, latest date vs the one before.")
+
+prof = profiling.start("Changes")
+
+@profiling.cache_data
+def load_changes(view, market_views):
+    # market_views is ((market, data_dir, mtime), ...); mtimes key the cache so a new ingest shows up
+    frames = []
+    for market, data_dir, _ in market_views:
+        df = materialized.read_view(view, data_dir)
+        if df is not None and not df.empty:
+            frames.append(df.assign(Market=market))
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    if view == diffs.VIEW:
+        # Each market's view is ranked on its own; rank the combined moves once here
+        df = diffs.rank_moves(df.drop(columns="Rank"))
+    return df[["Market"] + [c for c in df.columns if c != "Market"]]
+
+markets = market_dirs()
+for data_dir in markets.values():
+    if materialized.view_mtime(diffs.VIEW, data_dir) is None:
+        # Normally written by core.ingest; build it once for markets that haven't been ingested
+        with st.spinner("Computing changes..."):
+            ingest.run(data_dir, steps=[diffs.VIEW])
+market_views = tuple((m, d, materialized.view_mtime(diffs.VIEW, d)) for m, d in markets.items())
+prof.lap("render")
+moves_df = load_changes(diffs.VIEW, market_views)
+labels_df = load_changes(diffs.LABEL_VIEW, market_views)
+prof.lap("load")
+
+if moves_df.empty:
+    st.warning("No changes to show - run `python -m core.ingest` after updating the data files.")
+    st.stop()
+
+# Controls
+col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+with col1:
+    selected_markets = st.multiselect("🌍 Markets", list(markets), default=list(markets))
+with col2:
+    sources = list(diffs.SOURCES)
+    selected_sources = st.multiselect("📂 Sources", sources, default=sources)
+with col3:
+    top_n = st.slider("Top moves", 10, 100, 25)
+with col4:
+    big_only = st.checkbox(f"|Score| ≥ {diffs.BIG_MOVE:g} only")
+
+prof.lap("render")
+moves = moves_df[moves_df["Market"].isin(selected_markets) & moves_df["Source"].isin(selected_sources)]
+if big_only:
+    moves = moves[moves["Score"].abs() >= diffs.BIG_MOVE]
+flips = labels_df[labels_df["Market"].isin(selected_markets) & labels_df["Source"].isin(selected_sources)
+                  & labels_df["Changed"]] if not labels_df.empty else labels_df
+prof.lap("filter")
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Big Moves", int((moves["Score"].abs() >= diffs.BIG_MOVE).sum()),
+            help=f"Changes of {diffs.BIG_MOVE:g}+ typical daily changes")
+col2.metric("Label Changes", len(flips))
+col3.metric("Markets", len(selected_markets))
+
+tab1, tab2 = st.tabs(["📈 Biggest Moves", "🏷️ Label Changes"])
+
+with tab1:
+    # Moves are ranked on load, so the top moves are the first rows
+    top = moves.head(top_n)
+    if top.empty:
+        st.info("No moves match the current filters.")
+    else:
+        fig = top_moves_figure(top)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("top_moves", fig), use_container_width=True)
+        st.dataframe(top.drop(columns="Rank").style.format(
+            {"Previous": "{:.4g}", "Latest": "{:.4g}", "Change": "{:+.4g}", "Change %": "{:+.1f}%",
+             "Score": "{:+.2f}"}, na_rep="–"), use_container_width=True, hide_index=True)
+
+with tab2:
+    if flips.empty:
+        st.info("No condition labels or QC buckets changed.")
+    else:
+        st.dataframe(flips.drop(columns="Changed"), use_container_width=True, hide_index=True)
+
+st.caption("Scores divide each change by the standard deviation of that column's daily changes. "
+           "Refreshed by `python -m core.ingest`.")
+
+prof.finish()
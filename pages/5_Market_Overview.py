@@ -0,0 +1,151 @@
+import streamlit as st
+import pandas as pd
+import os
+from core.data import MARKETS, ZSCORE_FILES, load_table, market_dirs, market_file, metric_names
+from core.figures import co_exceedance_figure, rolling_correlation_figure
+from core.crossmarket import ROLLING_WINDOW, ZScorePanel
+from core import ingest, materialized, profiling, summaries
+
+# Page configuration
+st.set_page_config(page_title="All Markets – QuantiveFlow™", layout="wide")
+
+# Security check
+if not st.session_state.get("logged_in"):
+    st.error("🔒 Access Denied: Please login first via the main page")
+    st.stop()
+
+# Header
+st.title("🌐 All Markets Overview")
+st.markdown("Consensus sentiment, latest condition, RI/QC and the strongest Z-Scores for every market.")
+
+prof = profiling.start("Overview")
+
+@profiling.cache_data
+def load_records(market_views):
+    # market_views is ((market, data_dir, mtime), ...); mtimes key the cache so a new ingest shows up
+    return summaries.overview({m: materialized.read_view(summaries.VIEW, d) if d else None
+                               for m, d, _ in market_views})
+
+@st.cache_resource
+def zscore_panel(tf, market_paths):
+    # One panel per timeframe shared by all sessions, with the file mtimes merged so far
+    metrics = metric_names(next(p for _, p in market_paths if os.path.exists(p)))
+    return ZScorePanel([m for m, _ in market_paths], metrics), {}
+
+def refresh_panel(tf, markets):
+    market_paths = tuple((m, market_file(d, ZSCORE_FILES[tf])) for m, d in markets.items())
+    panel, merged = zscore_panel(tf, market_paths)
+    for market, path in market_paths:
+        if os.path.exists(path) and merged.get(market) != os.path.getmtime(path):
+            panel.update(market, load_table(path))  # only dates past the ones already merged are read in
+            merged[market] = os.path.getmtime(path)
+    return panel
+
+def sentiment_style(val):
+    colors = {"Bullish": "#28a745", "Bearish": "#dc3545", "Neutral": "#6c757d"}
+    return f"color: {colors[val]}; font-weight: bold" if val in colors else ""
+
+def condition_style(val):
+    return "background-color: #fff3cd" if isinstance(val, str) and "Alert" in val else ""
+
+markets = market_dirs()
+col1, col2 = st.columns([1, 3])
+with col1:
+    rebuild = st.button("🔄 Rebuild Summaries", help="Recompute every market's summary in parallel")
+missing = {m: d for m, d in markets.items() if materialized.view_mtime(summaries.VIEW, d) is None}
+if rebuild or missing:
+    # Summaries are normally written by core.ingest; markets are rebuilt in parallel processes
+    with st.spinner(f"Summarizing {len(markets if rebuild else missing)} markets..."):
+        ingest.run_markets(markets if rebuild else missing, full=rebuild, steps=[summaries.VIEW])
+
+market_views = tuple((m, markets.get(m), materialized.view_mtime(summaries.VIEW, markets[m]) if m in markets else None)
+                     for m in MARKETS)
+prof.lap("render")
+overview_df = load_records(market_views)
+prof.lap("load")
+
+with_data = overview_df[overview_df["Date"].notna()] if "Date" in overview_df.columns else overview_df.iloc[:0]
+sentiments = with_data["Sentiment"].value_counts() if "Sentiment" in with_data.columns else pd.Series(dtype=int)
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Markets With Data", f"{len(with_data)}/{len(MARKETS)}")
+col2.metric("Bullish", int(sentiments.get("Bullish", 0)))
+col3.metric("Bearish", int(sentiments.get("Bearish", 0)))
+col4.metric("Critical Z-Scores", int(with_data["Critical"].sum()) if "Critical" in with_data.columns else 0)
+
+tab1, tab2, tab3 = st.tabs(["🗂️ Market Grid", "🔗 Co-Anomalies", "📉 Cross-Market Correlation"])
+
+styled = overview_df.style
+if "Sentiment" in overview_df.columns:
+    styled = styled.map(sentiment_style, subset=["Sentiment"])
+conditions = [c for c in overview_df.columns if c.endswith("D") and c[:-1].isdigit()]
+if conditions:
+    styled = styled.map(condition_style, subset=conditions)
+styled = styled.format({c: "{:.2f}" for c in ["RI_4", "RI_8"] if c in overview_df.columns}, na_rep="–")
+with tab1:
+    st.dataframe(prof.sized("overview_grid", styled), use_container_width=True, hide_index=True)
+    st.caption(f"Extreme: latest-day |Z| ≥ {summaries.EXTREME_Z:g} across all timeframes; critical: ≥ 2.5. "
+               "Markets without data show blank rows. Refreshed by `python -m core.ingest --all-markets`.")
+
+with tab2:
+    st.markdown("### 🔗 Which Markets Are Anomalous Together")
+    if len(markets) < 2:
+        st.info("Cross-market views need data for two or more markets (set QF_MARKETS_DIR).")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            co_tf = st.selectbox("📅 Timeframe", list(ZSCORE_FILES), key="co_tf")
+        prof.lap("render")
+        panel = refresh_panel(co_tf, markets)
+        prof.lap("load")
+        with col2:
+            co_threshold = st.selectbox("⚠️ Threshold", [1.5, 2.0, 2.5], index=1, key="co_threshold")
+        with col3:
+            co_metric = st.selectbox("🧮 Metric", ["All metrics"] + panel.metrics, key="co_metric")
+        with col4:
+            co_last = st.number_input("📆 Last N days (0 = all)", 0, max(len(panel.dates), 1), 0, key="co_last")
+
+        prof.lap("render")
+        metric = None if co_metric == "All metrics" else co_metric
+        matrix = panel.co_exceedance(co_threshold, metric, co_last or None)
+        pairs_df = panel.metric_co_exceedance(co_threshold, co_last or None)
+        prof.lap("compute")
+        fig = co_exceedance_figure(matrix, panel.markets,
+                                   f"Days with |Z| ≥ {co_threshold} in both markets ({co_metric}, {co_tf})")
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("co_exceedance", fig), use_container_width=True)
+        st.markdown("#### Metrics most often extreme in two markets at once")
+        st.dataframe(pairs_df.head(20), use_container_width=True, hide_index=True)
+        st.caption("Diagonal cells count each market's own extreme days.")
+
+with tab3:
+    st.markdown("### 📉 Rolling Cross-Market Correlation")
+    if len(markets) < 2:
+        st.info("Cross-market views need data for two or more markets (set QF_MARKETS_DIR).")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            corr_tf = st.selectbox("📅 Timeframe", list(ZSCORE_FILES), key="corr_tf")
+        prof.lap("render")
+        panel = refresh_panel(corr_tf, markets)
+        prof.lap("load")
+        with col2:
+            corr_metric = st.selectbox("🧮 Metric", panel.metrics,
+                                       index=panel.metrics.index("Close") if "Close" in panel.metrics else 0)
+        with col3:
+            reference = st.selectbox("🎯 Against", panel.markets)
+        with col4:
+            corr_window = st.slider("Window (days)", 10, 252, ROLLING_WINDOW)
+
+        prof.lap("render")
+        corr_dates, corr = panel.rolling_correlation(corr_metric, corr_window)
+        ref = panel.markets.index(reference)
+        series = {m: corr[:, ref, i] for i, m in enumerate(panel.markets) if i != ref}
+        prof.lap("compute")
+        fig = rolling_correlation_figure(corr_dates, series, corr_metric, reference, corr_window)
+        prof.lap("figure")
+        st.plotly_chart(prof.sized("rolling_correlation", fig), use_container_width=True)
+        latest_corr = pd.DataFrame(corr[-1], index=panel.markets, columns=panel.markets)
+        st.markdown(f"#### Latest {corr_window}-day correlation matrix")
+        st.dataframe(latest_corr.style.format("{:.2f}", na_rep="–"), use_container_width=True)
+
+prof.finish()
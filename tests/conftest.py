@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def bars():
+    """120 sessions of 30-minute bars whose volatility changes from day to day."""
+    rng = np.random.default_rng(1)
+    n_days, per_day = 120, 16
+    dates = pd.bdate_range(end="2025-06-13", periods=n_days)
+    ts = (dates.values[:, None] + (np.arange(per_day) * np.timedelta64(30, "m"))[None, :]).ravel()
+    sigma = np.repeat(rng.uniform(0.02, 0.25, n_days), per_day)
+    close = 195.0 + np.cumsum(rng.normal(0, 1, len(ts)) * sigma)
+    open_ = np.concatenate(([195.0], close[:-1]))
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 1, len(ts))) * sigma / 2
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 1, len(ts))) * sigma / 2
+    return pd.DataFrame({"Datetime": ts, "Open": open_.round(2), "High": high.round(2), "Low": low.round(2),
+                         "Close": close.round(2), "Volume": rng.integers(500, 3000, len(ts))})
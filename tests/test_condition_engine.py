@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from core import condition_engine
+from core.profile_engine import DailyProfiles
+
+TICK = 0.01
+
+
+def test_smooth_does_not_depend_on_the_batch(bars):
+    profiles = DailyProfiles.from_bars(bars, TICK)
+    ends = np.arange(len(profiles))
+    for n in (1, 5):
+        _, hist = profiles.composite(n, ends[n - 1:])
+        batched = condition_engine.smooth(hist)
+        for i, end in enumerate(ends[n - 1:]):
+            _, alone = profiles.composite(n, [end])
+            np.testing.assert_allclose(batched[i, :alone.shape[1]], condition_engine.smooth(alone)[0])
+            assert not batched[i, alone.shape[1]:].any()
+
+
+def test_incremental_update_matches_full_build(bars, tmp_path):
+    store = tmp_path / "daily_profiles.npz"
+    day = pd.to_datetime(bars["Datetime"]).dt.normalize()
+    last = day.unique()[-5]
+
+    DailyProfiles.from_bars(bars[day < last], TICK).save(str(store))
+    condition_engine.update_market_condition(str(store), str(tmp_path / "incremental.csv"))
+    profiles, _ = DailyProfiles.load(str(store)).extend(bars)
+    profiles.save(str(store))
+    condition_engine.update_market_condition(str(store), str(tmp_path / "incremental.csv"))
+
+    DailyProfiles.from_bars(bars, TICK).save(str(store))
+    condition_engine.update_market_condition(str(store), str(tmp_path / "full.csv"), full=True)
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "incremental.csv"), pd.read_csv(tmp_path / "full.csv"))
@@ -0,0 +1,94 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from core import profile_engine
+from core.data import TIMEFRAMES
+
+TICK = 0.01
+
+
+def naive_histogram(bars):
+    """TPOs per tick, one per bar for every tick between its Low and High."""
+    counts = Counter()
+    for low, high in zip(bars["Low"], bars["High"]):
+        counts.update(range(int(np.floor(low / TICK + 1e-9)), int(np.floor(high / TICK + 1e-9)) + 1))
+    return counts
+
+
+def naive_profile(counts):
+    ticks = sorted(counts)
+    mid = (ticks[0] + ticks[-1]) / 2
+    top = max(counts.values())
+    poc = min((t for t in ticks if counts[t] == top), key=lambda t: (abs(t - mid), t))
+    total = sum(counts.values())
+    target = np.ceil(profile_engine.VALUE_AREA * total)
+    best = None
+    for lo in range(ticks[0], poc + 1):
+        held, hi = sum(counts[t] for t in range(lo, poc + 1)), poc
+        while held < target:
+            hi += 1
+            held += counts[hi]
+        if best is None or hi - lo < best[1] - best[0]:
+            best = (lo, hi)
+    return {"POC": poc, "VAL": best[0], "VAH": best[1], "Total TPO": total,
+            "TPO Ab. POC": sum(c for t, c in counts.items() if t > poc),
+            "TPO Bl. POC": sum(c for t, c in counts.items() if t < poc)}
+
+
+def test_poc_and_tpos_match_a_naive_histogram(bars):
+    df = profile_engine.build_raw_metrics(bars, TICK)
+    day = pd.to_datetime(bars["Datetime"]).dt.normalize()
+    sessions = day.unique()
+    for n in TIMEFRAMES:
+        for end in range(n - 1, len(sessions), 17):
+            window = bars[(day >= sessions[end - n + 1]) & (day <= sessions[end])]
+            expected = naive_profile(naive_histogram(window))
+            date = profile_engine.format_date(sessions[end])
+            row = df[(df["Date"] == date) & (df["Days"] == n)].iloc[0]
+            for column in ("POC", "VAH", "VAL"):
+                assert row[column] == round(expected[column] * TICK, 2), (date, n, column)
+            for column in ("Total TPO", "TPO Ab. POC", "TPO Bl. POC"):
+                assert row[column] == expected[column], (date, n, column)
+
+
+def _update(bars, tmp_path, name, **kwargs):
+    bars_path = tmp_path / "bars.csv"
+    bars.to_csv(bars_path, index=False)
+    out = tmp_path / name / "RawMetrics.csv"
+    profile_engine.update_market(str(bars_path), TICK, TICK, str(out), **kwargs)
+    return out
+
+
+def test_incremental_update_matches_full_build(bars, tmp_path):
+    day = pd.to_datetime(bars["Datetime"]).dt.normalize()
+    # The earlier run ends mid-session, which the update has to rebuild
+    partial = bars[(day < day.unique()[-5]) | (bars.index < bars[day == day.unique()[-5]].index[8])]
+    _update(partial, tmp_path, "incremental")
+    incremental = _update(bars, tmp_path, "incremental")
+    full = _update(bars, tmp_path, "full", full=True)
+    pd.testing.assert_frame_equal(pd.read_csv(incremental), pd.read_csv(full))
+
+
+def test_update_with_other_window_lengths_keeps_existing_ones(bars, tmp_path):
+    out = _update(bars, tmp_path, "out")
+    before = pd.read_csv(out)
+    _update(bars, tmp_path, "out", timeframes=[7, 30])
+    after = pd.read_csv(out)
+
+    pd.testing.assert_frame_equal(after[after["Days"].isin(TIMEFRAMES)].reset_index(drop=True), before)
+    latest = after[after["Date"] == after["Date"].iloc[0]]
+    assert latest["Days"].tolist() == sorted(TIMEFRAMES + [7, 30])
+
+
+def test_rewriting_keeps_external_columns(bars, tmp_path):
+    out = _update(bars, tmp_path, "out")
+    df = pd.read_csv(out)
+    df["TFF"], df["SF"] = np.arange(len(df)), 0.25
+    df.to_csv(out, index=False)
+
+    _update(bars, tmp_path, "out")
+    after = pd.read_csv(out)
+    assert (after["TFF"] == np.arange(len(df))).all()
+    assert (after["SF"] == 0.25).all()